@@ -1,6 +1,10 @@
+import threading
+
 from fastapi import FastAPI, status, Response
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 
+from scripts.health import HEALTH
+
 app = FastAPI()
 
 
@@ -10,11 +14,32 @@ def healthz():
 
 
 @app.get("/ready")
-def ready():
-    # check ZMQ sockets and IB connection
-    ...
+def ready(response: Response):
+    # Answered from in-memory component state (scripts.health); nothing is probed here
+    ok, problems = HEALTH.ready()
+    if not ok:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "unavailable", "problems": problems}
+    return {"status": "ok"}
+
+
+@app.get("/components")
+def components():
+    return HEALTH.snapshot()
 
 
 @app.get("/metrics")
 def metrics():
     return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+def serve_in_background(port: int, host: str = "0.0.0.0"):
+    """Run this app on a daemon thread inside the calling process; return the server.
+
+    uvicorn leaves signal handling to the host process when not on the main thread.
+    """
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="health-api", daemon=True).start()
+    return server
@@ -0,0 +1,4 @@
+"""
+bench package: stand-alone micro-benchmarks for hot paths.
+Run a module directly, e.g. ``python -m bench.tick_handler``.
+"""
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Cold-start import benchmark for the receivers.
+
+Runs ``python -X importtime -c "import <module>"`` in a fresh interpreter per
+module (``--repeat`` times, best run kept), reports the cumulative import
+time and the heaviest imports underneath, and lists any heavy optional
+libraries that were pulled in.  With ``--budget-ms`` it exits non-zero when
+a module is over budget or loads one of the heavy libraries, so it can gate
+CI / image builds.
+
+    python -m bench.import_time
+    python -m bench.import_time scripts.v1_receiver --budget-ms 400 --top 15
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+
+RECEIVERS = (
+    "scripts.v1_receiver",
+    "scripts.cr_receiver",
+    "scripts.cancel_replace_receiver",
+    "ib.ib_listener",
+    "scripts.core",
+)
+# Must only be imported when a code path actually needs them
+HEAVY = ("pandas", "numpy", "duckdb", "ib_insync", "yfinance")
+
+
+def measure(module: str) -> Tuple[int, List[Tuple[int, str]], List[str]]:
+    """Return ``(total_us, [(cumulative_us, name)…], heavy_modules_loaded)``."""
+    code = (
+        f"import sys, {module}\n"
+        f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # Children are printed before their parent; a top-level line (one space
+    # of indent) closes a tree, so keep only the tree that ends in ``module``.
+    total, tree = 0, {}
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self, cumulative, name = line[len("import time:"):].split("|")
+        if len(name) - len(name.lstrip()) > 1:
+            tree[name.strip()] = int(cumulative)
+        elif name.strip() == module:
+            total = int(cumulative)
+            break
+        else:
+            tree = {}
+    heavy = [m for m in out.stdout.strip().split(",") if m]
+    ranked = sorted(((us, name) for name, us in tree.items()), reverse=True)
+    return total, ranked, heavy
+
+
+def main() -> int:
+    p = argparse.ArgumentParser("receiver import-time benchmark")
+    p.add_argument("modules", nargs="*", default=list(RECEIVERS))
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--top", type=int, default=8, help="heaviest imports to list per module")
+    p.add_argument("--budget-ms", type=float, default=None)
+    args = p.parse_args()
+
+    failed = False
+    for module in args.modules:
+        runs = [measure(module) for _ in range(args.repeat)]
+        total_us, ranked, heavy = min(runs, key=lambda r: r[0])
+        over = args.budget_ms is not None and (total_us / 1000 > args.budget_ms or heavy)
+        failed |= bool(over)
+        print(f"{module:36s} {total_us / 1000:8.1f} ms  heavy={','.join(heavy) or '-'}{'  OVER BUDGET' if over else ''}")
+        for us, name in ranked[: args.top]:
+            print(f"    {us / 1000:8.1f} ms  {name}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
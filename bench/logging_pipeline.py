@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the logging pipeline under a paced trading-thread load.
+
+Logs ``--rate`` messages per second (default 10 000) with ``extra`` fields
+for ``--seconds`` seconds, once through the original synchronous setup
+(``StreamHandler`` + ``FileHandler`` with the ``json.dumps`` formatter, kept
+here as ``legacy_setup``) and once through :func:`utils.utils.setup_logger`
+(``QueueHandler`` → ``QueueListener`` with the faster ``JsonFormatter``).
+Reports the per-call latency seen by the logging thread and how long the
+writer needed to catch up afterwards.  Console output goes to /dev/null.
+
+    JSON_LOGS=1 python -m bench.logging_pipeline --rate 10000 --seconds 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from utils import utils
+
+
+class LegacyJsonFormatter(logging.Formatter):
+    """The pre-optimisation ``JsonFormatter``, verbatim."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_record = {
+            "time": self.formatTime(record, "%Y-%m-%d %H:%M:%S"),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        return json.dumps(log_record)
+
+
+def legacy_setup(name: str, log_file: str) -> logging.Logger:
+    """The pre-optimisation ``setup_logger`` (JSON variant), verbatim."""
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    formatter = LegacyJsonFormatter()
+    ch = logging.StreamHandler()
+    ch.setFormatter(formatter)
+    logger.addHandler(ch)
+    fh = logging.FileHandler(log_file)
+    fh.setFormatter(formatter)
+    logger.addHandler(fh)
+    return logger
+
+
+def _percentile(sorted_ns, q: float) -> float:
+    return sorted_ns[min(len(sorted_ns) - 1, int(q * len(sorted_ns)))] / 1000
+
+
+def _run(logger: logging.Logger, rate: int, seconds: float, drain) -> dict:
+    n = int(rate * seconds)
+    period_ns = 1_000_000_000 // rate
+    lat = []
+    start = time.perf_counter_ns()
+    for i in range(n):
+        due = start + i * period_ns
+        while time.perf_counter_ns() < due:
+            pass
+        t0 = time.perf_counter_ns()
+        logger.info("fill %s %d @ %.2f", "AAPL", i, 100.0, extra={"order_id": i, "venue": "SMART"})
+        lat.append(time.perf_counter_ns() - t0)
+    sent = time.perf_counter_ns()
+    drain()
+    done = time.perf_counter_ns()
+    lat.sort()
+    return {
+        "p50_us": _percentile(lat, 0.50),
+        "p99_us": _percentile(lat, 0.99),
+        "max_us": lat[-1] / 1000,
+        "achieved_rate": n / ((sent - start) / 1e9),
+        "catch_up_ms": (done - sent) / 1e6,
+    }
+
+
+def _report(label: str, r: dict) -> None:
+    print(
+        f"{label:7s} p50 {r['p50_us']:7.1f} µs  p99 {r['p99_us']:7.1f} µs  max {r['max_us']:8.1f} µs  "
+        f"rate {r['achieved_rate']:8.0f}/s  writer catch-up {r['catch_up_ms']:7.1f} ms"
+    )
+
+
+def main() -> None:
+    p = argparse.ArgumentParser("logging pipeline benchmark")
+    p.add_argument("--rate", type=int, default=10_000, help="messages per second")
+    p.add_argument("--seconds", type=float, default=3.0)
+    args = p.parse_args()
+
+    os.environ.setdefault("JSON_LOGS", "1")
+    sys.stderr = open(os.devnull, "w")  # console handlers write to stderr
+    with tempfile.TemporaryDirectory() as tmp:
+        before = _run(
+            legacy_setup("bench.legacy", os.path.join(tmp, "legacy.log")),
+            args.rate, args.seconds, lambda: None,
+        )
+        after = _run(
+            utils.setup_logger("bench.queue", log_file=os.path.join(tmp, "queue.log")),
+            args.rate, args.seconds, utils.flush_logs,
+        )
+    sys.stderr = sys.__stderr__
+    print(f"{args.rate} msgs/s for {args.seconds:g}s, JSON + extra fields, orjson={'yes' if utils.orjson else 'no'}")
+    _report("before", before)
+    _report("after", after)
+    print(f"p99 speedup {before['p99_us'] / after['p99_us']:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for per-message metrics overhead.
+
+Each "message" does what the receivers do per order: bump the per-symbol
+and per-type counters and observe the per-symbol latency.  ``direct`` calls
+``.labels(...)`` on the raw prometheus_client metrics (the old code);
+``facade`` goes through :class:`scripts.metrics_server.FastCounter` /
+:class:`~scripts.metrics_server.FastHistogram`.  The facade number includes
+a ``flush()`` at the end so the deferred work is not hidden.
+
+    python -m bench.metrics_facade --msgs 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from prometheus_client import CollectorRegistry, Counter, Histogram
+
+from scripts.metrics_server import FastCounter, FastHistogram
+
+SYMBOLS = ("AAPL", "MSFT", "NVDA", "SPY", "QQQ", "TSLA", "AMZN", "META")
+
+
+def _metrics():
+    reg = CollectorRegistry()
+    by_symbol = Counter("bench_orders_by_symbol", "b", ["symbol"], registry=reg)
+    by_type = Counter("bench_orders_by_type", "b", ["type"], registry=reg)
+    latency = Histogram("bench_order_latency_seconds", "b", ["symbol"], registry=reg)
+    return by_symbol, by_type, latency
+
+
+def _run(fn, n: int, done=None) -> float:
+    """Return ns/message for ``n`` calls of ``fn(symbol, latency)``."""
+    for i in range(1000):  # warm-up
+        fn(SYMBOLS[i & 7], 0.001)
+    t0 = time.perf_counter_ns()
+    for i in range(n):
+        fn(SYMBOLS[i & 7], (i & 15) * 0.0005)
+    if done is not None:
+        done()
+    return (time.perf_counter_ns() - t0) / n
+
+
+def main() -> None:
+    p = argparse.ArgumentParser("metrics facade micro-benchmark")
+    p.add_argument("--msgs", type=int, default=200_000)
+    args = p.parse_args()
+
+    by_symbol, by_type, latency = _metrics()
+
+    def direct(sym, dt):
+        by_symbol.labels(symbol=sym).inc()
+        by_type.labels(type="NEW").inc()
+        latency.labels(symbol=sym).observe(dt)
+
+    f_symbol, f_type, f_latency = FastCounter(by_symbol), FastCounter(by_type), FastHistogram(latency)
+
+    def facade(sym, dt):
+        f_symbol.inc(sym)
+        f_type.inc("NEW")
+        f_latency.observe(dt, sym)
+
+    def flush():
+        for f in (f_symbol, f_type, f_latency):
+            f.flush()
+
+    before = _run(direct, args.msgs)
+    after = _run(facade, args.msgs, flush)
+    print(f"direct  {before:8.0f} ns/msg")
+    print(f"facade  {after:8.0f} ns/msg  (flush included)")
+    print(f"speedup {before / after:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 # stream_live_data.py
 import threading
 import time
-from dataclasses import dataclass, field
-import pandas as pd
+from collections import deque
+from typing import Deque, Dict, Iterable, Iterator, Optional, Set, Tuple
 
 # IB API Imports
 from ibapi.client import EClient
@@ -12,30 +12,134 @@ from ibapi.wrapper import EWrapper
 from scripts.contracts import stock, future, option, create_contract
 from scripts.wrapper import IBWrapper
 from ib.client import IBClient
-from utils.utils import setup_logger
+from utils.utils import Tick, setup_logger
 
 logger = setup_logger()
 
-@dataclass
-class Tick:
-    time: int
-    bid_price: float
-    ask_price: float
-    bid_size: float
-    ask_size: float
-    timestamp_: pd.Timestamp = field(init=False)
-
-    def __post_init__(self):
-        self.timestamp_ = pd.to_datetime(self.time, unit="s")
-        self.bid_price = float(self.bid_price)
-        self.ask_price = float(self.ask_price)
-        self.bid_size = int(self.bid_size)
-        self.ask_size = int(self.ask_size)
+RawTick = Tuple[int, float, float, float, float]  # time, bid, ask, bid size, ask size
+
+
+class TickStreams:
+    """
+    Bounded per-request tick queues, filled by the IB reader thread and
+    drained by one or more consumers.
+
+    Each request id holds at most ``capacity`` ticks; when its consumer
+    falls behind, the oldest tick is dropped and counted in
+    ``dropped[req_id]``.  ``get()`` without a request id multiplexes every
+    stream, taking one tick per stream in turn so one busy contract cannot
+    starve the others.
+    """
+
+    def __init__(self, capacity: int = 10_000):
+        self.capacity = capacity
+        self.dropped: Dict[int, int] = {}
+        self._queues: Dict[int, Deque[RawTick]] = {}
+        self._closed: Set[int] = set()
+        self._ready: Deque[int] = deque()  # request ids with queued ticks, round-robin
+        self._ready_set: Set[int] = set()
+        self._cond = threading.Condition()
+
+    def open(self, req_id: int) -> None:
+        with self._cond:
+            self._queues[req_id] = deque(maxlen=self.capacity)
+            self._closed.discard(req_id)
+            self.dropped.setdefault(req_id, 0)
+
+    def close(self, req_id: int) -> None:
+        """Stop accepting ticks for ``req_id``; queued ones can still be read."""
+        with self._cond:
+            self._closed.add(req_id)
+            if not self._queues.get(req_id):
+                self._queues.pop(req_id, None)
+            self._cond.notify_all()
+
+    def put(self, req_id: int, tick: RawTick) -> None:
+        with self._cond:
+            q = self._queues.get(req_id)
+            if q is None or req_id in self._closed:
+                return  # late tick after cancel
+            if len(q) == self.capacity:
+                self.dropped[req_id] += 1  # deque(maxlen) evicts the oldest
+            q.append(tick)
+            if req_id not in self._ready_set:
+                self._ready_set.add(req_id)
+                self._ready.append(req_id)
+            self._cond.notify_all()
+
+    def get(
+        self, req_id: Optional[int] = None, timeout: Optional[float] = None
+    ) -> Optional[Tuple[int, RawTick]]:
+        """
+        Next ``(req_id, tick)`` from ``req_id`` (or from any stream).
+
+        Returns ``None`` on timeout, or once the stream (or, multiplexed,
+        every stream) is closed and drained.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                item = self._pop(req_id)
+                if item is not None:
+                    return item
+                if req_id is not None and req_id not in self._queues:
+                    return None
+                if req_id is None and not self._queues and self._closed:
+                    return None  # every stream closed and drained
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def drain_into(self, buffer, req_id: int) -> int:
+        """Move every queued tick of ``req_id`` into a ``TickBuffer`` without
+        building ``Tick`` objects; return how many were moved."""
+        with self._cond:
+            q = self._queues.get(req_id)
+            if not q:
+                return 0
+            n = len(q)
+            append = buffer.append
+            for tick in q:
+                append(*tick)
+            q.clear()
+            self._forget_if_done(req_id)
+            return n
+
+    def _pop(self, req_id: Optional[int]) -> Optional[Tuple[int, RawTick]]:
+        if req_id is None:
+            while self._ready:
+                rid = self._ready.popleft()
+                q = self._queues.get(rid)
+                if not q:  # drained by a per-request reader meanwhile
+                    self._ready_set.discard(rid)
+                    continue
+                item = (rid, q.popleft())
+                if q:
+                    self._ready.append(rid)
+                else:
+                    self._ready_set.discard(rid)
+                    self._forget_if_done(rid)
+                return item
+            return None
+        q = self._queues.get(req_id)
+        if not q:
+            return None
+        item = (req_id, q.popleft())
+        if not q:
+            self._forget_if_done(req_id)
+        return item
+
+    def _forget_if_done(self, req_id: int) -> None:
+        if req_id in self._closed:
+            self._queues.pop(req_id, None)
+
 
 class LiveDataApp(IBWrapper, IBClient):
-    def __init__(self, host='127.0.0.1', port=7497, clientId=11):
+    def __init__(self, host='127.0.0.1', port=7497, clientId=11, queue_size=10_000):
         IBWrapper.__init__(self)
         IBClient.__init__(self, wrapper=self)
+        self.streams = TickStreams(queue_size)
         self.host = host
         self.port = port
         self.clientId = clientId
@@ -43,7 +147,12 @@ class LiveDataApp(IBWrapper, IBClient):
         threading.Thread(target=self.run, daemon=True).start()
         time.sleep(2)
 
-    def get_streaming_data(self, request_id, contract):
+    def tickByTickBidAsk(self, reqId, time, bidPrice, askPrice, bidSize, askSize, tickAttribBidAsk):
+        # Runs on the reader thread: queue the raw values, build Ticks on the consumer side
+        self.streams.put(reqId, (time, bidPrice, askPrice, bidSize, askSize))
+
+    def start_streaming_data(self, request_id, contract):
+        self.streams.open(request_id)
         self.reqTickByTickData(
             reqId=request_id,
             contract=contract,
@@ -52,13 +161,32 @@ class LiveDataApp(IBWrapper, IBClient):
             ignoreSize=True
         )
 
+    def get_streaming_data(self, request_id, contract):
+        """Subscribe to ``contract`` and yield its ``Tick``s until stopped."""
+        self.start_streaming_data(request_id, contract)
+        while True:
+            item = self.streams.get(request_id)
+            if item is None:
+                return
+            yield Tick(*item[1])
+
+    def iter_streaming_data(self, requests: Iterable[Tuple[int, object]], timeout=None) -> Iterator[Tuple[int, Tick]]:
+        """Subscribe to every ``(request_id, contract)`` and yield ``(request_id, Tick)``
+        from all of them on one reader; stops after ``timeout`` seconds without a tick."""
+        for request_id, contract in requests:
+            self.start_streaming_data(request_id, contract)
         while True:
-            if self.stream_event.is_set():
-                yield Tick(*self.streaming_data[request_id])
-                self.stream_event.clear()
+            item = self.streams.get(timeout=timeout)
+            if item is None:
+                return
+            yield item[0], Tick(*item[1])
 
     def stop_streaming_data(self, request_id):
         self.cancelTickByTickData(reqId=request_id)
+        self.streams.close(request_id)
+        dropped = self.streams.dropped.get(request_id, 0)
+        if dropped:
+            logger.warning(f"⚠️ Stream {request_id} dropped {dropped} ticks (consumer too slow)")
 
 # Example dynamic function to stream live data
 def stream_live_data(symbol, secType="STK", exchange="SMART", currency="USD", contractMonth=None, strike=None, right=None):
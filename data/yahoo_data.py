@@ -1,22 +1,204 @@
 # yahoo_data.py
-import yfinance as yf
-import pandas as pd
+"""
+Yahoo Finance history, stored incrementally in one long SQLite table.
+
+Every bar lives in ``bars(symbol, interval, ts, open, high, low, close,
+volume)`` keyed by ``(symbol, interval, ts)`` (``ts`` = bar start, unix
+seconds UTC).  A refresh asks the table for the newest stored bar of each
+ticker and only fetches from there on, re-fetching that last bar because it
+may have been partial, and upserts the result.  Universes are fetched on a
+thread pool with a shared request rate limit; all writes happen on the
+calling thread.
+
+    load_universe(["AAPL", "MSFT"], interval="1h", period="1y")
+"""
 import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from scripts.history_cache import default_cache, period_start
+
+DB_PATH = "yahoo_data.sqlite"
+
+# How far back Yahoo serves each intraday interval
+MAX_LOOKBACK = {
+    "1m": timedelta(days=7),
+    "2m": timedelta(days=60),
+    "5m": timedelta(days=60),
+    "15m": timedelta(days=60),
+    "30m": timedelta(days=60),
+    "90m": timedelta(days=60),
+    "60m": timedelta(days=730),
+    "1h": timedelta(days=730),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    symbol   TEXT    NOT NULL,
+    interval TEXT    NOT NULL,
+    ts       INTEGER NOT NULL,
+    open     REAL,
+    high     REAL,
+    low      REAL,
+    close    REAL,
+    volume   REAL,
+    PRIMARY KEY (symbol, interval, ts)
+) WITHOUT ROWID
+"""
+
+_UPSERT = """
+INSERT INTO bars (symbol, interval, ts, open, high, low, close, volume)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (symbol, interval, ts) DO UPDATE SET
+    open = excluded.open, high = excluded.high, low = excluded.low,
+    close = excluded.close, volume = excluded.volume
+"""
+
+
+def fetch_historical(ticker, period="7d", interval="1h", start=None, end=None, cache=None):
+    """Yahoo history through the shared read-through cache (see scripts.history_cache)."""
+    cache = cache or default_cache()
+    if start is None:
+        start = period_start(period)
+    return cache.get("yahoo", ticker, interval, start, end)
+
+
+class RateLimiter:
+    """Space calls at least ``1 / rate_per_s`` apart across threads."""
+
+    def __init__(self, rate_per_s):
+        self.interval = 1.0 / rate_per_s if rate_per_s > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+def connect(db_path=DB_PATH):
+    conn = sqlite3.connect(db_path)
+    conn.execute(_SCHEMA)
+    return conn
+
+
+def last_bar_ts(conn, ticker, interval):
+    """Start (unix seconds) of the newest stored bar, or ``None``."""
+    row = conn.execute(
+        "SELECT MAX(ts) FROM bars WHERE symbol = ? AND interval = ?", (ticker, interval)
+    ).fetchone()
+    return row[0]
+
+
+def store_to_sqlite(df, ticker, interval="1h", conn=None, db_path=DB_PATH):
+    """Upsert a yfinance history frame for ``ticker``; return rows written."""
+    if df is None or df.empty:
+        return 0
+    idx = pd.DatetimeIndex(df.index)
+    idx = idx.tz_localize("UTC") if idx.tz is None else idx.tz_convert("UTC")
+    ts = idx.asi8 // 1_000_000_000
+    cols = [df[c].to_numpy(dtype=float) for c in ("Open", "High", "Low", "Close", "Volume")]
+    rows = [(ticker, interval, int(t), *vals) for t, *vals in zip(ts, *cols)]
+
+    own = conn is None
+    conn = connect(db_path) if own else conn
+    try:
+        with conn:
+            conn.executemany(_UPSERT, rows)
+    finally:
+        if own:
+            conn.close()
+    return len(rows)
+
+
+def _missing_start(conn, ticker, interval, now):
+    """Fetch start for ``ticker`` (``None`` → first load, use ``period``)."""
+    last = last_bar_ts(conn, ticker, interval)
+    if last is None:
+        return None
+    start = datetime.fromtimestamp(last, tz=timezone.utc)
+    limit = MAX_LOOKBACK.get(interval)
+    if limit is not None and now - start > limit:
+        start = now - limit + timedelta(minutes=1)  # older bars are gone from Yahoo
+    return start
+
+
+def load_universe(
+    tickers,
+    interval="1d",
+    period="1y",
+    db_path=DB_PATH,
+    max_workers=8,
+    rate_per_s=2.0,
+    fetch=fetch_historical,
+):
+    """
+    Bring ``tickers`` up to date in the ``bars`` table.
+
+    Returns ``{ticker: rows upserted}``; tickers whose fetch raised map to
+    the exception instead so one bad symbol does not abort the universe.
+    """
+    limiter = RateLimiter(rate_per_s)
+    now = datetime.now(timezone.utc)
+    conn = connect(db_path)
+    starts = {t: _missing_start(conn, t, interval, now) for t in tickers}
+
+    def _fetch(ticker):
+        limiter.acquire()
+        start = starts[ticker]
+        if start is None:
+            return fetch(ticker, period=period, interval=interval)
+        return fetch(ticker, interval=interval, start=start)
+
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(_fetch, t): t for t in tickers}
+            for fut in as_completed(futures):
+                ticker = futures[fut]
+                try:
+                    df = fut.result()
+                except Exception as exc:
+                    results[ticker] = exc
+                    continue
+                results[ticker] = store_to_sqlite(df, ticker, interval, conn=conn)
+    finally:
+        conn.close()
+    return results
+
 
-def fetch_historical(ticker, period="7d", interval="1h"):
-    ticker_data = yf.Ticker(ticker)
-    data = ticker_data.history(period=period, interval=interval)
-    return data
+def read_bars(ticker, interval="1d", start=None, end=None, db_path=DB_PATH):
+    """Stored bars for ``ticker`` as a UTC-indexed frame (``start <= ts < end``)."""
+    sql = "SELECT ts, open, high, low, close, volume FROM bars WHERE symbol = ? AND interval = ?"
+    params = [ticker, interval]
+    if start is not None:
+        sql += " AND ts >= ?"
+        params.append(int(pd.Timestamp(start).timestamp()))
+    if end is not None:
+        sql += " AND ts < ?"
+        params.append(int(pd.Timestamp(end).timestamp()))
+    conn = connect(db_path)
+    try:
+        df = pd.read_sql_query(sql + " ORDER BY ts", conn, params=params)
+    finally:
+        conn.close()
+    df.index = pd.to_datetime(df.pop("ts"), unit="s", utc=True)
+    return df
 
-def store_to_sqlite(df, ticker):
-    conn = sqlite3.connect("yahoo_data.sqlite")
-    df.to_sql(f"{ticker}_historical", conn, if_exists="replace")
-    conn.close()
 
 if __name__ == "__main__":
-    df = fetch_historical("AAPL", period="5d", interval="15m")
-    if not df.empty:
-        store_to_sqlite(df, "AAPL")
-        print(df.tail())
-    else:
-        print("Data fetch was unsuccessful. Try again shortly.")
+    results = load_universe(["AAPL", "MSFT", "NVDA"], interval="15m", period="5d")
+    for ticker, n in sorted(results.items()):
+        if isinstance(n, Exception):
+            print(f"{ticker}: fetch failed ({n}). Try again shortly.")
+        else:
+            print(f"{ticker}: {n} bars upserted")
+    print(read_bars("AAPL", interval="15m").tail())
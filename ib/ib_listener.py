@@ -1,33 +1,41 @@
-import os
-import zmq
+"""
+JSON trade-signal listener: ZMQ PULL → validate → IB market order → ACK.
+
+Nothing happens at import time; build the pieces explicitly or call
+``run()``:
+
+    listener = build_listener()           # binds sockets, connects to IB
+    listener.run()                        # until stop() / Ctrl-C
+    listener.close()
+
+``build_listener(app=..., ctx=..., addr=..., ack_addr=...)`` accepts an
+existing TradingApp / zmq.Context so several listeners (or a benchmark
+harness) can share one process.
+"""
 import json
+import logging
+import os
 import time
 from typing import Optional, Set
+
+import zmq
 from dotenv import load_dotenv
 from prometheus_client import Counter, start_http_server
-from scripts.core import TradingApp, create_contract, create_order
-from utils.utils import setup_logger
-
-load_dotenv()
-logger = setup_logger(name="IBListener", log_file="ib_listener.log")
-
-# ZMQ socket setup (bind to localhost by default for safety)
-ZMQ_ADDR = os.getenv("ZMQ_ADDR", "tcp://127.0.0.1:5555")
-ACK_PUB_ADDR = os.getenv("ACK_PUB_ADDR", "tcp://127.0.0.1:6001")
-ctx = zmq.Context()
-socket = ctx.socket(zmq.PULL)
-# Apply high-water mark to avoid unbounded memory
-rcv_hwm = int(os.getenv("ZMQ_RCVHWM", "10000"))
-socket.setsockopt(zmq.RCVHWM, rcv_hwm)
-socket.bind(ZMQ_ADDR)
-
-# Optional ACK publisher for JSON listener (topic: json_order_acks)
-ack_pub = ctx.socket(zmq.PUB)
-snd_hwm = int(os.getenv("ZMQ_SNDHWM", "10000"))
-ack_pub.setsockopt(zmq.SNDHWM, snd_hwm)
-ack_pub.bind(ACK_PUB_ADDR)
-
-logger.info(f"✅ IBTrader ZMQ listener bound to {ZMQ_ADDR}; ACK PUB at {ACK_PUB_ADDR}")
+
+from ib.portfolio_refresher import PortfolioRefresher
+from scripts.contracts import create_contract
+from scripts.core import TradingApp
+from scripts.health import HEALTH, LOOP_STALE_S, start_probe_server
+from scripts.orders import create_order
+from utils.utils import SampledLogger, setup_logger
+
+logger = logging.getLogger("IBListener")  # configured by run()
+
+# ZMQ endpoints (bind to localhost by default for safety); $ZMQ_ADDR and
+# $ACK_PUB_ADDR override them, read at build time so .env files apply
+DEFAULT_ZMQ_ADDR = "tcp://127.0.0.1:5555"
+DEFAULT_ACK_PUB_ADDR = "tcp://127.0.0.1:6001"
+ACK_TOPIC = b"json_order_acks"
 
 # Risk profile → IB account mapping
 account_map = {
@@ -38,6 +46,12 @@ account_map = {
     "EXPERIMENTAL": "DUH148814"
 }
 
+# Metrics
+_recv_total = Counter("json_listener_received_total", "Total inbound JSON trade messages")
+_reject_total = Counter("json_listener_rejected_total", "Total rejected JSON trade messages")
+_sent_total = Counter("json_listener_orders_sent_total", "Total orders submitted from JSON listener")
+
+
 def _parse_symbols_env() -> Optional[Set[str]]:
     raw = os.getenv("ALLOWED_SYMBOLS", "").strip()
     if not raw:
@@ -45,22 +59,19 @@ def _parse_symbols_env() -> Optional[Set[str]]:
     return {s.strip().upper() for s in raw.split(",") if s.strip()}
 
 
-ALLOWED_SYMBOLS = _parse_symbols_env()
-
-# Initialize IB connection
-app = TradingApp(clientId=11, account=None)  # account set dynamically per trade
-
-# Metrics
-METRICS_PORT = int(os.getenv("METRICS_PORT", "9101"))
-_recv_total = Counter("json_listener_received_total", "Total inbound JSON trade messages")
-_reject_total = Counter("json_listener_rejected_total", "Total rejected JSON trade messages")
-_sent_total = Counter("json_listener_orders_sent_total", "Total orders submitted from JSON listener")
-start_http_server(METRICS_PORT)
-logger.info("Prometheus metrics server started on :%d", METRICS_PORT)
+class JsonListener:
+    def __init__(self, app, sock, ack_pub, *, refresher=None, allowed_symbols=None):
+        self.app = app
+        self.sock = sock
+        self.ack_pub = ack_pub
+        self.refresher = refresher
+        self.allowed_symbols = allowed_symbols
+        self.hot = SampledLogger(logger)  # per-message lines: sampled + rate-limited
+        self.health = HEALTH.component("zmq:json_listener", stale_after_s=LOOP_STALE_S)
+        self._stop = False
 
-while True:
-    try:
-        msg = socket.recv_json()
+    def handle(self, msg: dict) -> Optional[int]:
+        """Validate one signal, send its order and ACK; return the order id or ``None``."""
         action = msg.get('action', '').upper()
         symbol = msg.get('symbol')
         qty = msg.get('qty')
@@ -72,38 +83,44 @@ while True:
         # Basic validation
         if not symbol or not isinstance(symbol, str):
             _reject_total.inc()
-            logger.warning(f"⚠️ Invalid symbol in message: {msg}")
-            continue
+            self.hot.warning("⚠️ Invalid symbol in message: %s", msg)
+            return None
         symbol = symbol.upper().strip()
         if action not in ("BUY", "SELL"):
             _reject_total.inc()
-            logger.warning(f"⚠️ Invalid action in message: {msg}")
-            continue
+            self.hot.warning("⚠️ Invalid action in message: %s", msg)
+            return None
         try:
             qty = int(qty)
         except Exception:
             _reject_total.inc()
-            logger.warning(f"⚠️ Invalid qty in message: {msg}")
-            continue
+            self.hot.warning("⚠️ Invalid qty in message: %s", msg)
+            return None
         if qty <= 0:
             _reject_total.inc()
-            logger.warning(f"⚠️ Non-positive qty in message: {msg}")
-            continue
-        if ALLOWED_SYMBOLS is not None and symbol not in ALLOWED_SYMBOLS:
+            self.hot.warning("⚠️ Non-positive qty in message: %s", msg)
+            return None
+        if self.allowed_symbols is not None and symbol not in self.allowed_symbols:
             _reject_total.inc()
-            logger.warning(f"🚫 Symbol {symbol} not in ALLOWED_SYMBOLS; dropping")
-            continue
+            self.hot.warning("🚫 Symbol %s not in ALLOWED_SYMBOLS; dropping", symbol)
+            return None
 
         account_id = account_map.get(risk_profile, "DUH148814")
 
-        logger.info(f"📥 Signal [{risk_profile}] from {strategy} → {action} {symbol} x{qty} @ {ts} (Account: {account_id})")
+        self.hot.info(
+            "📥 Signal [%s] from %s → %s %s x%s @ %s (Account: %s)",
+            risk_profile, strategy, action, symbol, qty, ts, account_id,
+        )
 
         # Build contract & order then send via TradingApp helper
         contract = create_contract(symbol)
-        order = create_order(action, orderType="MKT", quantity=qty, account=account_id)
-        order_id = app.send_order(contract, order)
+        order = create_order(action, "MKT", qty, account=account_id)
+        order_id = self.app.send_order(contract, order)
         _sent_total.inc()
-        logger.info(f"📨 Sent order #{order_id}: {action} {qty} {symbol} type=MKT profile={risk_profile} account={account_id}")
+        self.hot.info(
+            "📨 Sent order #%s: %s %s %s type=MKT profile=%s account=%s",
+            order_id, action, qty, symbol, risk_profile, account_id,
+        )
 
         # Publish basic ACK if correlation_id present
         corr_id = msg.get("correlation_id") or msg.get("id") or ""
@@ -116,23 +133,92 @@ while True:
                 "qty": qty,
                 "status": "ACCEPTED",
             }
-            ack_pub.send_multipart([b"json_order_acks", json.dumps(ack).encode("utf-8")])
-
-        # Optional: pull live account/position info after each trade
-        time.sleep(1)
-        portfolio = app.request_portfolio()
-        logger.info(f"💼 Net Liquidation: {portfolio.get('NetLiquidation')}")
-
-        positions = app.request_positions()
-        for sym, pos in positions.items():
-            logger.info(f"📈 {sym} -> Pos: {pos['position']} | Price: {pos['market_price']} | PnL: {pos['unrealized_pnl']}")
-
-        print("------------------------------------------------------------")
+            self.ack_pub.send_multipart([ACK_TOPIC, json.dumps(ack).encode("utf-8")])
+
+        if self.refresher is not None:
+            self.refresher.mark_dirty()
+        return order_id
+
+    def run(self, poll_ms: int = 200) -> None:
+        """Receive and handle messages until :meth:`stop` or Ctrl-C."""
+        self._stop = False
+        while not self._stop:
+            self.health.beat()
+            try:
+                if not self.sock.poll(poll_ms):
+                    continue
+                self.handle(self.sock.recv_json())
+            except KeyboardInterrupt:
+                break
+            except Exception as e:
+                self.hot.error("❌ Exception during trade loop: %s", e)
+
+    def stop(self) -> None:
+        self._stop = True
+
+    def close(self, disconnect: bool = True) -> None:
+        if self.refresher is not None:
+            self.refresher.stop()
+        self.sock.close(linger=0)
+        self.ack_pub.close(linger=0)
+        HEALTH.remove(self.health.name)
+        if disconnect:
+            self.app.disconnect()
+            logger.info("🔌 Disconnected from IB.")
+
+
+def build_sockets(ctx: Optional[zmq.Context] = None, addr: Optional[str] = None, ack_addr: Optional[str] = None):
+    """Bind the PULL (signals) and PUB (ACKs) sockets; return ``(pull, pub)``."""
+    ctx = ctx or zmq.Context.instance()
+    addr = addr or os.getenv("ZMQ_ADDR", DEFAULT_ZMQ_ADDR)
+    ack_addr = ack_addr or os.getenv("ACK_PUB_ADDR", DEFAULT_ACK_PUB_ADDR)
+    sock = ctx.socket(zmq.PULL)
+    # Apply high-water mark to avoid unbounded memory
+    sock.setsockopt(zmq.RCVHWM, int(os.getenv("ZMQ_RCVHWM", "10000")))
+    sock.bind(addr)
+
+    # Optional ACK publisher for JSON listener (topic: json_order_acks)
+    ack_pub = ctx.socket(zmq.PUB)
+    ack_pub.setsockopt(zmq.SNDHWM, int(os.getenv("ZMQ_SNDHWM", "10000")))
+    ack_pub.bind(ack_addr)
+    logger.info("✅ IBTrader ZMQ listener bound to %s; ACK PUB at %s", addr, ack_addr)
+    return sock, ack_pub
+
+
+def build_listener(
+    app=None,
+    *,
+    ctx: Optional[zmq.Context] = None,
+    addr: Optional[str] = None,
+    ack_addr: Optional[str] = None,
+    refresh: bool = True,
+) -> JsonListener:
+    """Wire sockets, IB connection and the background portfolio refresher."""
+    if app is None:
+        app = TradingApp(clientId=11, account=None)  # account set dynamically per trade
+    sock, ack_pub = build_sockets(ctx, addr, ack_addr)
+
+    # Post-trade portfolio/position logging runs in the background, rate-limited
+    refresher = None
+    if refresh:
+        refresher = PortfolioRefresher(app, account=os.getenv("IB_ACCOUNT", ""), logger=logger).start()
+    return JsonListener(app, sock, ack_pub, refresher=refresher, allowed_symbols=_parse_symbols_env())
+
+
+def run() -> None:
+    load_dotenv()
+    setup_logger(name="IBListener", log_file="ib_listener.log")
+    metrics_port = int(os.getenv("METRICS_PORT", "9101"))
+    start_http_server(metrics_port)
+    logger.info("Prometheus metrics server started on :%d", metrics_port)
+
+    listener = build_listener()
+    start_probe_server()  # /ready on $HEALTH_PORT, if set
+    try:
+        listener.run()
+    finally:
+        listener.close()
 
-    except KeyboardInterrupt:
-        break
-    except Exception as e:
-        logger.error(f"❌ Exception during trade loop: {str(e)}")
 
-app.disconnect()
-logger.info("🔌 Disconnected from IB.")
+if __name__ == "__main__":
+    run()
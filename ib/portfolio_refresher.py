@@ -0,0 +1,139 @@
+# portfolio_refresher.py
+"""
+Background portfolio/position logging, off the order path.
+
+``reqAccountUpdates`` streams ``updateAccountValue`` / ``updatePortfolio``
+callbacks into a local snapshot; a daemon thread logs that snapshot when
+something changed (an update arrived or :meth:`PortfolioRefresher.mark_dirty`
+was called after a trade), at most once every ``min_interval_s`` seconds.
+Nothing here blocks the caller.
+
+    refresher = PortfolioRefresher(app, min_interval_s=5).start()
+    ...
+    app.send_order(contract, order)
+    refresher.mark_dirty()
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from scripts.wrapper import IBWrapper
+from utils.utils import setup_logger
+
+DEFAULT_INTERVAL_S = float(os.getenv("PORTFOLIO_REFRESH_S", "5"))
+
+
+def _noop(*_args) -> None:
+    pass
+
+
+class PortfolioRefresher:
+    def __init__(self, app, *, min_interval_s=DEFAULT_INTERVAL_S, account="", logger=None):
+        self.app = app
+        self.min_interval_s = min_interval_s
+        self.account = account
+        self.logger = logger or setup_logger()
+        self.account_values: Dict[str, str] = {}
+        self.positions: Dict[str, Dict[str, Any]] = {}
+        self.logged = 0  # snapshots written, for tests and metrics
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_log = 0.0
+
+    # ── lifecycle ─────────────────────────────────────────────────
+    def start(self) -> "PortfolioRefresher":
+        self._install()
+        self.app.reqAccountUpdates(True, self.account)
+        self._thread = threading.Thread(target=self._run, name="portfolio-refresher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        self._dirty.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        try:
+            self.app.reqAccountUpdates(False, self.account)
+        except Exception:
+            pass
+
+    def mark_dirty(self) -> None:
+        """Ask for a snapshot to be logged (e.g. after a trade); never blocks."""
+        self._dirty.set()
+
+    # ── callbacks ─────────────────────────────────────────────────
+    def _install(self) -> None:
+        """Chain our handlers behind the app's own account-update callbacks.
+
+        IBWrapper's own ``updatePortfolio`` is not chained: it appends every
+        update to ``app.portfolio`` and would grow without bound for the life
+        of the subscription; :attr:`positions` keeps the latest row instead.
+        """
+        orig_value = self.app.updateAccountValue
+        orig_portfolio = self.app.updatePortfolio
+        if getattr(type(self.app), "updatePortfolio", None) is IBWrapper.updatePortfolio:
+            orig_portfolio = _noop
+
+        def _value_cb(key, val, currency, accountName):
+            orig_value(key, val, currency, accountName)
+            self.on_account_value(key, val, currency, accountName)
+
+        def _portfolio_cb(contract, position, marketPrice, marketValue,
+                          averageCost, unrealizedPNL, realizedPNL, accountName):
+            orig_portfolio(contract, position, marketPrice, marketValue,
+                           averageCost, unrealizedPNL, realizedPNL, accountName)
+            self.on_portfolio(contract, position, marketPrice, marketValue,
+                              averageCost, unrealizedPNL, realizedPNL, accountName)
+
+        self.app.updateAccountValue = _value_cb
+        self.app.updatePortfolio = _portfolio_cb
+
+    def on_account_value(self, key, val, currency, accountName):
+        with self._lock:
+            self.account_values[key] = val
+        if key == "NetLiquidation":
+            self._dirty.set()
+
+    def on_portfolio(self, contract, position, marketPrice, marketValue,
+                     averageCost, unrealizedPNL, realizedPNL, accountName):
+        with self._lock:
+            if position:
+                self.positions[contract.symbol] = {
+                    "position": position,
+                    "market_price": marketPrice,
+                    "unrealized_pnl": unrealizedPNL,
+                }
+            else:
+                self.positions.pop(contract.symbol, None)
+        self._dirty.set()
+
+    # ── worker ────────────────────────────────────────────────────
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._dirty.wait()
+            if self._stop.is_set():
+                break
+            # Rate limit: coalesce everything that arrives inside the window
+            wait = self._last_log + self.min_interval_s - time.monotonic()
+            if wait > 0 and self._stop.wait(wait):
+                break
+            self._dirty.clear()
+            self._last_log = time.monotonic()
+            self._log_snapshot()
+
+    def _log_snapshot(self) -> None:
+        with self._lock:
+            net_liq = self.account_values.get("NetLiquidation")
+            positions = {sym: dict(p) for sym, p in self.positions.items()}
+        self.logger.info("💼 Net Liquidation: %s", net_liq)
+        for sym, pos in positions.items():
+            self.logger.info(
+                "📈 %s -> Pos: %s | Price: %s | PnL: %s",
+                sym, pos["position"], pos["market_price"], pos["unrealized_pnl"],
+            )
+        self.logged += 1
@@ -1,22 +1,47 @@
 #!/usr/bin/env python3
-"""Redis-backed kill switch monitor."""
+"""Redis-backed kill switch monitor.
+
+The monitor blocks on a Redis subscription instead of sleeping between
+polls, so a trigger is seen within a network round-trip:
+
+• ``PUBLISH kill_switch <ts_ns>`` – sent by :func:`trigger`; the payload is
+  the trigger time so the reaction latency can be measured end to end;
+• ``__keyspace@<db>__:KILL_SWITCH`` – fires when someone just runs
+  ``SET KILL_SWITCH TRUE`` and the server has ``notify-keyspace-events``
+  including ``K$``.
+
+Reading the ``KILL_SWITCH`` key every ``KILL_SWITCH_POLL_S`` seconds
+remains as a heartbeat, and is the only path while the subscription is
+down.  On trigger, open orders are cancelled first and positions flattened
+after; ``kill_switch_trigger_to_cancel_ms`` records trigger → first cancel.
+"""
 
 from __future__ import annotations
 
 import os
 import signal
+import threading
 import time
 from typing import Optional
 
 import redis
-from prometheus_client import Counter
+from prometheus_client import Counter, Histogram
 
 from scripts.core import TradingApp
 
 
+KEY = "KILL_SWITCH"
+CHANNEL = os.getenv("KILL_SWITCH_CHANNEL", "kill_switch")
+
 kill_switch_activations_total = Counter(
     "kill_switch_activations_total", "Times the kill switch has triggered"
 )
+kill_switch_trigger_to_cancel_ms = Histogram(
+    "kill_switch_trigger_to_cancel_ms",
+    "Kill switch trigger to first cancel sent (ms)",
+    ["path"],  # pubsub | keyspace | poll
+    buckets=(0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000, 5000, 10000),
+)
 
 _SHUTDOWN = False
 
@@ -26,35 +51,102 @@ def _request_shutdown(_sig: int, _frm) -> None:
     _SHUTDOWN = True
 
 
+def trigger(r, reason: str = "") -> int:
+    """Set the kill switch and notify monitors; return the trigger time (ns)."""
+    ts = time.time_ns()
+    # Publish first so monitors react to the message carrying the timestamp;
+    # the key makes the state stick for late starters and the poll heartbeat.
+    r.publish(CHANNEL, f"{ts} {reason}".strip())
+    r.set(KEY, "TRUE")
+    return ts
+
+
+def _is_set(r) -> bool:
+    try:
+        val = r.get(KEY)
+    except Exception:
+        return False
+    return bool(val) and val.decode().upper() == "TRUE"
+
+
+def _subscribe(r):
+    """Pub/sub on the trigger channel and the key's keyspace channel, or ``None``."""
+    try:
+        db = r.connection_pool.connection_kwargs.get("db", 0)
+        pubsub = r.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(CHANNEL, f"__keyspace@{db}__:{KEY}")
+        return pubsub
+    except Exception:
+        return None
+
+
+def _wait_for_trigger(r, pubsub, heartbeat_s: float):
+    """Block up to ``heartbeat_s``; return ``(trigger_ns, path)`` or ``None``."""
+    msg = pubsub.get_message(timeout=heartbeat_s)
+    if msg is None:
+        return (time.time_ns(), "poll") if _is_set(r) else None
+    channel = msg["channel"].decode() if isinstance(msg["channel"], bytes) else msg["channel"]
+    if channel == CHANNEL:
+        data = msg["data"].decode() if isinstance(msg["data"], bytes) else str(msg["data"])
+        head = data.split(" ", 1)[0]
+        return (int(head) if head.isdigit() else time.time_ns(), "pubsub")
+    if _is_set(r):  # keyspace event: only "set to TRUE" counts
+        return time.time_ns(), "keyspace"
+    return None
+
+
+def _fire(app: TradingApp, trigger_ns: int, path: str) -> None:
+    kill_switch_activations_total.inc()
+    app.cancel_all_orders()
+    kill_switch_trigger_to_cancel_ms.labels(path=path).observe(
+        max(0.0, (time.time_ns() - trigger_ns) / 1e6)
+    )
+    app.close_all_positions(cancel_first=False)  # already cancelled above
+
+
 def monitor(
     app: TradingApp,
     *,
     redis_url: Optional[str] = None,
     poll_s: Optional[float] = None,
+    client=None,
 ) -> None:
-    """Poll Redis for the ``KILL_SWITCH`` key and liquidate positions when set."""
+    """Wait for the kill switch (push, with a polling heartbeat) and liquidate."""
 
-    poll_interval = poll_s or float(os.getenv("KILL_SWITCH_POLL_S", "5"))
-    r = redis.Redis.from_url(redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    heartbeat_s = poll_s or float(os.getenv("KILL_SWITCH_POLL_S", "5"))
+    r = client or redis.Redis.from_url(redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0"))
 
-    signal.signal(signal.SIGINT, _request_shutdown)
-    signal.signal(signal.SIGTERM, _request_shutdown)
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGINT, _request_shutdown)
+        signal.signal(signal.SIGTERM, _request_shutdown)
 
-    while not _SHUTDOWN:
+    pubsub = None
+    try:
+        while not _SHUTDOWN:
+            if pubsub is None:
+                pubsub = _subscribe(r)
+                if _is_set(r):  # set while we were not listening
+                    _fire(app, time.time_ns(), "poll")
+                    break
+            if pubsub is None:
+                time.sleep(heartbeat_s)
+                continue
+            try:
+                hit = _wait_for_trigger(r, pubsub, heartbeat_s)
+            except Exception:
+                pubsub = None  # connection lost → resubscribe, poll meanwhile
+                time.sleep(min(heartbeat_s, 1.0))
+                continue
+            if hit is not None:
+                _fire(app, *hit)
+                break
+    finally:
+        if pubsub is not None:
+            try:
+                pubsub.close()
+            except Exception:
+                pass
         try:
-            val = r.get("KILL_SWITCH")
+            app.disconnect()
         except Exception:
-            val = None
-
-        if val and val.decode().upper() == "TRUE":
-            kill_switch_activations_total.inc()
-            app.close_all_positions()
-            break
-
-        time.sleep(poll_interval)
-
-    try:
-        app.disconnect()
-    except Exception:
-        pass
-
+            pass
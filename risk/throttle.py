@@ -32,6 +32,15 @@ class Throttle:
         self._count = 0
         self._notional = 0.0
 
+    def next_window_in(self) -> float:
+        """Seconds until another order fits the per-second count (0 = now)."""
+        now = time.time()
+        with self._lock:
+            elapsed = now - self._window_start
+            if elapsed >= 1.0 or self._count < self.max_orders_per_sec:
+                return 0.0
+            return 1.0 - elapsed
+
     def block_if_needed(
         self, contract: ContractSpec, quantity: int, price: float
     ) -> None:
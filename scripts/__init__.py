@@ -2,20 +2,33 @@
 """
 scripts package: helper utilities (contracts, orders, accounts…)
 Keep this file minimal to avoid circular-import issues.
+
+The re-exports below are resolved on first attribute access, so importing
+any ``scripts.*`` module does not drag in ibapi, the wrapper and the logger
+setup before it needs them.
 """
-from scripts.accounts import get_account, get_all_accounts
-from scripts.contracts import create_contract
-from scripts.orders import create_order
+import importlib
+
+_EXPORTS = {
+    "IBWrapper": "scripts.wrapper",
+    "create_contract": "scripts.contracts",
+    "create_order": "scripts.orders",
+    "get_account": "scripts.accounts",
+    "get_all_accounts": "scripts.accounts",
+    "setup_logger": "utils.utils",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value  # cache: later lookups skip __getattr__
+    return value
 
-# Nothing else here
-from scripts.wrapper import IBWrapper  # keep
-from utils.utils import setup_logger
 
-__all__ = [
-    "IBWrapper",
-    "create_contract",
-    "create_order",
-    "get_account",
-    "get_all_accounts",
-    "setup_logger",
-]
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""Build OHLCV bars from the live ``MarketTick`` stream.
+
+Subscribes to the market data publisher's ``market_ticks`` topic, folds
+every tick into the bars of each configured spec and publishes completed
+bars as ``[b"bars", Bar]`` on a ``PUB`` socket.  Work per tick is O(1) per
+spec: one bar per (symbol, spec) is updated in place.
+
+Specs
+-----
+``30s`` ``1m`` ``1h``   time bars (aligned to the epoch, empty buckets skipped)
+``500t``                one bar every 500 ticks
+``10000v``              one bar per 10 000 shares traded
+
+``MarketTick`` repeats the last trade on quote-only updates, so a tick only
+counts as a trade when its ``last_price``/``last_size`` pair changed.  With
+``--price last`` (default) bars move on trades only; ``--price mid`` uses
+the quote mid for OHLC and keeps volume from trades.
+
+CLI
+───
+python -m scripts.bar_aggregator --md-addr tcp://localhost:6001 --bars 1s,1m,500t
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import re
+import signal
+from typing import Callable, Dict, List, Optional, Tuple
+
+import zmq
+from prometheus_client import Counter, start_http_server
+
+from shared_proto.bar_pb2 import Bar
+from shared_proto.market_data_pb2 import MarketTick
+from utils.utils import setup_logger
+
+TICK_TOPIC = b"market_ticks"
+TOPIC = b"bars"
+
+bars_total = Counter("bars_total", "Completed bars published", ["spec"])
+
+_SPEC_RE = re.compile(r"^(\d+)([smhtv])$")
+_UNIT_NS = {"s": 1_000_000_000, "m": 60_000_000_000, "h": 3_600_000_000_000}
+
+_SHUTDOWN = False
+
+
+def _request_shutdown(_sig: int, _frm) -> None:
+    global _SHUTDOWN
+    _SHUTDOWN = True
+
+
+# ── Bar state ───────────────────────────────────────────────────────
+
+
+class BarSpec:
+    """One timeframe: ``kind`` is ``time`` (``size`` in ns), ``tick`` or ``volume``."""
+
+    __slots__ = ("name", "kind", "size")
+
+    def __init__(self, name: str, kind: str, size: int) -> None:
+        self.name = name
+        self.kind = kind
+        self.size = size
+
+    def __repr__(self) -> str:
+        return f"BarSpec({self.name!r})"
+
+
+def parse_specs(text: str) -> List[BarSpec]:
+    """``"1s,1m,500t,10000v"`` → specs; raises ``ValueError`` on a bad token."""
+    specs = []
+    for tok in (t.strip().lower() for t in text.split(",")):
+        if not tok:
+            continue
+        m = _SPEC_RE.match(tok)
+        if not m or int(m.group(1)) <= 0:
+            raise ValueError(f"bad bar spec {tok!r} (expected e.g. 30s, 1m, 500t, 10000v)")
+        n, unit = int(m.group(1)), m.group(2)
+        if unit in _UNIT_NS:
+            specs.append(BarSpec(tok, "time", n * _UNIT_NS[unit]))
+        else:
+            specs.append(BarSpec(tok, "tick" if unit == "t" else "volume", n))
+    return specs
+
+
+class _Bar:
+    __slots__ = ("spec", "start_ns", "end_ns", "open", "high", "low", "close", "volume", "ticks")
+
+    def __init__(self, spec: BarSpec) -> None:
+        self.spec = spec
+        self.ticks = 0
+
+    def begin(self, ts: int, px: float) -> None:
+        if self.spec.kind == "time":
+            self.start_ns = ts - ts % self.spec.size
+            self.end_ns = self.start_ns + self.spec.size
+        else:
+            self.start_ns = self.end_ns = ts
+        self.open = self.high = self.low = self.close = px
+        self.volume = 0
+        self.ticks = 0
+
+
+class _Symbol:
+    __slots__ = ("bars", "last_trade")
+
+    def __init__(self, specs: List[BarSpec]) -> None:
+        self.bars = [_Bar(s) for s in specs]
+        self.last_trade: Tuple[float, int] = (0.0, 0)
+
+
+# ── Aggregator ──────────────────────────────────────────────────────
+
+
+class BarAggregator:
+    """
+    Incremental OHLCV bars for every symbol seen, for each spec.
+
+    Example
+    -------
+    agg = BarAggregator(parse_specs("1s,1m,500t"), on_bar=publish)
+    agg.on_tick(market_tick)          # per tick
+    agg.flush_due()                   # close time bars nobody ticked past
+
+    Time bars are bucketed by tick timestamp, so they are also closed
+    against the tick clock (the newest ``ts`` seen on any symbol), never the
+    wall clock: a replay that keeps the original timestamps produces the
+    same bars as the live run did.
+    """
+
+    def __init__(
+        self,
+        specs: List[BarSpec],
+        on_bar: Callable[[str, "_Bar"], None],
+        *,
+        use_mid: bool = False,
+    ) -> None:
+        if not specs:
+            raise ValueError("at least one bar spec is required")
+        self.specs = specs
+        self.on_bar = on_bar
+        self.use_mid = use_mid
+        self._symbols: Dict[str, _Symbol] = {}
+        self.now_ns = 0  # tick clock
+
+    def on_tick(self, msg: MarketTick) -> None:
+        self.update(msg.ts_unix_ns, msg.symbol, msg.bid_price, msg.ask_price, msg.last_price, msg.last_size)
+
+    def update(self, ts: int, symbol: str, bid: float, ask: float, last: float, last_size: int) -> None:
+        if ts > self.now_ns:
+            self.now_ns = ts
+        state = self._symbols.get(symbol)
+        if state is None:
+            state = self._symbols[symbol] = _Symbol(self.specs)
+
+        trade = (last, last_size)
+        qty = 0
+        if last > 0 and last_size > 0 and trade != state.last_trade:
+            qty = last_size
+            state.last_trade = trade
+        if self.use_mid:
+            if bid <= 0 or ask <= 0:
+                return
+            px = (bid + ask) / 2
+        elif qty:
+            px = last
+        else:
+            return  # quote-only update: nothing to add to a trade bar
+
+        for bar in state.bars:
+            spec = bar.spec
+            if bar.ticks and spec.kind == "time" and ts >= bar.end_ns:
+                self.on_bar(symbol, bar)
+                bar.ticks = 0
+            if not bar.ticks:
+                bar.begin(ts, px)
+            else:
+                if px > bar.high:
+                    bar.high = px
+                elif px < bar.low:
+                    bar.low = px
+                bar.close = px
+                if spec.kind != "time":
+                    bar.end_ns = ts
+            bar.volume += qty
+            bar.ticks += 1
+            if (spec.kind == "tick" and bar.ticks >= spec.size) or (
+                spec.kind == "volume" and bar.volume >= spec.size
+            ):
+                self.on_bar(symbol, bar)
+                bar.ticks = 0
+
+    def flush_due(self, now_ns: Optional[int] = None) -> int:
+        """Emit time bars whose bucket ended before ``now_ns`` (default: the tick clock)."""
+        if now_ns is None:
+            now_ns = self.now_ns
+        n = 0
+        for symbol, state in self._symbols.items():
+            for bar in state.bars:
+                if bar.ticks and bar.spec.kind == "time" and now_ns >= bar.end_ns:
+                    self.on_bar(symbol, bar)
+                    bar.ticks = 0
+                    n += 1
+        return n
+
+    def flush_all(self) -> int:
+        """Emit every open bar, complete or not (used at shutdown)."""
+        n = 0
+        for symbol, state in self._symbols.items():
+            for bar in state.bars:
+                if bar.ticks:
+                    self.on_bar(symbol, bar)
+                    bar.ticks = 0
+                    n += 1
+        return n
+
+
+class BarPublisher:
+    """``on_bar`` callback that publishes ``Bar`` protobufs on ``sock``."""
+
+    __slots__ = ("sock", "msg")
+
+    def __init__(self, sock: zmq.Socket) -> None:
+        self.sock = sock
+        self.msg = Bar()
+
+    def __call__(self, symbol: str, bar: _Bar) -> None:
+        msg = self.msg
+        msg.symbol = symbol
+        msg.spec = bar.spec.name
+        msg.start_ns = bar.start_ns
+        msg.end_ns = bar.end_ns
+        msg.open = bar.open
+        msg.high = bar.high
+        msg.low = bar.low
+        msg.close = bar.close
+        msg.volume = bar.volume
+        msg.ticks = bar.ticks
+        self.sock.send_multipart((TOPIC, msg.SerializeToString()))
+        bars_total.labels(spec=bar.spec.name).inc()
+
+
+# ── CLI ─────────────────────────────────────────────────────────────
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser("OHLCV bar aggregator")
+    p.add_argument(
+        "--md-addr",
+        default=os.getenv("MD_ADDR", "tcp://localhost:6001"),
+        help="market data publisher address to SUBscribe to",
+    )
+    p.add_argument(
+        "--zmq-addr",
+        default=os.getenv("BARS_ADDR", "tcp://*:6004"),
+        help="ZeroMQ PUB bind address for completed bars",
+    )
+    p.add_argument(
+        "--bars",
+        default=os.getenv("BAR_SPECS", "1s,1m"),
+        help="comma-separated specs: 30s, 1m, 1h (time), 500t (ticks), 10000v (volume)",
+    )
+    p.add_argument(
+        "--price",
+        choices=("last", "mid"),
+        default="last",
+        help="build OHLC from trades (last) or from the quote mid",
+    )
+    p.add_argument("--log-level", default="INFO", help="logging level (default INFO)")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    level = getattr(logging, args.log_level.upper(), logging.INFO)
+    logger = setup_logger("BarAggregator", level=level)
+    specs = parse_specs(args.bars)
+
+    start_http_server(int(os.getenv("METRICS_PORT", "9100")))
+
+    ctx = zmq.Context.instance()
+    sub = ctx.socket(zmq.SUB)
+    sub.setsockopt(zmq.SUBSCRIBE, TICK_TOPIC)
+    sub.connect(args.md_addr)
+    pub = ctx.socket(zmq.PUB)
+    pub.setsockopt(zmq.SNDHWM, int(os.getenv("ZMQ_SNDHWM", "10000")))
+    pub.bind(args.zmq_addr)
+    logger.info(
+        "Aggregating %s from %s → %s",
+        ",".join(s.name for s in specs),
+        args.md_addr,
+        args.zmq_addr,
+    )
+
+    agg = BarAggregator(specs, BarPublisher(pub), use_mid=args.price == "mid")
+    msg = MarketTick()
+
+    signal.signal(signal.SIGINT, _request_shutdown)
+    signal.signal(signal.SIGTERM, _request_shutdown)
+
+    try:
+        while not _SHUTDOWN:
+            # Wake at least every 100 ms so idle symbols' time bars still close
+            if sub.poll(100):
+                while True:
+                    try:
+                        _topic, payload = sub.recv_multipart(zmq.NOBLOCK)
+                    except zmq.Again:
+                        break
+                    msg.ParseFromString(payload)
+                    agg.on_tick(msg)
+            agg.flush_due()  # idle symbols close once any other symbol ticks past
+    finally:
+        agg.flush_all()
+        sub.close()
+        pub.close(linger=1000)
+        ctx.term()
+        logger.info("✅ Shutdown complete.")
+
+
+if __name__ == "__main__":
+    main()
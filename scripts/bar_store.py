@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+bar_store.py
+────────────
+Columnar on-disk OHLCV bar store for backtests.
+
+Bars are partitioned by interval, symbol and UTC month, one ``.npy`` file
+per column::
+
+    <root>/<interval>/<SYMBOL>/<YYYY-MM>/ts.npy        int64 unix seconds, sorted
+                                        /open.npy      float64
+                                        /…             high, low, close, volume
+
+Reads open the files with ``np.load(mmap_mode="r")`` so only the pages a
+query touches are read.  Symbol and month directories are pruned before
+anything is opened, and inside a partition the time range is a
+``searchsorted`` slice of the sorted ``ts`` column.
+
+``load_bars`` aligns several symbols on the union of their timestamps and
+returns ``(len(symbols), len(ts))`` arrays with NaN where a symbol has no
+bar, ready for vectorised backtests.
+
+Example
+-------
+store = BarStore("var/bars")
+store.write("AAPL", "1m", df)          # DataFrame: DatetimeIndex + open/high/low/close/volume
+bars = store.load_bars(["AAPL", "MSFT"], "2024-01-01", "2024-02-01", interval="1m")
+bars.close[0]                          # AAPL closes aligned to bars.ts
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ROOT = Path(os.getenv("BAR_STORE", "var/bars"))
+FIELDS = ("open", "high", "low", "close", "volume")
+
+TimeLike = Union[str, int, float, datetime, pd.Timestamp]
+
+
+class Bars(NamedTuple):
+    """Bars of several symbols aligned on a common time axis."""
+
+    symbols: List[str]
+    ts: np.ndarray  # int64 unix seconds, shape (T,)
+    open: np.ndarray  # float64, shape (len(symbols), T); NaN = no bar
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+
+def _to_s(t: TimeLike) -> int:
+    if isinstance(t, (int, float, np.integer)):
+        return int(t)
+    ts = pd.Timestamp(t)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return int(ts.timestamp())
+
+
+def _month(ts_s: int) -> str:
+    return datetime.fromtimestamp(ts_s, tz=timezone.utc).strftime("%Y-%m")
+
+
+class BarStore:
+    def __init__(self, root: Union[str, Path] = DEFAULT_ROOT):
+        self.root = Path(root)
+
+    # writing ─────────────────────────────────────────────────────────
+    def write(self, symbol: str, interval: str, df: pd.DataFrame) -> int:
+        """Merge ``df`` into the store (a bar with an existing ``ts`` wins); return rows."""
+        if df is None or df.empty:
+            return 0
+        idx = pd.DatetimeIndex(df.index)
+        idx = idx.tz_localize("UTC") if idx.tz is None else idx.tz_convert("UTC")
+        ts = idx.asi8 // 1_000_000_000
+        lower = {c.lower(): c for c in df.columns}
+        cols = {f: df[lower[f]].to_numpy(dtype=np.float64) for f in FIELDS}
+
+        months = np.array([_month(int(t)) for t in ts])
+        for month in np.unique(months):
+            sel = months == month
+            self._merge_partition(self._part(symbol, interval, month), ts[sel], {f: c[sel] for f, c in cols.items()})
+        return len(ts)
+
+    def _merge_partition(self, part: Path, ts: np.ndarray, cols: Dict[str, np.ndarray]) -> None:
+        if (part / "ts.npy").exists():
+            old_ts = np.load(part / "ts.npy")
+            ts = np.concatenate([old_ts, ts])
+            cols = {f: np.concatenate([np.load(part / f"{f}.npy"), c]) for f, c in cols.items()}
+        # Stable sort then keep the last occurrence of each ts (new data wins)
+        order = np.argsort(ts, kind="stable")
+        ts = ts[order]
+        keep = np.append(ts[1:] != ts[:-1], True)
+        ts = ts[keep]
+        cols = {f: c[order][keep] for f, c in cols.items()}
+
+        tmp = part.with_name(part.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        np.save(tmp / "ts.npy", ts.astype(np.int64))
+        for f, c in cols.items():
+            np.save(tmp / f"{f}.npy", c)
+        if part.exists():
+            old = part.with_name(part.name + ".old")
+            os.replace(part, old)
+            os.replace(tmp, part)
+            shutil.rmtree(old)
+        else:
+            os.replace(tmp, part)
+
+    # reading ─────────────────────────────────────────────────────────
+    def symbols(self, interval: str) -> List[str]:
+        base = self.root / interval
+        return sorted(p.name for p in base.iterdir() if p.is_dir()) if base.exists() else []
+
+    def read(
+        self, symbol: str, interval: str, start: TimeLike, end: TimeLike, fields: Sequence[str] = FIELDS
+    ) -> Dict[str, np.ndarray]:
+        """``{"ts": …, field: …}`` for ``start <= ts < end``; memory-mapped views
+        when the range sits in one partition, concatenated copies otherwise."""
+        lo, hi = _to_s(start), _to_s(end)
+        parts = []
+        for part in self._partitions(symbol, interval, lo, hi):
+            ts = np.load(part / "ts.npy", mmap_mode="r")
+            a, b = np.searchsorted(ts, [lo, hi])
+            if a == b:
+                continue
+            cols = {"ts": ts[a:b]}
+            for f in fields:
+                cols[f] = np.load(part / f"{f}.npy", mmap_mode="r")[a:b]
+            parts.append(cols)
+        if len(parts) == 1:
+            return parts[0]
+        keys = ("ts", *fields)
+        if not parts:
+            return {k: np.empty(0, np.int64 if k == "ts" else np.float64) for k in keys}
+        return {k: np.concatenate([p[k] for p in parts]) for k in keys}
+
+    def load_bars(
+        self, symbols: Iterable[str], start: TimeLike, end: TimeLike, interval: str = "1d"
+    ) -> Bars:
+        """Bars of ``symbols`` in ``[start, end)`` aligned on the union of their timestamps."""
+        symbols = list(symbols)
+        per_symbol = [self.read(s, interval, start, end) for s in symbols]
+        ts_all = [p["ts"] for p in per_symbol if len(p["ts"])]
+        ts = np.unique(np.concatenate(ts_all)) if ts_all else np.empty(0, np.int64)
+
+        out = {f: np.full((len(symbols), len(ts)), np.nan) for f in FIELDS}
+        for i, cols in enumerate(per_symbol):
+            if not len(cols["ts"]):
+                continue
+            pos = np.searchsorted(ts, cols["ts"])
+            for f in FIELDS:
+                out[f][i, pos] = cols[f]
+        return Bars(symbols, ts, **out)
+
+    # internals ───────────────────────────────────────────────────────
+    def _part(self, symbol: str, interval: str, month: str) -> Path:
+        return self.root / interval / symbol.upper() / month
+
+    def _partitions(self, symbol: str, interval: str, lo: int, hi: int) -> List[Path]:
+        base = self.root / interval / symbol.upper()
+        if not base.exists() or lo >= hi:
+            return []
+        first, last = _month(lo), _month(hi - 1)
+        return [
+            p
+            for p in sorted(base.iterdir())
+            if p.is_dir() and first <= p.name <= last and not p.name.endswith((".tmp", ".old"))
+        ]
+
+
+def load_bars(
+    symbols: Iterable[str],
+    start: TimeLike,
+    end: TimeLike,
+    interval: str = "1d",
+    root: Union[str, Path, None] = None,
+) -> Bars:
+    """Module-level shortcut for :meth:`BarStore.load_bars` on ``$BAR_STORE``."""
+    return BarStore(root or DEFAULT_ROOT).load_bars(symbols, start, end, interval)
+
+
+def import_sqlite(store: BarStore, db_path: Union[str, Path], interval: Optional[str] = None) -> int:
+    """Copy the long ``bars`` table written by ``data.yahoo_data`` into ``store``."""
+    import sqlite3
+
+    conn = sqlite3.connect(str(db_path))
+    try:
+        sql = "SELECT symbol, interval, ts, open, high, low, close, volume FROM bars"
+        params: list = []
+        if interval:
+            sql += " WHERE interval = ?"
+            params.append(interval)
+        df = pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+    n = 0
+    for (symbol, ivl), grp in df.groupby(["symbol", "interval"]):
+        grp = grp.set_index(pd.to_datetime(grp["ts"], unit="s", utc=True))
+        n += store.write(symbol, ivl, grp[list(FIELDS)])
+    return n
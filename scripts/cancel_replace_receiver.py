@@ -6,6 +6,7 @@ cancel_replace_receiver.py  –  v3  (persistent + metrics + retry)
 • Prometheus metrics exposed on :9100/metrics
 • Retry back-off helper
 • Graceful shutdown
+• Import-safe: build_receiver() wires a receiver, run() is the CLI entry
 
 CLI
 ───
@@ -21,12 +22,12 @@ from __future__ import annotations
 
 # ── stdlib ────────────────────────────────────────────────────────────────
 import argparse
+import logging
 import os
 import signal
 import sys
 import time
-from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Tuple
 
 # ── 3rd-party ─────────────────────────────────────────────────────────────
 import zmq
@@ -38,24 +39,27 @@ from scripts.contracts import create_contract
 from scripts.order_factory import make_order
 from scripts.helpers import wait_order_active                # noqa: F401 (used elsewhere)
 from scripts.state_store import StateStore                   # tiny SQLite wrapper
+from scripts.health import HEALTH, LOOP_STALE_S, start_probe_server
 from scripts.retry import RetryRegistry, SHOULD_RETRY
 
+from tests import cr_pb2                                     # CancelReplaceRequest schema
+from utils.utils import SampledLogger, setup_logger
+
 # Prometheus metrics
 from scripts.metrics_server import (
     start as start_metrics,
     RECEIVER_MSGS, RECEIVER_ERRORS, IB_RETRIES, INFLIGHT_CONN,
     RECEIVER_BACKOFFS, RETRY_RESETS, IB_ERROR_CODES,
-    orders_by_symbol, orders_by_type, order_latency, orders_filled,
+    orders_by_symbol_hot, orders_by_type_hot, order_latency_hot, orders_filled,
     orders_canceled, orders_rejected, queue_depth
 )
 
 
-# ═════════════════════════════════  Boot  ════════════════════════════════
-load_dotenv()                            # allow .env overrides
-start_metrics(int(os.getenv("METRICS_PORT", "9100")))  # exporter on http://localhost:9100/metrics
+logger = logging.getLogger("CancelReplaceReceiver")  # configured by run()
+
 
 # ── CLI args ──────────────────────────────────────────────────────────────
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     p = argparse.ArgumentParser("IB Cancel/Replace Receiver (persistent+metrics)")
     p.add_argument("--account", default=os.getenv("IB_ACCOUNT"),
                    help="IB account (paper/live)")
@@ -68,38 +72,8 @@ def parse_args() -> argparse.Namespace:
                    help="ZMQ PULL bind addr")
     p.add_argument("--db",      default=os.getenv("STATE_DB", "var/state.db"),
                    help="SQLite DB file")
-    return p.parse_args()
-
-
-ARGS       = parse_args()
-ACCOUNT_ID = ARGS.account or os.getenv("IB_ACCOUNT", "DUH148810")
-
-# ── Persistent map --------------------------------------------------------
-store = StateStore(ARGS.db)
-PROTO_TO_IB: Dict[Tuple[int, str], int] = store.load()
-print(f"🔄  Loaded {len(PROTO_TO_IB)} rows from {ARGS.db}")
-
-# ── ZMQ -------------------------------------------------------------------
-ctx  = zmq.Context.instance()
-sock = ctx.socket(zmq.PULL)
-sock.bind(ARGS.zmq)
-print(f"Receiver listening on {ARGS.zmq} …")
-
-# ── Retry helper ----------------------------------------------------------
-retry_reg = RetryRegistry(max_attempts=3, base_delay=1.0)
-
-# ── Graceful shutdown -----------------------------------------------------
-SHUTDOWN = False
-
-
-def _sig_handler(_sig, _frm):
-    global SHUTDOWN
-    SHUTDOWN = True
-    print("\n🔌  Shutdown requested … finishing loop")
-
+    return p.parse_args(argv)
 
-signal.signal(signal.SIGINT, _sig_handler)
-signal.signal(signal.SIGTERM, _sig_handler)
 
 # ── Type-safe order builder ----------------------------------------------
 def make_limit_order(side: str, qty: int, px: float, acct: str):
@@ -107,96 +81,162 @@ def make_limit_order(side: str, qty: int, px: float, acct: str):
                       quantity=qty, limit_px=px, account=acct)
 
 
-# ── protobuf schema -------------------------------------------------------
-# (import kept here to avoid heavy cost if script used elsewhere)
-from tests import cr_pb2  # noqa: E402
-
-# ═════════════════════════════  Main loop  ═══════════════════════════════
-while not SHUTDOWN:
-    # 1) non-blocking poll
-    try:
-        raw = sock.recv(flags=zmq.NOBLOCK)
-    except zmq.Again:
-        # If using a queue, update metric
-        # queue_depth.set(queue.qsize()) # Uncomment if you have a queue object
-        time.sleep(0.05)
-        continue
-
-    RECEIVER_MSGS.inc()
-
-    # 2) decode protobuf
-    req = cr_pb2.CancelReplaceRequest()
-    try:
-        req.ParseFromString(raw)
-    except Exception as exc:                       
-        RECEIVER_ERRORS.inc()
-        print("❌  Protobuf parse error:", exc)
-        continue
-
-    # 3) extract fields
-    proto_id = req.order_id
-    qty, price = req.params.new_qty, req.params.new_price
-    sym = getattr(req, "symbol", "") or "AAPL"
-    key = (proto_id, sym)
-    print(f"📨  RX proto={proto_id} sym={sym} qty={qty} px={price}")
-
-    # Increment per-symbol metric
-    orders_by_symbol.labels(symbol=sym).inc()
-    orders_by_type.labels(type="NEW" if key not in PROTO_TO_IB else "REPLACE").inc()
-
-    # 4) retry gate
-    if not retry_reg.ready(key):
-        RECEIVER_BACKOFFS.inc()
-        continue
-
-    app = None
-    try:
-        # 5) IB connect
-        INFLIGHT_CONN.inc()
-        app = TradingApp(host=ARGS.host, port=ARGS.port, account=ACCOUNT_ID)
-        contract = create_contract(sym)
-
-        # Wrap main order processing in latency histogram
-        with order_latency.labels(symbol=sym).time():
-            # 6) NEW vs REPLACE
-            if key not in PROTO_TO_IB:
-                ib_id = app.send_order(contract, make_limit_order("BUY", qty, price, ACCOUNT_ID))
-                PROTO_TO_IB[key] = ib_id
-                store.upsert(*key, ib_id)
-                print(f"✅  NEW order (proto {proto_id}/{sym} ➜ ib {ib_id})")
-                # Simulate events (in your app, call on real status events):
-                orders_filled.inc()
-            else:
-                ib_id = PROTO_TO_IB[key]
-                status = (app.order_statuses.get(ib_id) or {}).get("status")
-                new_order = make_limit_order("BUY", qty, price, ACCOUNT_ID)
-
-                if status in ("Submitted", "PreSubmitted"):
-                    app.update_order(contract, new_order, ib_id)
-                    print(f"🔄  Cancel/replace ({proto_id}/{sym} ➜ ib {ib_id})")
+# ═════════════════════════════  Receiver  ════════════════════════════════
+class CancelReplaceReceiver:
+    """One PULL socket + persistent (proto_id, sym) → ib_id map + retry gate."""
+
+    def __init__(self, args: argparse.Namespace, sock, store,
+                 retry_reg: Optional[RetryRegistry] = None, app_factory=None):
+        self.args = args
+        self.account_id = args.account or os.getenv("IB_ACCOUNT", "DUH148810")
+        self.sock = sock
+        self.store = store
+        self.proto_to_ib: Dict[Tuple[int, str], int] = store.load()
+        self.retry_reg = retry_reg or RetryRegistry(max_attempts=3, base_delay=1.0)
+        self.app_factory = app_factory or TradingApp
+        self.shutdown = False
+        self.hot = SampledLogger(logger)  # per-message lines: sampled + rate-limited
+        self.health = HEALTH.component("zmq:cancel_replace", stale_after_s=LOOP_STALE_S)
+        logger.info("🔄  Loaded %d rows from %s", len(self.proto_to_ib), args.db)
+
+    def stop(self, *_args) -> None:
+        """Finish the current message and leave :meth:`run`; usable as a signal handler."""
+        self.shutdown = True
+
+    def close(self) -> None:
+        self.sock.close()
+        HEALTH.remove(self.health.name)
+
+    def run(self) -> None:
+        while not self.shutdown:
+            self.health.beat()
+            # 1) non-blocking poll
+            try:
+                raw = self.sock.recv(flags=zmq.NOBLOCK)
+            except zmq.Again:
+                # If using a queue, update metric
+                # queue_depth.set(queue.qsize()) # Uncomment if you have a queue object
+                time.sleep(0.05)
+                continue
+            self.handle(raw)
+
+    def handle(self, raw: bytes) -> None:
+        RECEIVER_MSGS.inc()
+
+        # 2) decode protobuf
+        req = cr_pb2.CancelReplaceRequest()
+        try:
+            req.ParseFromString(raw)
+        except Exception as exc:
+            RECEIVER_ERRORS.inc()
+            self.hot.error("❌  Protobuf parse error: %s", exc)
+            return
+
+        # 3) extract fields
+        proto_id = req.order_id
+        qty, price = req.params.new_qty, req.params.new_price
+        sym = getattr(req, "symbol", "") or "AAPL"
+        key = (proto_id, sym)
+        self.hot.debug("📨  RX proto=%s sym=%s qty=%s px=%s", proto_id, sym, qty, price)
+
+        # Increment per-symbol metric
+        orders_by_symbol_hot.inc(sym)
+        orders_by_type_hot.inc("NEW" if key not in self.proto_to_ib else "REPLACE")
+
+        # 4) retry gate
+        if not self.retry_reg.ready(key):
+            RECEIVER_BACKOFFS.inc()
+            return
+
+        app = None
+        try:
+            # 5) IB connect
+            INFLIGHT_CONN.inc()
+            app = self.app_factory(host=self.args.host, port=self.args.port, account=self.account_id)
+            contract = create_contract(sym)
+
+            # Wrap main order processing in latency histogram
+            with order_latency_hot.time(sym):
+                # 6) NEW vs REPLACE
+                if key not in self.proto_to_ib:
+                    ib_id = app.send_order(contract, make_limit_order("BUY", qty, price, self.account_id))
+                    self.proto_to_ib[key] = ib_id
+                    self.store.upsert(*key, ib_id)
+                    self.hot.info("✅  NEW order (proto %s/%s ➜ ib %s)", proto_id, sym, ib_id)
+                    # Simulate events (in your app, call on real status events):
                     orders_filled.inc()
                 else:
-                    app.placeOrder(ib_id, contract, new_order)
-                    print(f"✏️  Modify in place ({proto_id}/{sym} ➜ ib {ib_id})")
-                    orders_canceled.inc()
-
-                store.upsert(*key, ib_id)
-                retry_reg.on_success(key)
-                RETRY_RESETS.inc()
-
-    except Exception as ib_err:
-        RECEIVER_ERRORS.inc()
-        orders_rejected.inc()
-        code = getattr(ib_err, "code", None)
-        if code is not None:
-            IB_ERROR_CODES.labels(code=str(code)).inc()
-        if code in SHOULD_RETRY:
-            IB_RETRIES.inc()
-            retry_reg.on_error(key, code)
-        print("❌  IB error:", ib_err)
-
+                    ib_id = self.proto_to_ib[key]
+                    status = (app.order_statuses.get(ib_id) or {}).get("status")
+                    new_order = make_limit_order("BUY", qty, price, self.account_id)
+
+                    if status in ("Submitted", "PreSubmitted"):
+                        app.update_order(contract, new_order, ib_id)
+                        self.hot.info("🔄  Cancel/replace (%s/%s ➜ ib %s)", proto_id, sym, ib_id)
+                        orders_filled.inc()
+                    else:
+                        app.placeOrder(ib_id, contract, new_order)
+                        self.hot.info("✏️  Modify in place (%s/%s ➜ ib %s)", proto_id, sym, ib_id)
+                        orders_canceled.inc()
+
+                    self.store.upsert(*key, ib_id)
+                    self.retry_reg.on_success(key)
+                    RETRY_RESETS.inc()
+
+        except Exception as ib_err:
+            RECEIVER_ERRORS.inc()
+            orders_rejected.inc()
+            code = getattr(ib_err, "code", None)
+            if code is not None:
+                IB_ERROR_CODES.labels(code=str(code)).inc()
+            if code in SHOULD_RETRY:
+                IB_RETRIES.inc()
+                self.retry_reg.on_error(key, code)
+            self.hot.error("❌  IB error: %s", ib_err)
+
+        finally:
+            if app:
+                app.disconnect()
+                INFLIGHT_CONN.dec()
+            time.sleep(1.0)  # allow callbacks / avoid hammering TWS
+
+
+# ═════════════════════════════  Factories  ═══════════════════════════════
+def build_socket(addr: str, ctx: Optional[zmq.Context] = None) -> zmq.Socket:
+    ctx = ctx or zmq.Context.instance()
+    sock = ctx.socket(zmq.PULL)
+    sock.bind(addr)
+    logger.info("Receiver listening on %s …", addr)
+    return sock
+
+
+def build_receiver(argv: Optional[List[str]] = None, *, ctx: Optional[zmq.Context] = None,
+                   app_factory=None) -> CancelReplaceReceiver:
+    """Parse ``argv``, open the state DB and bind the socket – no metrics, no signals."""
+    args = parse_args(argv)
+    return CancelReplaceReceiver(args, build_socket(args.zmq, ctx), StateStore(args.db),
+                                 app_factory=app_factory)
+
+
+def run(argv: Optional[List[str]] = None) -> None:
+    """CLI entry point: env, metrics exporter, signal handlers, main loop."""
+    load_dotenv()                            # allow .env overrides
+    setup_logger("CancelReplaceReceiver")
+    start_metrics(int(os.getenv("METRICS_PORT", "9100")))  # exporter on http://localhost:9100/metrics
+    receiver = build_receiver(argv)
+    start_probe_server()  # /ready on $HEALTH_PORT, if set
+
+    def _sig_handler(_sig, _frm):
+        receiver.stop()
+        logger.info("🔌  Shutdown requested … finishing loop")
+
+    signal.signal(signal.SIGINT, _sig_handler)
+    signal.signal(signal.SIGTERM, _sig_handler)
+    try:
+        receiver.run()
     finally:
-        if app:
-            app.disconnect()
-            INFLIGHT_CONN.dec()
-        time.sleep(1.0)  # allow callbacks / avoid hammering TWS
+        receiver.close()
+
+
+if __name__ == "__main__":
+    run(sys.argv[1:])
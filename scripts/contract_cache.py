@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+contract_cache.py
+─────────────────
+On-disk cache of qualified IB contracts.
+
+Qualifying a contract costs one ``reqContractDetails`` round-trip, which
+dominates start-up when subscribing to a large option chain.  The cache
+stores the fields IB filled in (``conId``, ``localSymbol`` …) keyed by a
+normalised token so that a warm restart can build fully qualified
+contracts locally and go straight to ``reqMktData``.
+
+Keys
+----
+• stocks  – ``STK:<SYMBOL>:<EXCHANGE>:<CURRENCY>``
+• options – ``OPT:<SYMBOL>:<YYYYMMDD>:<RIGHT>:<STRIKE>:<EXCHANGE>:<CURRENCY>``
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+DEFAULT_PATH = Path(os.getenv("CONTRACT_CACHE", "var/contracts.json"))
+
+# Contract attributes worth persisting (all plain JSON scalars)
+FIELDS = (
+    "conId",
+    "symbol",
+    "secType",
+    "lastTradeDateOrContractMonth",
+    "strike",
+    "right",
+    "multiplier",
+    "exchange",
+    "primaryExchange",
+    "currency",
+    "localSymbol",
+    "tradingClass",
+)
+
+
+def stock_key(symbol: str, exchange: str = "SMART", currency: str = "USD") -> str:
+    return f"STK:{symbol.upper()}:{exchange}:{currency}"
+
+
+def option_key(
+    symbol: str,
+    yyyymmdd: str,
+    right: str,
+    strike: float,
+    exchange: str = "SMART",
+    currency: str = "USD",
+) -> str:
+    return f"OPT:{symbol.upper()}:{yyyymmdd}:{right.upper()}:{float(strike):.4f}:{exchange}:{currency}"
+
+
+class ContractCache:
+    """
+    Example
+    -------
+    cache = ContractCache("var/contracts.json")
+    fields = cache.get(stock_key("AAPL"))      # None on a cold start
+    cache.put(stock_key("AAPL"), qualified_contract)
+    cache.save()
+    """
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_PATH):
+        self.path = Path(path)
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    # public API ──────────────────────────────────────────────────────
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached contract fields for ``key`` (or ``None``)."""
+        with self._lock:
+            row = self._rows.get(key)
+            return dict(row) if row else None
+
+    def put(self, key: str, contract: Any) -> None:
+        """Remember the qualified ``contract`` under ``key``."""
+        if not getattr(contract, "conId", 0):
+            return  # never cache an unqualified contract
+        row = {f: getattr(contract, f) for f in FIELDS if getattr(contract, f, None) not in (None, "")}
+        with self._lock:
+            if self._rows.get(key) != row:
+                self._rows[key] = row
+                self._dirty = True
+
+    def discard(self, key: str) -> None:
+        """Forget ``key`` (e.g. after IB rejected its cached conId)."""
+        with self._lock:
+            if self._rows.pop(key, None) is not None:
+                self._dirty = True
+
+    def save(self) -> None:
+        """Atomically write the cache to disk if anything changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = json.dumps(self._rows, indent=1, sort_keys=True)
+            self._dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(payload, encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._rows)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._rows
+
+    # internals ───────────────────────────────────────────────────────
+    def _load(self) -> None:
+        try:
+            rows = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return  # missing or corrupt file → cold start
+        if isinstance(rows, dict):
+            self._rows = {k: v for k, v in rows.items() if isinstance(v, dict) and v.get("conId")}
+
+
+def apply_fields(contract: Any, fields: Dict[str, Any]) -> Any:
+    """Copy cached ``fields`` onto ``contract`` and return it."""
+    for name, value in fields.items():
+        setattr(contract, name, value)
+    return contract
@@ -8,6 +8,8 @@ Features
 • Handles connection to TWS / IB Gateway (paper or live).
 • Guarantees monotonic order-id allocation via _acquire_order_id().
 • Caches orderStatus / openOrder callbacks so other code can query them.
+• Keeps a live position book (reqPositions stream) for instant flattening.
+• Reports connection state and order-buffer depth to scripts.health.
 • Convenience helpers: send_order(), update_order(), cancel_*().
 • Multi-leg helpers: place_bracket_order(), place_oco_order().
 • No business logic here – higher-level helpers live in scripts/*.
@@ -21,7 +23,7 @@ import subprocess
 import sys
 import threading
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from ibapi.client import EClient
 from ibapi.contract import Contract
@@ -29,7 +31,9 @@ from ibapi.order import Order
 
 from ib.client import IBClient  # type stubs (EClient alias)
 from risk.throttle import ContractSpec, Throttle
+from scripts.health import HEALTH, MAX_ORDER_BUFFER
 from scripts.metrics_server import ib_connection_status
+from scripts.tracing import ADMITTED, PLACED, TRACER
 from scripts.wrapper import \
     IBWrapper  # your subclass of ibapi.wrapper.EWrapper
 from utils.utils import setup_logger
@@ -62,6 +66,10 @@ class TradingApp(IBWrapper, IBClient):  # IBClient ≡ EClient
         # Runtime caches populated by callbacks
         self.order_statuses: Dict[int, Dict[str, Any]] = {}
         self.open_orders: Dict[int, Order] = {}
+        # conId → (contract, position); notified on status/position updates
+        self.position_book: Dict[int, Tuple[Contract, float]] = {}
+        self.order_cv = threading.Condition()
+        self._positions_ready = threading.Event()
 
         # Initialise base classes
         IBWrapper.__init__(self)
@@ -77,6 +85,8 @@ class TradingApp(IBWrapper, IBClient):  # IBClient ≡ EClient
         self._host = host
         self._port = port
         self._cid = clientId
+        self._health_ib = f"ib:{clientId}"
+        self._health_buf = f"order_buffer:{clientId}"
 
         # Start connection + reader thread via helper
         self._connect_ib()
@@ -123,16 +133,33 @@ class TradingApp(IBWrapper, IBClient):  # IBClient ≡ EClient
         whyHeld,
         mktCapPrice,
     ):
-        self.order_statuses[orderId] = {
-            "status": status,
-            "filled": filled,
-            "remaining": remaining,
-            "avgFillPrice": avgFillPrice,
-        }
+        with self.order_cv:
+            self.order_statuses[orderId] = {
+                "status": status,
+                "filled": filled,
+                "remaining": remaining,
+                "avgFillPrice": avgFillPrice,
+            }
+            self.order_cv.notify_all()
+        TRACER.on_status(orderId, status)
 
     def openOrder(self, orderId, contract, order, orderState):
         self.open_orders[orderId] = order
 
+    def position(self, account, contract, position, avgCost):
+        if not self.account or account == self.account:
+            with self.order_cv:
+                if position:
+                    self.position_book[contract.conId] = (contract, float(position))
+                else:
+                    self.position_book.pop(contract.conId, None)
+                self.order_cv.notify_all()
+        # No super(): IBWrapper.position appends to ``self.positions`` for the
+        # life of the reqPositions stream, and request_positions() rebinds it
+
+    def positionEnd(self):
+        self._positions_ready.set()
+
     def error(self, reqId, errorCode, errorString):
         """
         Suppress IB’s harmless info codes; log everything else.
@@ -142,6 +169,10 @@ class TradingApp(IBWrapper, IBClient):  # IBClient ≡ EClient
         """
         if errorCode in (202, 399, 2104, 2106, 2158):
             return
+        if errorCode == 1100:  # connectivity to IB servers lost
+            HEALTH.set(self._health_ib, False, errorString)
+        elif errorCode in (1101, 1102):  # restored
+            HEALTH.set(self._health_ib, True)
         logger.error("❌ Error (%s): %s", errorCode, errorString)
 
     def connectionClosed(self):
@@ -149,7 +180,12 @@ class TradingApp(IBWrapper, IBClient):  # IBClient ≡ EClient
         self._connected_evt.clear()
         if self._manual_disconnect:
             self._manual_disconnect = False
+            # Closed on purpose: keep the last connect result so per-message
+            # apps (cancel_replace_receiver) still satisfy $READY_REQUIRE=ib.
+            HEALTH.set(self._health_ib, True, "disconnected")
+            HEALTH.remove(self._health_buf)
             return
+        HEALTH.set(self._health_ib, False, "connection closed")
         logger.warning("🔌 Connection closed – attempting reconnect")
         self._paused = True
         self._connect_ib()
@@ -170,12 +206,16 @@ class TradingApp(IBWrapper, IBClient):  # IBClient ≡ EClient
                 logger.error("❌ Connect failed: %s", exc)
             if self._connected_evt.wait(timeout=5):
                 ib_connection_status.set(1)
+                HEALTH.set(self._health_ib, True)
                 self._paused = False
+                self.reqPositions()  # streams every change into position_book
                 for args in list(self._order_buffer):
                     super().placeOrder(*args)
                 self._order_buffer.clear()
+                HEALTH.depth(self._health_buf, 0, MAX_ORDER_BUFFER)
                 return
             ib_connection_status.set(0)
+            HEALTH.set(self._health_ib, False, "connecting")
             time.sleep(delay + random.uniform(0, delay))
             delay = min(delay * 2, 32)
 
@@ -208,6 +248,12 @@ class TradingApp(IBWrapper, IBClient):  # IBClient ≡ EClient
 
         return self._acquire_order_id()  # recurse now that we have one
 
+    def reserve_order_ids(self, n: int) -> int:
+        """Reserve ``n`` consecutive order-ids and return the first."""
+        base_id = self._acquire_order_id()
+        self._next_order_id = base_id + n
+        return base_id
+
     # ────────────────────── public helpers ────────────────────────────────
     def send_order(self, contract, order) -> int:
         if self.account and not order.account:
@@ -217,21 +263,28 @@ class TradingApp(IBWrapper, IBClient):  # IBClient ≡ EClient
         self.throttle.block_if_needed(
             ContractSpec(symbol=contract.symbol), order.totalQuantity, float(price)
         )
+        TRACER.mark(ADMITTED)
 
         oid = self._acquire_order_id()
         if self._paused or not self.isConnected():
-            self._order_buffer.append((oid, contract, order))
+            self._buffer_order(oid, contract, order)
         else:
             self.placeOrder(oid, contract, order)
+            TRACER.mark(PLACED)
+        TRACER.bind_order(oid)
         return oid
 
     # Override to buffer orders if disconnected
     def placeOrder(self, orderId: int, contract: Contract, order: Order) -> None:  # type: ignore
         if self._paused or not self.isConnected():
-            self._order_buffer.append((orderId, contract, order))
+            self._buffer_order(orderId, contract, order)
             return
         super().placeOrder(orderId, contract, order)
 
+    def _buffer_order(self, orderId: int, contract: Contract, order: Order) -> None:
+        self._order_buffer.append((orderId, contract, order))
+        HEALTH.depth(self._health_buf, len(self._order_buffer), MAX_ORDER_BUFFER)
+
     def update_order(self, contract, order, existing_id: int) -> int:
         self.cancelOrder(existing_id)
         return self.send_order(contract, order)
@@ -382,40 +435,20 @@ class TradingApp(IBWrapper, IBClient):  # IBClient ≡ EClient
         time.sleep(2)
         return self.portfolio
 
-    def close_all_positions(self) -> None:
-        """Liquidate all open positions using market orders."""
-        from ib_insync import Order as _Order
-        from ib_insync import Stock
-
-        positions = self.request_positions()
-        pos_iter = positions.values() if isinstance(positions, dict) else positions
-        for pos in pos_iter:
-            qty = (
-                pos.get("position")
-                if isinstance(pos, dict)
-                else getattr(pos, "position", 0)
-            )
-            sym = (
-                pos.get("symbol")
-                if isinstance(pos, dict)
-                else getattr(pos, "symbol", "")
-            )
-            if not qty or not sym:
-                continue
-
-            action = "SELL" if qty > 0 else "BUY"
-            contract = Stock(sym, "SMART", "USD")
-            order = _Order(
-                action=action,
-                orderType="MKT",
-                totalQuantity=abs(int(qty)),
-                tif="DAY",
-            )
-            if self.account and not getattr(order, "account", None):
-                order.account = self.account
-            self.placeOrder(self._acquire_order_id(), contract, order)
+    def position_snapshot(self, timeout: float = 2.0) -> List[Tuple[Contract, float]]:
+        """
+        Non-zero positions from the cached book.  Only waits (≤ ``timeout``)
+        if the initial ``positionEnd`` has not arrived yet.
+        """
+        self._positions_ready.wait(timeout)
+        with self.order_cv:
+            return list(self.position_book.values())
+
+    def close_all_positions(self, *, deadline_s: Optional[float] = None, cancel_first: bool = True):
+        """Cancel everything, then liquidate all positions; see scripts.flatten."""
+        from scripts.flatten import flatten
 
-        self.cancel_all_orders()
+        return flatten(self, deadline_s=deadline_s, cancel_first=cancel_first)
 
 
 # ════════════════════════════════════════════════════════════════════════════
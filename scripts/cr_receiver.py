@@ -44,7 +44,9 @@ from prometheus_client import Counter, Histogram, start_http_server
 from scripts.core import TradingApp
 from scripts.contracts import create_contract
 from scripts.order_factory import make_order
-from utils.utils import setup_logger
+from scripts.health import HEALTH, start_probe_server
+from scripts.tracing import ACKED, DECODED, TRACER, VALIDATED, install_dump_signal
+from utils.utils import SampledLogger, setup_logger
 
 # Prefer the generated protobuf in tests for now
 from tests import cr_pb2  # type: ignore
@@ -163,6 +165,7 @@ def _publish_ack(sock: zmq.Socket, kind: str, proto_id: int, ib_id: Optional[int
         "ts_ns": time.time_ns(),
     }
     sock.send_multipart([b"order_acks", json.dumps(msg).encode("utf-8")])
+    TRACER.mark(ACKED)
     acks_pub_total.inc()
 
 
@@ -185,8 +188,12 @@ def main() -> None:
     pub.setsockopt(zmq.SNDHWM, snd_hwm)
     pub.bind(ACK_PUB_ADDR)
     logger.info("ZMQ PUB (acks) bound to %s", ACK_PUB_ADDR)
+    HEALTH.set("zmq:cr_receiver", True, ZMQ_ADDR)
+    start_probe_server()  # /ready on $HEALTH_PORT, if set
 
     conn = _db_connect()
+    hot = SampledLogger(logger)  # per-message lines: sampled + rate-limited
+    install_dump_signal()  # kill -USR1 → $TRACE_DUMP
     app = TradingApp(account=ACCOUNT_ID)
     contract = create_contract(ORDER_SYMBOL)
 
@@ -194,80 +201,86 @@ def main() -> None:
         while True:
             start = time.perf_counter()
             raw = pull.recv()
-            msg_rx_total.inc()
-
-            req = cr_pb2.CancelReplaceRequest()
+            trace = TRACER.start()  # per-message stage timestamps
             try:
-                req.ParseFromString(raw)
-            except Exception as exc:
-                msg_err_total.inc()
-                logger.error("Bad protobuf: %s", exc)
-                _publish_ack(pub, "CancelReplaceReject", -1, None, "PARSE_ERROR", str(exc))
-                continue
-
-            proto_id = int(req.order_id)
-            # Prefer nested params but fall back to top-level fields if present
-            qty = int(req.params.new_qty) if req.HasField("params") else 0
-            price = float(req.params.new_price) if req.HasField("params") else 0.0
-            if hasattr(req, "new_price") and req.new_price > 0 and price <= 0:
-                price = float(req.new_price)
-
-            # Validate
-            err = _validate(qty, price)
-            if err:
-                msg_err_total.inc()
-                logger.warning("Rejecting proto_id=%s: %s", proto_id, err)
-                _publish_ack(pub, "CancelReplaceReject", proto_id, None, "REJECT", err)
-                continue
-
-            # Session and symbol checks
-            if ALLOWED_SYMBOLS is not None and ORDER_SYMBOL not in ALLOWED_SYMBOLS:
-                msg_err_total.inc()
-                reason = f"symbol {ORDER_SYMBOL} not allowed"
-                logger.warning("Rejecting proto_id=%s: %s", proto_id, reason)
-                _publish_ack(pub, "CancelReplaceReject", proto_id, None, "REJECT", reason)
-                continue
-            if not _within_session():
-                msg_err_total.inc()
-                reason = "outside TRADING_HOURS"
-                logger.warning("Rejecting proto_id=%s: %s", proto_id, reason)
-                _publish_ack(pub, "CancelReplaceReject", proto_id, None, "REJECT", reason)
-                continue
-
-            # Resolve mapping
-            ib_id = _load_ib_id(conn, proto_id)
-            if ib_id is None:
-                # New order
-                order = make_order("BUY", "LMT", qty, limit_px=price, account=ACCOUNT_ID)
+                msg_rx_total.inc()
+
+                req = cr_pb2.CancelReplaceRequest()
                 try:
-                    ib_id = app.send_order(contract, order)
-                    _save_mapping(conn, proto_id, ib_id, int(getattr(req, "ts_ns", 0) or time.time_ns()), "SUBMITTED")
-                    logger.info("New IB order placed (proto %s → ib %s)", proto_id, ib_id)
-                    _publish_ack(pub, "CancelReplaceAck", proto_id, ib_id, "NEW")
+                    req.ParseFromString(raw)
                 except Exception as exc:
                     msg_err_total.inc()
-                    logger.error("Send order failed (proto %s): %s", proto_id, exc)
-                    _publish_ack(pub, "CancelReplaceReject", proto_id, None, "ERROR", str(exc))
-            else:
-                # Replace existing
-                status = app.order_statuses.get(ib_id, {}).get("status")
-                new_order = make_order("BUY", "LMT", qty, limit_px=price, account=ACCOUNT_ID)
-                try:
-                    if status in ("Submitted", "PreSubmitted"):
-                        app.update_order(contract, new_order, ib_id)
-                        logger.info("Cancel/replace sent (proto %s → ib %s)", proto_id, ib_id)
-                        _publish_ack(pub, "CancelReplaceAck", proto_id, ib_id, "REPLACE")
-                    else:
-                        app.placeOrder(ib_id, contract, new_order)
-                        logger.info("Modify in place (PendingSubmit) (proto %s → ib %s)", proto_id, ib_id)
-                        _publish_ack(pub, "CancelReplaceAck", proto_id, ib_id, "MODIFY")
-                    _save_mapping(conn, proto_id, ib_id, int(getattr(req, "ts_ns", 0) or time.time_ns()), "UPDATED")
-                except Exception as exc:
+                    hot.error("Bad protobuf: %s", exc)
+                    _publish_ack(pub, "CancelReplaceReject", -1, None, "PARSE_ERROR", str(exc))
+                    continue
+
+                proto_id = int(req.order_id)
+                # Prefer nested params but fall back to top-level fields if present
+                qty = int(req.params.new_qty) if req.HasField("params") else 0
+                price = float(req.params.new_price) if req.HasField("params") else 0.0
+                if hasattr(req, "new_price") and req.new_price > 0 and price <= 0:
+                    price = float(req.new_price)
+                TRACER.mark(DECODED, trace)
+
+                # Validate
+                err = _validate(qty, price)
+                if err:
                     msg_err_total.inc()
-                    logger.error("Replace failed (proto %s ib %s): %s", proto_id, ib_id, exc)
-                    _publish_ack(pub, "CancelReplaceReject", proto_id, ib_id, "ERROR", str(exc))
+                    hot.warning("Rejecting proto_id=%s: %s", proto_id, err)
+                    _publish_ack(pub, "CancelReplaceReject", proto_id, None, "REJECT", err)
+                    continue
 
-            proc_latency_ms.observe((time.perf_counter() - start) * 1000)
+                # Session and symbol checks
+                if ALLOWED_SYMBOLS is not None and ORDER_SYMBOL not in ALLOWED_SYMBOLS:
+                    msg_err_total.inc()
+                    reason = f"symbol {ORDER_SYMBOL} not allowed"
+                    hot.warning("Rejecting proto_id=%s: %s", proto_id, reason)
+                    _publish_ack(pub, "CancelReplaceReject", proto_id, None, "REJECT", reason)
+                    continue
+                if not _within_session():
+                    msg_err_total.inc()
+                    reason = "outside TRADING_HOURS"
+                    hot.warning("Rejecting proto_id=%s: %s", proto_id, reason)
+                    _publish_ack(pub, "CancelReplaceReject", proto_id, None, "REJECT", reason)
+                    continue
+                TRACER.mark(VALIDATED, trace)
+
+                # Resolve mapping
+                ib_id = _load_ib_id(conn, proto_id)
+                if ib_id is None:
+                    # New order
+                    order = make_order("BUY", "LMT", qty, limit_px=price, account=ACCOUNT_ID)
+                    try:
+                        ib_id = app.send_order(contract, order)
+                        _save_mapping(conn, proto_id, ib_id, int(getattr(req, "ts_ns", 0) or time.time_ns()), "SUBMITTED")
+                        hot.info("New IB order placed (proto %s → ib %s)", proto_id, ib_id)
+                        _publish_ack(pub, "CancelReplaceAck", proto_id, ib_id, "NEW")
+                    except Exception as exc:
+                        msg_err_total.inc()
+                        hot.error("Send order failed (proto %s): %s", proto_id, exc)
+                        _publish_ack(pub, "CancelReplaceReject", proto_id, None, "ERROR", str(exc))
+                else:
+                    # Replace existing
+                    status = app.order_statuses.get(ib_id, {}).get("status")
+                    new_order = make_order("BUY", "LMT", qty, limit_px=price, account=ACCOUNT_ID)
+                    try:
+                        if status in ("Submitted", "PreSubmitted"):
+                            app.update_order(contract, new_order, ib_id)
+                            hot.info("Cancel/replace sent (proto %s → ib %s)", proto_id, ib_id)
+                            _publish_ack(pub, "CancelReplaceAck", proto_id, ib_id, "REPLACE")
+                        else:
+                            app.placeOrder(ib_id, contract, new_order)
+                            hot.info("Modify in place (PendingSubmit) (proto %s → ib %s)", proto_id, ib_id)
+                            _publish_ack(pub, "CancelReplaceAck", proto_id, ib_id, "MODIFY")
+                        _save_mapping(conn, proto_id, ib_id, int(getattr(req, "ts_ns", 0) or time.time_ns()), "UPDATED")
+                    except Exception as exc:
+                        msg_err_total.inc()
+                        hot.error("Replace failed (proto %s ib %s): %s", proto_id, ib_id, exc)
+                        _publish_ack(pub, "CancelReplaceReject", proto_id, ib_id, "ERROR", str(exc))
+
+                proc_latency_ms.observe((time.perf_counter() - start) * 1000)
+            finally:
+                TRACER.end(trace)
 
     except KeyboardInterrupt:
         logger.info("Shutdown requested")
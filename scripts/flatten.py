@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+scripts.flatten
+───────────────
+Cancel-first, parallel liquidation of every open position.
+
+1. ``reqGlobalCancel`` goes out before anything else, so resting orders stop
+   filling while we liquidate (the liquidation orders are placed after it
+   and are therefore not caught by it).
+2. Positions come from the app's cached position book – no request/sleep.
+3. One block of order-ids is reserved up front and all market orders are
+   fired back to back, pausing only when the throttle's per-second count is
+   used up.
+4. Order statuses are tracked against one overall deadline; the returned
+   :class:`FlattenReport` carries time-to-flat, which is also exported as
+   ``flatten_time_to_flat_seconds``.
+
+The engine only needs a small slice of :class:`scripts.core.TradingApp`:
+``cancel_all_orders()``, ``position_snapshot()``, ``reserve_order_ids(n)``,
+``placeOrder()``, ``order_statuses`` guarded by ``order_cv``, ``throttle``
+and ``account``.
+"""
+
+from __future__ import annotations
+
+import copy
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from risk.throttle import ContractSpec
+from scripts.metrics_server import flatten_incomplete_total, flatten_time_to_flat
+from scripts.orders import market
+from utils.utils import setup_logger
+
+logger = setup_logger()
+
+DEFAULT_DEADLINE_S = float(os.getenv("FLATTEN_DEADLINE_S", "10"))
+FAILED = frozenset({"Cancelled", "ApiCancelled", "Inactive"})
+
+
+@dataclass
+class FlattenReport:
+    orders: Dict[int, str] = field(default_factory=dict)  # order-id → symbol
+    filled: List[int] = field(default_factory=list)
+    failed: List[int] = field(default_factory=list)
+    pending: List[int] = field(default_factory=list)  # still working at deadline
+    time_to_flat_s: Optional[float] = None  # set once every order filled
+    elapsed_s: float = 0.0
+
+    @property
+    def flat(self) -> bool:
+        return self.time_to_flat_s is not None
+
+
+def flatten(
+    app,
+    *,
+    deadline_s: Optional[float] = None,
+    cancel_first: bool = True,
+) -> FlattenReport:
+    """Liquidate every position in ``app.position_book`` within ``deadline_s``."""
+    t0 = time.monotonic()
+    deadline = t0 + (DEFAULT_DEADLINE_S if deadline_s is None else deadline_s)
+
+    if cancel_first:
+        app.cancel_all_orders()
+
+    positions = app.position_snapshot(timeout=max(0.0, deadline - time.monotonic()))
+    report = FlattenReport()
+    if not positions:
+        report.time_to_flat_s = report.elapsed_s = time.monotonic() - t0
+        return report
+
+    base_id = app.reserve_order_ids(len(positions))
+    for i, (contract, qty) in enumerate(positions):
+        contract = copy.copy(contract)
+        if not contract.exchange:
+            contract.exchange = "SMART"  # position callbacks leave it blank
+        order = market("SELL" if qty > 0 else "BUY", abs(qty), account=app.account)
+
+        wait = app.throttle.next_window_in()
+        if wait:
+            time.sleep(wait)
+        app.throttle.block_if_needed(ContractSpec(symbol=contract.symbol), abs(qty), 0.0)
+        app.placeOrder(base_id + i, contract, order)
+        report.orders[base_id + i] = contract.symbol
+
+    _await(app, report, deadline)
+    report.elapsed_s = time.monotonic() - t0
+    if report.filled and len(report.filled) == len(report.orders):
+        report.time_to_flat_s = report.elapsed_s
+        flatten_time_to_flat.observe(report.time_to_flat_s)
+        logger.info("✅ Flat in %.3fs (%d orders)", report.time_to_flat_s, len(report.orders))
+    else:
+        flatten_incomplete_total.inc()
+        logger.error(
+            "❌ Flatten incomplete after %.3fs: %d filled, %d failed %s, %d pending %s",
+            report.elapsed_s,
+            len(report.filled),
+            len(report.failed),
+            [report.orders[o] for o in report.failed],
+            len(report.pending),
+            [report.orders[o] for o in report.pending],
+        )
+    return report
+
+
+def _await(app, report: FlattenReport, deadline: float) -> None:
+    """Block on ``app.order_cv`` until every order is terminal or the deadline passes."""
+    with app.order_cv:
+        while True:
+            report.filled, report.failed, report.pending = [], [], []
+            for oid in report.orders:
+                status = app.order_statuses.get(oid, {}).get("status")
+                if status == "Filled":
+                    report.filled.append(oid)
+                elif status in FAILED:
+                    report.failed.append(oid)
+                else:
+                    report.pending.append(oid)
+            remaining = deadline - time.monotonic()
+            if not report.pending or remaining <= 0:
+                return
+            app.order_cv.wait(remaining)
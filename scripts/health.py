@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+scripts.health
+──────────────
+In-process component health registry behind ``/ready`` (api/health.py).
+
+Components report into :data:`HEALTH` as their state changes – nothing is
+probed when the endpoint is hit, so readiness is answered from memory:
+
+• ``ib:<clientId>`` – TradingApp connection (down while reconnecting);
+• ``order_buffer:<clientId>`` – orders parked while disconnected;
+• ``state_store`` – last StateStore write succeeded;
+• ``zmq:<receiver>`` – receiver sockets bound; polling loops also heartbeat
+  and go stale after ``$READY_LOOP_STALE_S``.
+
+A component is a problem when it reports not-ok, its ``depth`` exceeds
+``max_depth``, or it has a ``stale_after_s`` and has not been touched for
+that long.  ``$READY_REQUIRE`` (comma separated, e.g. ``ib,zmq``) lists
+components that must be present – a name matches itself or ``name:*``.
+
+    HEALTH.set("ib:1", False, "connection closed")
+    HEALTH.depth("order_buffer:1", len(buf), max_depth=50)
+    ok, problems = HEALTH.ready()
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Tuple
+
+MAX_ORDER_BUFFER = int(os.getenv("READY_MAX_ORDER_BUFFER", "50"))
+LOOP_STALE_S = float(os.getenv("READY_LOOP_STALE_S", "30"))  # polling loops only
+
+
+@dataclass
+class Component:
+    name: str
+    ok: bool = True
+    detail: str = ""
+    depth: int = 0
+    max_depth: Optional[int] = None
+    stale_after_s: Optional[float] = None
+    updated: float = field(default_factory=time.monotonic)
+
+    def beat(self) -> None:
+        self.updated = time.monotonic()
+
+    def problem(self, now: float) -> Optional[str]:
+        if not self.ok:
+            return self.detail or "down"
+        if self.max_depth is not None and self.depth > self.max_depth:
+            return f"depth {self.depth} > {self.max_depth}"
+        if self.stale_after_s is not None and now - self.updated > self.stale_after_s:
+            return f"no update for {now - self.updated:.1f}s"
+        return None
+
+    def as_dict(self, now: float) -> dict:
+        return {
+            "ok": self.problem(now) is None,
+            "detail": self.detail,
+            "depth": self.depth,
+            "age_s": round(now - self.updated, 3),
+        }
+
+
+class HealthRegistry:
+    def __init__(self, require: Iterable[str] = ()) -> None:
+        self.require = [r.strip() for r in require if r.strip()]
+        self._components: Dict[str, Component] = {}
+
+    def component(self, name: str, **kw) -> Component:
+        """Get or register ``name``; keyword args set fields on first registration."""
+        comp = self._components.get(name)
+        if comp is None:
+            comp = self._components.setdefault(name, Component(name, **kw))
+        return comp
+
+    def set(self, name: str, ok: bool, detail: str = "") -> None:
+        comp = self.component(name)
+        comp.ok, comp.detail = ok, detail
+        comp.beat()
+
+    def depth(self, name: str, depth: int, max_depth: Optional[int] = None) -> None:
+        comp = self.component(name, max_depth=max_depth)
+        comp.depth = depth
+        comp.beat()
+
+    def remove(self, name: str) -> None:
+        self._components.pop(name, None)
+
+    def clear(self) -> None:
+        self._components.clear()
+
+    def ready(self) -> Tuple[bool, Dict[str, str]]:
+        """``(ready, {component: problem})`` from the current in-memory state."""
+        now = time.monotonic()
+        problems = {}
+        components = list(self._components.values())
+        for comp in components:
+            problem = comp.problem(now)
+            if problem is not None:
+                problems[comp.name] = problem
+        for req in self.require:
+            if not any(c.name == req or c.name.startswith(req + ":") for c in components):
+                problems[req] = "not registered"
+        return not problems, problems
+
+    def snapshot(self) -> Dict[str, dict]:
+        now = time.monotonic()
+        return {c.name: c.as_dict(now) for c in list(self._components.values())}
+
+
+HEALTH = HealthRegistry(os.getenv("READY_REQUIRE", "").split(","))
+
+
+def start_probe_server(port: Optional[int] = None):
+    """Serve api.health from this process on ``port`` / ``$HEALTH_PORT`` (no-op if unset).
+
+    ``/ready`` only sees components living in the same process, so each
+    receiver runs its own probe server.
+    """
+    port = port or int(os.getenv("HEALTH_PORT", "0"))
+    if not port:
+        return None
+    from api.health import serve_in_background  # fastapi/uvicorn only when asked
+
+    return serve_in_background(port)
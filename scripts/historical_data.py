@@ -1,8 +1,8 @@
-import yfinance as yf
+from scripts.history_cache import default_cache, period_start
 
-def fetch_historical_data(ticker, period="2d", interval="5m"):
-    data = yf.download(ticker, period=period, interval=interval)
-    return data
+def fetch_historical_data(ticker, period="2d", interval="5m", cache=None):
+    cache = cache or default_cache()
+    return cache.get("yahoo", ticker, interval, period_start(period))
 
 if __name__ == "__main__":
     df = fetch_historical_data("AAPL", period="1d", interval="5m")
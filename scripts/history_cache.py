@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+history_cache.py
+────────────────
+Read-through DuckDB cache for historical bars from Yahoo, IB or any other
+source.
+
+Requests are ``(source, symbol, interval, [start, end))``.  The cache keeps
+the bars themselves plus the time ranges it has already fetched for each
+``(source, symbol, interval)``, so
+
+• a request inside fetched ranges is served locally, even where the
+  source had no bars (weekends, halts);
+• a request that overlaps them only fetches the uncovered pieces;
+• the part of a fetch that touched the live edge (the last bar, which may
+  still be forming) expires after ``live_ttl_s`` and is fetched again;
+• ``offline=True`` (or ``$HISTORY_OFFLINE=1``) never calls a fetcher and
+  returns whatever is cached.
+
+Fetchers are plain callables ``fetch(symbol, interval, start, end) ->
+DataFrame`` with ``Open/High/Low/Close/Volume`` columns and a
+``DatetimeIndex``, registered per source name; tests register a local fake.
+
+``duckdb`` is imported when the first cache is opened, so importing this
+module (e.g. for :func:`period_start`) does not require it.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+DEFAULT_PATH = Path(os.getenv("HISTORY_CACHE", "var/history.duckdb"))
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+Fetcher = Callable[[str, str, datetime, datetime], pd.DataFrame]
+Range = Tuple[int, int]  # [start, end) in unix seconds
+
+_UNIT_S = {"m": 60, "h": 3600, "d": 86_400, "wk": 604_800, "mo": 2_592_000, "y": 31_536_000}
+
+
+def interval_seconds(interval: str) -> int:
+    """``"5m"`` → 300, ``"1d"`` → 86400, ``"1wk"`` → 604800."""
+    num = interval.rstrip("abcdefghijklmnopqrstuvwxyz")
+    unit = interval[len(num):]
+    if unit not in _UNIT_S:
+        raise ValueError(f"unknown interval {interval!r}")
+    return int(num or 1) * _UNIT_S[unit]
+
+
+def period_start(period: str, now: Optional[datetime] = None) -> datetime:
+    """Start of a Yahoo-style ``period`` ending ``now``.
+
+    ``"5d"``, ``"1mo"``, ``"1y"`` … count back from ``now``; ``"ytd"`` is
+    Jan 1 (UTC) of ``now``'s year and ``"max"`` is the epoch.
+    """
+    now = now or datetime.now(timezone.utc)
+    if period == "max":
+        return _utc(0)
+    if period == "ytd":
+        return datetime(now.astimezone(timezone.utc).year, 1, 1, tzinfo=timezone.utc)
+    return datetime.fromtimestamp(now.timestamp() - interval_seconds(period), tz=timezone.utc)
+
+
+def _duckdb():
+    try:
+        import duckdb
+    except ImportError as e:  # pragma: no cover - depends on the environment
+        raise ImportError("HistoryCache needs duckdb: pip install duckdb") from e
+    return duckdb
+
+
+def _to_s(t: Union[datetime, pd.Timestamp, str, int, float]) -> int:
+    if isinstance(t, (int, float)):
+        return int(t)
+    ts = pd.Timestamp(t)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return int(ts.timestamp())
+
+
+def _utc(s: int) -> datetime:
+    return datetime.fromtimestamp(s, tz=timezone.utc)
+
+
+def _merge(ranges: List[Range]) -> List[Range]:
+    out: List[Range] = []
+    for a, b in sorted(ranges):
+        if out and a <= out[-1][1]:
+            if b > out[-1][1]:
+                out[-1] = (out[-1][0], b)
+        else:
+            out.append((a, b))
+    return out
+
+
+def _gaps(start: int, end: int, covered: List[Range]) -> List[Range]:
+    """Pieces of ``[start, end)`` not inside the (merged) ``covered`` ranges."""
+    gaps: List[Range] = []
+    cur = start
+    for a, b in covered:
+        if b <= cur:
+            continue
+        if a >= end:
+            break
+        if a > cur:
+            gaps.append((cur, a))
+        cur = max(cur, b)
+    if cur < end:
+        gaps.append((cur, end))
+    return gaps
+
+
+class HistoryCache:
+    """
+    Example
+    -------
+    cache = HistoryCache("var/history.duckdb")
+    cache.register("yahoo", yahoo_fetcher)
+    df = cache.get("yahoo", "AAPL", "1h", "2024-01-01", "2024-02-01")
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = DEFAULT_PATH,
+        *,
+        live_ttl_s: float = 60.0,
+        offline: Optional[bool] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = Path(path)
+        self.live_ttl_s = live_ttl_s
+        self.offline = os.getenv("HISTORY_OFFLINE", "0") == "1" if offline is None else offline
+        self.clock = clock
+        self.fetches = 0  # remote calls made, for logs and tests
+        self._fetchers: Dict[str, Fetcher] = {}
+        self._lock = threading.Lock()
+        if str(self.path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = _duckdb().connect(str(self.path))
+        self._ensure_schema()
+
+    # public API ──────────────────────────────────────────────────────
+    def register(self, source: str, fetcher: Fetcher) -> None:
+        self._fetchers[source] = fetcher
+
+    def get(self, source: str, symbol: str, interval: str, start, end=None) -> pd.DataFrame:
+        """Bars with ``start <= ts < end`` (``end`` defaults to now), fetching only gaps."""
+        now = self.clock()
+        lo, hi = _to_s(start), _to_s(end) if end is not None else int(now)
+        key = (source, symbol, interval)
+        if not self.offline and lo < hi:
+            for a, b in _gaps(lo, hi, self._covered(key, now)):
+                self._fill(key, a, b, now)
+        return self._read(key, lo, hi)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # internals ───────────────────────────────────────────────────────
+    def _covered(self, key, now: float) -> List[Range]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT start_s, end_s, expires_at FROM fetched WHERE source = ? AND symbol = ? "
+                "AND interval = ? AND (expires_at IS NULL OR expires_at > ?)",
+                [*key, now],
+            ).fetchall()
+        # A fresh live-edge fetch stands for "up to now" until it expires
+        return _merge([(s, e if exp is None else max(e, int(now))) for s, e, exp in rows])
+
+    def _fill(self, key, a: int, b: int, now: float) -> None:
+        source, symbol, interval = key
+        fetcher = self._fetchers.get(source)
+        if fetcher is None:
+            raise KeyError(f"no fetcher registered for source {source!r}")
+        df = fetcher(symbol, interval, _utc(a), _utc(b))
+        self.fetches += 1
+
+        # Bars that may still be forming are only trusted for live_ttl_s
+        edge = min(b, int(now) - interval_seconds(interval))
+        ranges = []
+        if a < edge:
+            ranges.append((a, edge, None))
+        if max(a, edge) < b:
+            ranges.append((max(a, edge), b, now + self.live_ttl_s))
+
+        rows = self._frame_rows(df, key)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if not rows.empty:
+                    self._conn.register("incoming", rows)
+                    self._conn.execute("INSERT OR REPLACE INTO bars SELECT * FROM incoming")
+                    self._conn.unregister("incoming")
+                self._conn.execute(
+                    "DELETE FROM fetched WHERE source = ? AND symbol = ? AND interval = ? "
+                    "AND expires_at IS NOT NULL AND expires_at <= ?",
+                    [*key, now],
+                )
+                for s, e, exp in ranges:
+                    self._conn.execute("INSERT INTO fetched VALUES (?, ?, ?, ?, ?, ?)", [*key, s, e, exp])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _frame_rows(df: Optional[pd.DataFrame], key) -> pd.DataFrame:
+        if df is None or df.empty:
+            return pd.DataFrame()
+        idx = pd.DatetimeIndex(df.index)
+        idx = idx.tz_localize("UTC") if idx.tz is None else idx.tz_convert("UTC")
+        cols = {c.lower(): df[c].to_numpy(dtype=float) for c in COLUMNS}
+        return pd.DataFrame(
+            {
+                "source": key[0],
+                "symbol": key[1],
+                "interval": key[2],
+                "ts": idx.asi8 // 1_000_000_000,
+                **cols,
+            }
+        )
+
+    def _read(self, key, lo: int, hi: int) -> pd.DataFrame:
+        with self._lock:
+            df = self._conn.execute(
+                "SELECT ts, open, high, low, close, volume FROM bars "
+                "WHERE source = ? AND symbol = ? AND interval = ? AND ts >= ? AND ts < ? ORDER BY ts",
+                [*key, lo, hi],
+            ).fetchdf()
+        df.index = pd.DatetimeIndex(pd.to_datetime(df.pop("ts"), unit="s", utc=True), name="Date")
+        df.columns = COLUMNS
+        return df
+
+    def _ensure_schema(self) -> None:
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS bars (
+                source   TEXT   NOT NULL,
+                symbol   TEXT   NOT NULL,
+                interval TEXT   NOT NULL,
+                ts       BIGINT NOT NULL,
+                open     DOUBLE,
+                high     DOUBLE,
+                low      DOUBLE,
+                close    DOUBLE,
+                volume   DOUBLE,
+                PRIMARY KEY (source, symbol, interval, ts)
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS fetched (
+                source     TEXT   NOT NULL,
+                symbol     TEXT   NOT NULL,
+                interval   TEXT   NOT NULL,
+                start_s    BIGINT NOT NULL,
+                end_s      BIGINT NOT NULL,
+                expires_at DOUBLE            -- NULL = final bars, never refetched
+            )
+            """
+        )
+
+
+# ── Fetchers ────────────────────────────────────────────────────────
+
+
+def yahoo_fetcher(symbol: str, interval: str, start: datetime, end: datetime) -> pd.DataFrame:
+    import yfinance as yf
+
+    return yf.Ticker(symbol).history(start=start, end=end, interval=interval)[COLUMNS]
+
+
+def ib_fetcher(ib, contract_for: Callable[[str], object], what: str = "TRADES") -> Fetcher:
+    """Fetcher over an ``ib_insync.IB`` session; ``contract_for(symbol)`` builds contracts."""
+    bar_sizes = {"1m": "1 min", "5m": "5 mins", "15m": "15 mins", "30m": "30 mins", "1h": "1 hour", "1d": "1 day"}
+
+    def fetch(symbol: str, interval: str, start: datetime, end: datetime) -> pd.DataFrame:
+        from ib_insync import util
+
+        span_s = int((end - start).total_seconds())
+        duration = f"{max(1, -(-span_s // 86_400))} D" if span_s > 86_400 else f"{max(30, span_s)} S"
+        bars = ib.reqHistoricalData(
+            contract_for(symbol),
+            endDateTime=end,
+            durationStr=duration,
+            barSizeSetting=bar_sizes[interval],
+            whatToShow=what,
+            useRTH=False,
+            formatDate=2,
+        )
+        df = util.df(bars)
+        if df is None or df.empty:
+            return pd.DataFrame(columns=COLUMNS)
+        df = df.set_index(pd.DatetimeIndex(pd.to_datetime(df["date"], utc=True)))
+        df = df.rename(columns=str.capitalize)[COLUMNS]
+        return df[(df.index >= start) & (df.index < end)]
+
+    return fetch
+
+
+_DEFAULT: Optional[HistoryCache] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_cache() -> HistoryCache:
+    """Process-wide cache at ``$HISTORY_CACHE`` with the Yahoo fetcher registered."""
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = HistoryCache(DEFAULT_PATH)
+            _DEFAULT.register("yahoo", yahoo_fetcher)
+        return _DEFAULT
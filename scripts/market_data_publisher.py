@@ -5,6 +5,18 @@ Connects to Interactive Brokers via `ib_insync`, converts tick
 updates into `MarketTick` protobuf messages and publishes them on a
 ZeroMQ ``PUB`` socket. Prometheus metrics ``ticks_total`` and
 ``tick_latency_ms`` track volume and publishing latency.
+
+Start-up qualifies every contract in bulk batches paced to IB's message
+limit, and qualified contracts are cached on disk (see
+:mod:`scripts.contract_cache`) so warm restarts skip qualification.
+
+``--journal-dir`` tees every published tick into a per-day columnar
+journal (:mod:`scripts.tick_journal`) for research and replay.
+
+``--chains`` expands underlying/expiry/strike-band specs into option
+subscriptions managed by :class:`OptionChainManager`, which keeps the total
+number of market-data lines under ``--max-lines`` and rotates strikes
+incrementally as the underlying moves.
 """
 
 from __future__ import annotations
@@ -15,20 +27,35 @@ import os
 import re
 import signal
 import time
-from typing import Iterable, List, Tuple
+import weakref
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import zmq
 from ib_insync import IB, Stock, Option
-from prometheus_client import Counter, Histogram, start_http_server
-
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+from scripts.contract_cache import (
+    DEFAULT_PATH as CONTRACT_CACHE_PATH,
+    ContractCache,
+    apply_fields,
+    option_key,
+    stock_key,
+)
+from scripts.tick_journal import TickJournal
 from shared_proto.market_data_pb2 import MarketTick
-from utils.utils import setup_logger
+from utils.utils import SampledLogger, setup_logger
 
 # ── Prometheus metrics ──────────────────────────────────────────────
 ticks_total = Counter("ticks_total", "Total market data ticks published")
 tick_latency_ms = Histogram(
     "tick_latency_ms", "Latency between tick receipt and publish (ms)"
 )
+mkt_data_lines = Gauge("mkt_data_lines", "Market-data lines currently subscribed")
+chain_rotations_total = Counter(
+    "chain_rotations_total", "Option-chain rebalances triggered by the underlying"
+)
 
 
 # ── Signal handling ─────────────────────────────────────────────────
@@ -59,9 +86,39 @@ def _parse_args() -> argparse.Namespace:
             "SYMBOL:YYYYMMDD:RIGHT:STRIKE"
         ),
     )
+    p.add_argument(
+        "--chains",
+        default="",
+        help=(
+            "comma-separated option-chain specs SYMBOL:YYYYMMDD[:BAND], "
+            "subscribing calls and puts ATM±BAND strikes (default band 10)"
+        ),
+    )
+    p.add_argument(
+        "--max-lines",
+        type=int,
+        default=int(os.getenv("IB_MAX_MKT_LINES", "100")),
+        help="market-data line budget across all subscriptions (default 100)",
+    )
     p.add_argument("--opt-exchange", default="SMART", help="Option exchange (default SMART)")
     p.add_argument("--opt-currency", default="USD", help="Option currency (default USD)")
     p.add_argument("--zmq-addr", default="tcp://*:6001", help="ZeroMQ PUB bind address")
+    p.add_argument(
+        "--contract-cache",
+        default=str(CONTRACT_CACHE_PATH),
+        help="qualified-contract cache file ('' disables the cache)",
+    )
+    p.add_argument(
+        "--ib-msg-rate",
+        type=int,
+        default=int(os.getenv("IB_MSGS_PER_SEC", "45")),
+        help="max IB API requests per second during start-up (IB limit is 50)",
+    )
+    p.add_argument(
+        "--journal-dir",
+        default=os.getenv("TICK_JOURNAL_DIR", ""),
+        help="record every published tick to daily journals here ('' disables)",
+    )
     p.add_argument("--log-level", default="INFO", help="logging level (default INFO)")
     return p.parse_args()
 
@@ -69,22 +126,80 @@ def _parse_args() -> argparse.Namespace:
 # ── Tick handler ────────────────────────────────────────────────────
 
 
-def _handle_tick(sock: zmq.Socket, ticker) -> None:
-    start = time.perf_counter()
-    msg = MarketTick(
-        symbol=(getattr(ticker.contract, "localSymbol", None) or ticker.contract.symbol),
-        ts_unix_ns=time.time_ns(),
-        bid_price=float(ticker.bid or 0.0),
-        ask_price=float(ticker.ask or 0.0),
-        last_price=float(getattr(ticker, "last", 0.0) or 0.0),
-        bid_size=int(ticker.bidSize or 0),
-        ask_size=int(ticker.askSize or 0),
-        last_size=int(ticker.lastSize or 0),
-        venue=getattr(ticker, "marketCenter", "SMART") or "SMART",
-    )
-    sock.send_multipart([b"market_ticks", msg.SerializeToString()])
-    ticks_total.inc()
-    tick_latency_ms.observe((time.perf_counter() - start) * 1000)
+TOPIC = b"market_ticks"
+
+# Observe publish latency for 1 tick in N; counters are flushed in batches
+# of N as well so the per-tick cost is a handful of attribute stores.  The
+# main loop credits the remainder every TICK_METRICS_FLUSH_S seconds so
+# quiet symbols are not under-reported.
+TICK_METRICS_EVERY = max(1, int(os.getenv("TICK_METRICS_EVERY", "64")))
+TICK_METRICS_FLUSH_S = float(os.getenv("TICK_METRICS_FLUSH_S", "1"))
+
+
+class _TickHandler:
+    """
+    Per-contract ``updateEvent`` callback.
+
+    The symbol is resolved once at subscribe time and one ``MarketTick`` is
+    allocated per contract and reused for every update, so the hot path is
+    field assignment, ``SerializeToString`` and ``send_multipart``.  The
+    venue is the ticker's ``lastExchange``, falling back to ``venue``.
+    """
+
+    __slots__ = ("sock", "msg", "journal", "venue", "_n", "__weakref__")
+
+    def __init__(
+        self,
+        sock: zmq.Socket,
+        contract,
+        venue: str = "SMART",
+        journal: Optional[TickJournal] = None,
+    ) -> None:
+        self.sock = sock
+        self.journal = journal
+        self.venue = venue
+        self.msg = MarketTick(
+            symbol=getattr(contract, "localSymbol", None) or contract.symbol,
+            venue=venue,
+        )
+        self._n = 0
+        _HANDLERS.add(self)
+
+    def __call__(self, ticker) -> None:
+        self._n += 1
+        sampled = self._n % TICK_METRICS_EVERY == 0
+        if sampled:
+            start = time.perf_counter()
+        msg = self.msg
+        msg.ts_unix_ns = ts = time.time_ns()
+        msg.bid_price = bid = ticker.bid or 0.0
+        msg.ask_price = ask = ticker.ask or 0.0
+        msg.last_price = last = ticker.last or 0.0
+        msg.bid_size = bid_size = int(ticker.bidSize or 0)
+        msg.ask_size = ask_size = int(ticker.askSize or 0)
+        msg.last_size = last_size = int(ticker.lastSize or 0)
+        venue = getattr(ticker, "lastExchange", None) or self.venue
+        if venue != msg.venue:
+            msg.venue = venue
+        self.sock.send_multipart((TOPIC, msg.SerializeToString()))
+        if self.journal is not None:
+            self.journal.append(ts, msg.symbol, bid, ask, last, bid_size, ask_size, last_size, msg.venue)
+        if sampled:
+            ticks_total.inc(TICK_METRICS_EVERY)
+            tick_latency_ms.observe((time.perf_counter() - start) * 1000)
+
+    def flush(self) -> None:
+        """Credit ticks published since the last batched counter update."""
+        ticks_total.inc(self._n % TICK_METRICS_EVERY)
+        self._n -= self._n % TICK_METRICS_EVERY
+
+
+_HANDLERS: "weakref.WeakSet[_TickHandler]" = weakref.WeakSet()
+
+
+def _flush_tick_metrics() -> None:
+    for handler in list(_HANDLERS):
+        handler.flush()
 
 
 def _parse_occ_token(tok: str) -> Tuple[str, str, str, float]:
@@ -114,6 +229,383 @@ def _parse_occ_token(tok: str) -> Tuple[str, str, str, float]:
     return sym.upper(), yyyymmdd, right.upper(), float(strike)
 
 
+# ── Start-up: qualification & subscription ─────────────────────────
+
+
+class _Pacer:
+    """Keep outbound IB requests under ``per_sec`` messages per second."""
+
+    def __init__(self, ib, per_sec: int) -> None:
+        self._ib = ib
+        self.per_sec = max(1, per_sec)
+        self._window = time.monotonic()
+        self._sent = 0
+
+    def take(self, n: int = 1) -> None:
+        """Account for ``n`` requests, sleeping first if the window is full."""
+        if self._sent + n > self.per_sec:
+            delay = 1.0 - (time.monotonic() - self._window)
+            if delay > 0:
+                self._ib.sleep(delay)  # keeps the ib_insync loop serviced
+            self._window = time.monotonic()
+            self._sent = 0
+        self._sent += n
+
+
+# IB error codes meaning a cached contract definition is no longer valid
+# (200 = "No security definition has been found for the request").
+STALE_CONTRACT_CODES = {200}
+
+
+class _StaleWatch:
+    """
+    Track contracts built from the cache so that, if IB rejects one of them
+    (e.g. its conId changed after a corporate action), the main loop can drop
+    the cache row and qualify the contract again.
+    """
+
+    def __init__(self) -> None:
+        self.watch: Dict[int, Tuple[str, Any]] = {}
+        self.stale: List[Tuple[str, Any]] = []
+
+    def add(self, key: str, contract: Any) -> None:
+        self.watch[contract.conId] = (key, contract)
+
+    def on_error(self, _req_id: int, code: int, _msg: str, contract: Any = None) -> None:
+        if code not in STALE_CONTRACT_CODES or contract is None:
+            return
+        entry = self.watch.pop(getattr(contract, "conId", 0), None)
+        if entry is not None:
+            self.stale.append(entry)
+
+
+def _qualify(
+    ib,
+    pending: List[Tuple[str, Any]],
+    cache: Optional[ContractCache],
+    pacer: _Pacer,
+    logger: "logging.Logger | SampledLogger",
+    watch: Optional[_StaleWatch] = None,
+) -> List[Any]:
+    """
+    Return qualified contracts for ``pending`` ``(cache_key, contract)`` pairs.
+
+    Cache hits are filled in locally (and registered with ``watch``); misses
+    are sent to IB in bulk ``qualifyContracts(*batch)`` calls (one concurrent
+    request per contract) of at most ``pacer.per_sec`` contracts each.
+    Contracts IB cannot resolve are logged and dropped.
+    """
+    ready: List[Any] = []
+    cold: List[Tuple[str, Any]] = []
+    for key, contract in pending:
+        fields = cache.get(key) if cache is not None else None
+        if fields:
+            ready.append(apply_fields(contract, fields))
+            if watch is not None:
+                watch.add(key, contract)
+        else:
+            cold.append((key, contract))
+
+    for i in range(0, len(cold), pacer.per_sec):
+        batch = cold[i : i + pacer.per_sec]
+        pacer.take(len(batch))
+        qualified = {id(c) for c in (ib.qualifyContracts(*(c for _, c in batch)) or [])}
+        for key, contract in batch:
+            if id(contract) not in qualified:
+                logger.error("Could not qualify %s; skipping", key)
+                continue
+            if cache is not None:
+                cache.put(key, contract)
+            ready.append(contract)
+
+    if cache is not None:
+        cache.save()
+        logger.info(
+            "Contract cache: %d hit(s), %d qualified via IB",
+            len(pending) - len(cold),
+            len(cold),
+        )
+    return ready
+
+
+# Set by main() when --journal-dir is given; picked up by every subscription.
+_JOURNAL: Optional[TickJournal] = None
+
+
+# id(contract) → (ticker, handler).  ib_insync keys tickers by the contract
+# object and hands the same Ticker back on a repeat reqMktData, so the old
+# handler has to come off before subscribing that contract again.
+_SUBSCRIPTIONS: Dict[int, Tuple[Any, _TickHandler]] = {}
+
+
+def _subscribe(ib, sock: zmq.Socket, contracts: List[Any], pacer: _Pacer) -> List[Any]:
+    """Request streaming market data for ``contracts`` at a paced rate."""
+    tickers = []
+    for contract in contracts:
+        _detach(contract)
+        pacer.take()
+        t = ib.reqMktData(contract, "", False, False)
+        handler = _TickHandler(sock, contract, "SMART", _JOURNAL)
+        t.updateEvent += handler
+        _SUBSCRIPTIONS[id(contract)] = (t, handler)
+        tickers.append(t)
+    return tickers
+
+
+def _detach(contract) -> None:
+    sub = _SUBSCRIPTIONS.pop(id(contract), None)
+    if sub is not None:
+        ticker, handler = sub
+        ticker.updateEvent -= handler
+        handler.flush()
+
+
+def _unsubscribe(ib, contract) -> None:
+    """Cancel market data for ``contract`` and detach its tick handler."""
+    _detach(contract)
+    ib.cancelMktData(contract)
+
+
+def _requalify_stale(
+    ib,
+    sock: zmq.Socket,
+    watch: _StaleWatch,
+    cache: Optional[ContractCache],
+    pacer: _Pacer,
+    logger: "logging.Logger | SampledLogger",
+) -> Tuple[List[Any], List[Any]]:
+    """
+    Drop stale cache rows reported by ``watch`` and re-qualify them via IB.
+
+    Returns ``(cancelled_contracts, new_tickers)``.
+    """
+    stale, watch.stale = watch.stale, []
+    for key, contract in stale:
+        logger.warning("Cached contract %s rejected by IB; re-qualifying", key)
+        if cache is not None:
+            cache.discard(key)
+        _unsubscribe(ib, contract)
+        contract.conId = 0
+    contracts = _qualify(ib, stale, cache, pacer, logger)
+    return [c for _, c in stale], _subscribe(ib, sock, contracts, pacer)
+
+
+def _describe(c) -> str:
+    if getattr(c, "localSymbol", ""):
+        return c.localSymbol
+    if getattr(c, "right", ""):
+        return f"{c.symbol} {c.lastTradeDateOrContractMonth}{c.right}{c.strike}"
+    return c.symbol
+
+
+# ── Option chains ───────────────────────────────────────────────────
+
+
+@dataclass(frozen=True)
+class ChainSpec:
+    symbol: str
+    expiry: str  # YYYYMMDD
+    band: int = 10  # strikes either side of ATM
+    rights: str = "CP"
+
+
+def _parse_chain_spec(tok: str) -> ChainSpec:
+    """Parse ``SYMBOL:YYYYMMDD[:BAND]`` into a :class:`ChainSpec`."""
+    parts = [p.strip() for p in tok.strip().split(":")]
+    if len(parts) not in (2, 3) or not parts[0] or not re.fullmatch(r"[0-9]{8}", parts[1]):
+        raise ValueError(f"invalid chain spec: {tok}")
+    band = int(parts[2]) if len(parts) == 3 else 10
+    if band < 0:
+        raise ValueError(f"negative strike band: {tok}")
+    return ChainSpec(parts[0].upper(), parts[1], band)
+
+
+def _ref_price(ticker) -> float:
+    """Mid if both sides are quoted, else last, else close (0.0 if none)."""
+    bid, ask = ticker.bid, ticker.ask
+    if bid and ask and bid > 0 and ask > 0:
+        return (bid + ask) / 2
+    for px in (getattr(ticker, "last", None), getattr(ticker, "close", None)):
+        if px and px > 0:
+            return float(px)
+    return 0.0
+
+
+def _atm_index(strikes: Sequence[float], price: float) -> int:
+    """Index of the listed strike closest to ``price``."""
+    i = bisect_left(strikes, price)
+    if i == len(strikes) or (i > 0 and price - strikes[i - 1] <= strikes[i] - price):
+        i -= 1
+    return max(i, 0)
+
+
+def _plan_lines(
+    chains: Sequence[Tuple[ChainSpec, Sequence[float], int]], budget: int
+) -> List[Tuple[ChainSpec, float, str]]:
+    """
+    Pick at most ``budget`` ``(spec, strike, right)`` lines.
+
+    Each chain contributes ATM±band strikes; lines are ranked by distance
+    from ATM (in strikes) so that, when the budget is tight, every chain
+    keeps its nearest strikes and the wings are dropped first.
+    """
+    ranked = []
+    for order, (spec, strikes, atm) in enumerate(chains):
+        lo, hi = max(atm - spec.band, 0), min(atm + spec.band, len(strikes) - 1)
+        for i in range(lo, hi + 1):
+            for right in spec.rights:
+                ranked.append((abs(i - atm), order, right, spec, strikes[i]))
+    ranked.sort(key=lambda r: r[:3])
+    return [(spec, strike, right) for _, _, right, spec, strike in ranked[: max(budget, 0)]]
+
+
+class OptionChainManager:
+    """
+    Keep option subscriptions centred on each underlying within a line budget.
+
+    ``start()`` subscribes the underlyings (unless already streaming) and
+    loads listed strikes via ``reqSecDefOptParams``.  ``poll()`` is cheap
+    and called from the main loop; only when an underlying's ATM strike
+    moves does it diff the wanted lines against the live ones, cancelling
+    the strikes that fell out and subscribing the new ones.
+    """
+
+    def __init__(
+        self,
+        ib,
+        sock: zmq.Socket,
+        specs: Sequence[ChainSpec],
+        *,
+        budget: int,
+        cache: Optional[ContractCache],
+        pacer: _Pacer,
+        logger: logging.Logger,
+        exchange: str = "SMART",
+        currency: str = "USD",
+        watch: Optional[_StaleWatch] = None,
+    ) -> None:
+        self.ib = ib
+        self.sock = sock
+        self.specs = list(specs)
+        self.budget = budget
+        self.cache = cache
+        self.pacer = pacer
+        self.logger = logger
+        self.exchange = exchange
+        self.currency = currency
+        self.watch = watch
+        self.active: Dict[str, Any] = {}  # option_key → ticker
+        self._underlyings: Dict[str, Any] = {}  # symbol → ticker
+        self._owned: List[Any] = []  # underlying tickers we subscribed
+        self._strikes: Dict[ChainSpec, List[float]] = {}
+        self._atm: Dict[ChainSpec, int] = {}
+
+    @property
+    def lines(self) -> int:
+        return len(self.active) + len(self._owned)
+
+    def start(self, streaming: Dict[str, Any]) -> None:
+        """Subscribe underlyings (reusing ``streaming`` tickers) and load strikes."""
+        need = []
+        for sym in {s.symbol for s in self.specs}:
+            if sym in streaming:
+                self._underlyings[sym] = streaming[sym]
+            else:
+                need.append((stock_key(sym), Stock(sym, "SMART", "USD")))
+        for t in _subscribe(self.ib, self.sock, _qualify(self.ib, need, self.cache, self.pacer, self.logger, self.watch), self.pacer):
+            self._underlyings[t.contract.symbol] = t
+            self._owned.append(t)
+        self.budget -= len(self._owned)
+
+        for spec in self.specs:
+            und = self._underlyings.get(spec.symbol)
+            if und is None:
+                self.logger.error("Chain %s: underlying not available; skipping", spec.symbol)
+                continue
+            self.pacer.take()
+            params = self.ib.reqSecDefOptParams(spec.symbol, "", "STK", und.contract.conId)
+            chain = next(
+                (c for c in params if c.exchange == self.exchange and c.tradingClass == spec.symbol),
+                next((c for c in params if c.exchange == self.exchange), params[0] if params else None),
+            )
+            if chain is None or spec.expiry not in chain.expirations:
+                self.logger.error("Chain %s: expiry %s not listed; skipping", spec.symbol, spec.expiry)
+                continue
+            self._strikes[spec] = sorted(float(k) for k in chain.strikes)
+
+    def poll(self) -> bool:
+        """Rebalance if any ATM strike moved; return True when it did."""
+        moved = False
+        for spec, strikes in self._strikes.items():
+            px = _ref_price(self._underlyings[spec.symbol])
+            if px <= 0:
+                continue
+            atm = _atm_index(strikes, px)
+            if self._atm.get(spec) != atm:
+                self._atm[spec] = atm
+                moved = True
+        if moved:
+            chain_rotations_total.inc()
+            self.rebalance()
+        return moved
+
+    def rebalance(self) -> None:
+        """Diff wanted vs. live lines and apply the incremental change."""
+        chains = [(spec, self._strikes[spec], atm) for spec, atm in self._atm.items()]
+        wanted = {
+            option_key(spec.symbol, spec.expiry, right, strike, self.exchange, self.currency): (spec, strike, right)
+            for spec, strike, right in _plan_lines(chains, self.budget)
+        }
+
+        for key in [k for k in self.active if k not in wanted]:
+            _unsubscribe(self.ib, self.active.pop(key).contract)
+
+        pending = [
+            (
+                key,
+                Option(
+                    spec.symbol,
+                    lastTradeDateOrContractMonth=spec.expiry,
+                    strike=strike,
+                    right=right,
+                    exchange=self.exchange,
+                    currency=self.currency,
+                ),
+            )
+            for key, (spec, strike, right) in wanted.items()
+            if key not in self.active
+        ]
+        keys = {id(c): k for k, c in pending}
+        contracts = _qualify(self.ib, pending, self.cache, self.pacer, self.logger, self.watch)
+        for t in _subscribe(self.ib, self.sock, contracts, self.pacer):
+            self.active[keys[id(t.contract)]] = t
+        self.logger.info("Option chains: %d line(s) live, %d added", len(self.active), len(contracts))
+
+    def adopt(self, dropped: Sequence[Any], fresh: Sequence[Any]) -> List[Any]:
+        """
+        Re-home tickers re-subscribed after a stale-cache re-qualify.
+
+        Chain lines in ``dropped`` take over their ``fresh`` ticker (or are
+        forgotten if re-qualification failed); the non-chain tickers are
+        returned to the caller.
+        """
+        gone = {id(c) for c in dropped}
+        renewed = {id(t.contract): t for t in fresh}
+        for key in [k for k, t in self.active.items() if id(t.contract) in gone]:
+            t = renewed.pop(id(self.active[key].contract), None)
+            if t is None:
+                del self.active[key]
+            else:
+                self.active[key] = t
+        return list(renewed.values())
+
+    def stop(self) -> None:
+        for t in list(self.active.values()) + self._owned:
+            _unsubscribe(self.ib, t.contract)
+        self.active.clear()
+        self._owned.clear()
+
+
 # ── Main entry ──────────────────────────────────────────────────────
 
 
@@ -136,23 +628,24 @@ def main() -> None:
     ib.connect(ib_host, ib_port, clientId=client_id)
     logger.info("Connected to IB %s:%s (clientId=%s)", ib_host, ib_port, client_id)
 
+    cache = ContractCache(args.contract_cache) if args.contract_cache else None
+    pacer = _Pacer(ib, args.ib_msg_rate)
+
+    global _JOURNAL
+    if args.journal_dir:
+        _JOURNAL = TickJournal(args.journal_dir)
+        logger.info("Recording ticks to %s", args.journal_dir)
+
     # Stocks
     symbols: Iterable[str] = [
         s.strip().upper() for s in (args.symbols or "").split(",") if s.strip()
     ]
-    tickers = []
-    for sym in symbols:
-        contract = Stock(sym, "SMART", "USD")
-        ib.qualifyContracts(contract)
-        ticker = ib.reqMktData(contract, "", False, False)
-        ticker.updateEvent += lambda t, _sock=sock: _handle_tick(_sock, t)
-        tickers.append(ticker)
-    if symbols:
-        logger.info("Subscribed to stocks: %s", ", ".join(symbols))
+    pending: List[Tuple[str, Any]] = [
+        (stock_key(sym), Stock(sym, "SMART", "USD")) for sym in symbols
+    ]
 
     # Equity Options
     option_tokens: List[str] = [s for s in (args.options or "").split(",") if s.strip()]
-    opt_contracts = []
     for tok in option_tokens:
         try:
             sym, yyyymmdd, right, strike = _parse_occ_token(tok)
@@ -167,26 +660,87 @@ def main() -> None:
             exchange=args.opt_exchange,
             currency=args.opt_currency,
         )
-        ib.qualifyContracts(opt)
-        t = ib.reqMktData(opt, "", False, False)
-        t.updateEvent += lambda _t, _sock=sock: _handle_tick(_sock, _t)
-        tickers.append(t)
-        opt_contracts.append(opt)
-    if option_tokens:
-        logger.info(
-            "Subscribed to options: %s",
-            ", ".join([getattr(c, "localSymbol", f"{c.symbol} {c.lastTradeDateOrContractMonth}{c.right}{c.strike}") for c in opt_contracts]),
+        key = option_key(sym, yyyymmdd, right, strike, args.opt_exchange, args.opt_currency)
+        pending.append((key, opt))
+
+    if len(pending) > args.max_lines:
+        logger.error(
+            "%d static subscriptions exceed --max-lines %d; dropping %d",
+            len(pending),
+            args.max_lines,
+            len(pending) - args.max_lines,
+        )
+        pending = pending[: args.max_lines]
+
+    watch = _StaleWatch()
+    ib.errorEvent += watch.on_error
+
+    t0 = time.perf_counter()
+    contracts = _qualify(ib, pending, cache, pacer, logger, watch)
+    tickers = _subscribe(ib, sock, contracts, pacer)
+    logger.info(
+        "Subscribed to %d/%d contracts in %.2fs: %s",
+        len(tickers),
+        len(pending),
+        time.perf_counter() - t0,
+        ", ".join(_describe(c) for c in contracts),
+    )
+
+    # Option chains (rotated around the underlying within the line budget)
+    specs: List[ChainSpec] = []
+    for tok in (args.chains or "").split(","):
+        if not tok.strip():
+            continue
+        try:
+            specs.append(_parse_chain_spec(tok))
+        except ValueError as e:
+            logger.error("Skipping invalid chain spec %r: %s", tok, e)
+    chains: Optional[OptionChainManager] = None
+    if specs:
+        chains = OptionChainManager(
+            ib,
+            sock,
+            specs,
+            budget=args.max_lines - len(tickers),
+            cache=cache,
+            pacer=pacer,
+            logger=logger,
+            exchange=args.opt_exchange,
+            currency=args.opt_currency,
+            watch=watch,
         )
+        chains.start({t.contract.symbol: t for t in tickers if getattr(t.contract, "secType", "STK") == "STK"})
 
     signal.signal(signal.SIGINT, _request_shutdown)
     signal.signal(signal.SIGTERM, _request_shutdown)
 
+    # Stale-contract storms (e.g. after a roll) log once per second per line
+    hot = SampledLogger(logger, per_second=1)
+    next_flush = time.monotonic() + TICK_METRICS_FLUSH_S
     try:
         while not _SHUTDOWN:
             ib.sleep(0.2)
+            if time.monotonic() >= next_flush:
+                _flush_tick_metrics()
+                next_flush = time.monotonic() + TICK_METRICS_FLUSH_S
+            if chains is not None:
+                chains.poll()
+            if watch.stale:
+                dropped, fresh = _requalify_stale(ib, sock, watch, cache, pacer, hot)
+                if chains is not None:
+                    fresh = chains.adopt(dropped, fresh)
+                gone = {id(c) for c in dropped}
+                tickers = [t for t in tickers if id(t.contract) not in gone] + fresh
+            mkt_data_lines.set(len(tickers) + (chains.lines if chains is not None else 0))
     finally:
+        if chains is not None:
+            chains.stop()
         for t in tickers:
-            ib.cancelMktData(t.contract)
+            _unsubscribe(ib, t.contract)
+        _flush_tick_metrics()
+        if _JOURNAL is not None:
+            _JOURNAL.close()
+            _JOURNAL = None
         ib.disconnect()
         sock.close()
         ctx.term()
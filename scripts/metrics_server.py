@@ -2,10 +2,31 @@
 """
 Prometheus metrics registry for the Cancel/Replace stack.
 Import the symbols you need and call `start()` once at process-boot.
+
+Per-message paths should go through the ``*_hot`` facades
+(:class:`FastCounter` / :class:`FastHistogram`) instead of calling
+``.labels(...)`` on the raw metric each time: they accumulate into plain
+thread-local dicts and a background thread folds the deltas into the real
+(label-cached) children every ``METRICS_FLUSH_S`` seconds (default 1), using
+only prometheus_client's public ``inc()`` / ``observe()``.
+``flush()`` forces it, e.g. in tests or before exit.
+
+    orders_by_symbol_hot.inc(sym)
+    order_latency_hot.observe(dt, sym)
 """
 
+import atexit
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
 from prometheus_client import Counter, Gauge, Histogram, start_http_server
 
+FLUSH_INTERVAL_S = float(os.getenv("METRICS_FLUSH_S", "1"))
+
 # ── Core counters ───────────────────────────────────────────────────────────
 RECEIVER_MSGS = Counter("receiver_msgs_total", "Total protobuf messages received")
 RECEIVER_ERRORS = Counter("receiver_errors_total", "Total errors seen in receiver loop")
@@ -36,6 +57,160 @@ orders_canceled = Counter("receiver_orders_canceled_total", "Total canceled orde
 orders_rejected = Counter("receiver_orders_rejected_total", "Total rejected orders")
 throttle_blocked_total = Counter("throttle_blocked_total", "Orders blocked by throttle")
 
+# Flatten (close_all_positions)
+flatten_time_to_flat = Histogram(
+    "flatten_time_to_flat_seconds",
+    "Flatten start to last liquidation fill",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60),
+)
+flatten_incomplete_total = Counter(
+    "flatten_incomplete_total", "Flattens that missed their deadline or had rejects"
+)
+
+
+# ── Hot-path facades ────────────────────────────────────────────────────────
+class _Shard:
+    """One thread's cumulative values; only the owner thread writes ``rows``."""
+
+    __slots__ = ("thread", "rows", "flushed")
+
+    def __init__(self) -> None:
+        self.thread = threading.current_thread()
+        self.rows: dict = {}  # label values → cumulative count / pending values
+        self.flushed: dict = {}  # label values → what has been pushed already
+
+
+class _Fast:
+    def __init__(self, metric) -> None:
+        self.metric = metric
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._flush_lock = threading.Lock()
+        _FACADES.add(self)
+
+    def child(self, labels: Tuple[str, ...]):
+        """Cached label child (the metric itself when it has no labels)."""
+        child = self._children.get(labels)
+        if child is None:
+            child = self._children[labels] = self.metric.labels(*labels) if labels else self.metric
+        return child
+
+    def _shard(self) -> dict:
+        shard = _Shard()
+        self._local.rows = shard.rows
+        self._shards.append(shard)
+        _ensure_flusher()
+        return shard.rows
+
+    def flush(self) -> None:
+        """Push every thread's unflushed delta into the real metric."""
+        with self._flush_lock:
+            for shard in list(self._shards):
+                alive = shard.thread.is_alive()
+                for labels, value in list(shard.rows.items()):
+                    self._push(shard, labels, value)
+                if not alive:  # fully drained, nobody writes it any more
+                    self._shards.remove(shard)
+
+
+class FastCounter(_Fast):
+    """``inc(*label_values, amount=1)`` without locks or label lookups."""
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        try:
+            rows = self._local.rows
+        except AttributeError:
+            rows = self._shard()
+        rows[labels] = rows.get(labels, 0) + amount
+
+    def _push(self, shard: _Shard, labels, total) -> None:
+        delta = total - shard.flushed.get(labels, 0)
+        if delta:
+            shard.flushed[labels] = total
+            self.child(labels).inc(delta)
+
+
+class FastHistogram(_Fast):
+    """``observe(value, *label_values)``, queued locally and replayed on flush.
+
+    The flusher thread pays for the child's lock and bucket search instead
+    of the caller; the queue holds at most one flush interval of values.
+    """
+
+    def observe(self, value: float, *labels: str) -> None:
+        try:
+            rows = self._local.rows
+        except AttributeError:
+            rows = self._shard()
+        row = rows.get(labels)
+        if row is None:
+            row = rows[labels] = deque()
+        row.append(value)
+
+    def time(self, *labels: str) -> "_Timer":
+        """``with hist.time(sym):`` – observe the block's duration in seconds."""
+        return _Timer(self, labels)
+
+    def _push(self, shard: _Shard, labels, row: deque) -> None:
+        n = len(row)  # the owner may keep appending; take only what is there now
+        if not n:
+            return
+        observe = self.child(labels).observe
+        popleft = row.popleft
+        for _ in range(n):
+            observe(popleft())
+
+
+class _Timer:
+    __slots__ = ("hist", "labels", "t0")
+
+    def __init__(self, hist: FastHistogram, labels: Tuple[str, ...]) -> None:
+        self.hist = hist
+        self.labels = labels
+
+    def __enter__(self) -> None:
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc) -> bool:
+        self.hist.observe(time.perf_counter() - self.t0, *self.labels)
+        return False
+
+
+_FACADES: "weakref.WeakSet[_Fast]" = weakref.WeakSet()  # dropped facades are not kept alive
+_flusher_lock = threading.Lock()
+_flusher: Optional[threading.Thread] = None
+
+
+def flush() -> None:
+    """Fold all pending hot-path metric updates into the registry now."""
+    for facade in list(_FACADES):
+        facade.flush()
+
+
+def _flush_loop(interval_s: float) -> None:
+    while True:
+        time.sleep(interval_s)
+        flush()
+
+
+def _ensure_flusher() -> None:
+    global _flusher
+    if _flusher is not None:
+        return
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(
+                target=_flush_loop, args=(FLUSH_INTERVAL_S,), name="metrics-flush", daemon=True
+            )
+            _flusher.start()
+            atexit.register(flush)
+
+
+orders_by_symbol_hot = FastCounter(orders_by_symbol)
+orders_by_type_hot = FastCounter(orders_by_type)
+order_latency_hot = FastHistogram(order_latency)
+
 
 # ── Gauges ───────────────────────────────────────────────────────────────────
 INFLIGHT_CONN = Gauge("inflight_ib_connections", "Open IB Gateway/TWS connections")
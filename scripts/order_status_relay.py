@@ -1,18 +1,64 @@
 #!/usr/bin/env python3
-"""Relay IB order updates over ZeroMQ."""
+"""Relay IB order updates and executions over ZeroMQ.
+
+Every ``orderStatusEvent`` becomes an ``OrderUpdate`` on the
+``order_updates`` topic, except that
+
+• exact repeats (same status, filled, remaining and avgFillPrice) are
+  dropped – IB routinely fires the same status two or three times;
+• partial-fill progress within ``--conflate-ms`` of the last update for the
+  same order is held back and only the latest one is sent when the window
+  closes (leading and trailing edge, so an isolated fill is not delayed);
+• terminal states (Filled, Cancelled, ApiCancelled, Inactive) and status
+  changes are always forwarded immediately.
+
+With ``--mid-cache-size N`` each update also carries ``mid_px``, the
+instrument mid when it was published, for slippage analytics.  Quotes come
+from a bounded LRU of streaming tickers (N contracts, least recently traded
+evicted and unsubscribed), so memory and per-event cost stay flat however
+long the relay runs.  It is off by default: those N market-data lines count
+against the account's IB line limit but not against the publisher's
+``--max-lines`` budget, so lower that budget by N when enabling it.  The
+first update for a contract always carries ``mid_px`` 0 (no quote yet).
+
+Executions
+----------
+Each ``execDetailsEvent`` becomes one ``Execution`` on the ``executions``
+topic, published once its ``commissionReport`` arrives (or after
+``--commission-wait-ms`` without commission).  Exec ids IB re-delivers
+after a reconnect are dropped, so consumers can apply fills to positions
+incrementally instead of diffing cumulative ``OrderUpdate`` quantities.
+
+Recovery
+--------
+Every message carries ``seq`` (1, 2, 3 … per topic and relay process), and
+the last ``--replay-size`` serialized messages of each topic are kept in
+memory.  A consumer that sees a gap sends ``[<topic>, <u64 first><u64 last>]``
+(little-endian, ``last`` 0 = newest) to the ``ROUTER`` at ``--recovery-addr``
+from a ``DEALER`` socket and gets back one ``[<topic>, payload]`` frame pair
+per buffered message in that range, then ``[b"end", <u64 oldest><u64
+newest>]`` describing what the buffer holds.  A bare range frame means
+``order_updates``.  If ``oldest`` is past the gap the consumer has to
+fall back to re-querying IB.  :func:`recover` is the client side.
+"""
 from __future__ import annotations
 
 import argparse
 import logging
+import math
 import os
 import signal
+import struct
 import time
-from typing import Dict
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
 
 import zmq
-from ib_insync import IB, Ticker, Trade
+from ib_insync import IB, Ticker, Trade, util
 from prometheus_client import Counter, start_http_server
 
+from shared_proto.execution_pb2 import Execution
 from shared_proto.order_update_pb2 import OrderUpdate
 from utils.utils import setup_logger
 
@@ -20,6 +66,30 @@ from utils.utils import setup_logger
 order_updates_total = Counter(
     "order_updates_total", "Total order status updates", ["status"]
 )
+order_updates_suppressed_total = Counter(
+    "order_updates_suppressed_total",
+    "Order status updates not forwarded",
+    ["reason"],  # duplicate | conflated
+)
+order_update_replays_total = Counter(
+    "order_update_replays_total", "Messages re-sent to recovering consumers", ["topic"]
+)
+executions_total = Counter(
+    "executions_total", "Executions published", ["commission"]  # reported | missing
+)
+
+TERMINAL_STATUSES = frozenset({"Filled", "Cancelled", "ApiCancelled", "Inactive"})
+# Terminal order ids remembered to drop IB's repeated final statuses.
+MAX_TERMINAL_IDS = 10_000
+# Published exec ids remembered to drop IB's re-delivered execDetails.
+MAX_EXEC_IDS = 10_000
+
+TOPIC = b"order_updates"
+EXEC_TOPIC = b"executions"
+_RANGE = struct.Struct("<QQ")
+_MESSAGES = {TOPIC: OrderUpdate, EXEC_TOPIC: Execution}
+_LIQUIDITY = {1: "ADDED", 2: "REMOVED", 3: "ROUTED"}  # Execution.lastLiquidity
+_UNSET_PNL = 1e300  # IB reports DBL_MAX realizedPNL for opening fills
 
 _SHUTDOWN = False
 
@@ -51,40 +121,383 @@ def _parse_args() -> argparse.Namespace:
         default=int(os.getenv("IB_CLIENT_ID", "60")),
         help="IB client id",
     )
+    p.add_argument(
+        "--conflate-ms",
+        type=float,
+        default=float(os.getenv("ORDER_CONFLATE_MS", "50")),
+        help="partial-fill conflation window per order in ms (0 disables)",
+    )
+    p.add_argument(
+        "--mid-cache-size",
+        type=int,
+        default=int(os.getenv("ORDER_MID_CACHE", "0")),
+        help="contracts with a streaming quote for mid_px stamping (default 0: off)",
+    )
+    p.add_argument(
+        "--recovery-addr",
+        default=os.getenv("ORDER_RECOVERY_ADDR", "tcp://*:6003"),
+        help="ZeroMQ ROUTER bind address for missed-range requests ('' disables)",
+    )
+    p.add_argument(
+        "--replay-size",
+        type=int,
+        default=int(os.getenv("ORDER_REPLAY_SIZE", "100000")),
+        help="messages per topic kept in memory for recovery",
+    )
+    p.add_argument(
+        "--commission-wait-ms",
+        type=float,
+        default=float(os.getenv("ORDER_COMMISSION_WAIT_MS", "500")),
+        help="how long an execution waits for its commissionReport",
+    )
     p.add_argument("--log-level", default="INFO", help="Logging level (default INFO)")
     return p.parse_args()
 
 
-def start(ib: IB, zmq_addr: str) -> tuple[zmq.Context, zmq.Socket]:
-    """Attach event handlers to ``ib`` and publish updates on ``zmq_addr``."""
-    ctx = zmq.Context.instance()
-    sock = ctx.socket(zmq.PUB)
-    sock.bind(zmq_addr)
+StateKey = Tuple[str, float, float, float]  # status, filled, remaining, avgFillPrice
+
+
+class _OrderState:
+    __slots__ = ("key", "status", "next_ok", "pending")
+
+    def __init__(self) -> None:
+        self.key: Optional[StateKey] = None
+        self.status = ""  # last status actually published
+        self.next_ok = 0.0  # monotonic time the next partial may go out
+        self.pending: Optional[OrderUpdate] = None
+
+
+class _Stream:
+    """Sequence counter and replay buffer of one topic."""
+
+    __slots__ = ("seq", "buf")
+
+    def __init__(self, size: int) -> None:
+        self.seq = 0  # last sequence number published
+        self.buf: Deque[bytes] = deque(maxlen=max(1, size))
+
+    @property
+    def oldest(self) -> int:
+        return self.seq - len(self.buf) + 1
 
-    last_tickers: Dict[int, Ticker] = {}
 
-    def on_tickers(tickers):
-        for t in tickers:
-            if t.contract:
-                last_tickers[t.contract.conId] = t
+class OrderStatusRelay:
+    """
+    Publish IB order status changes and executions on a ZeroMQ ``PUB`` socket.
+
+    Example
+    -------
+    relay = OrderStatusRelay(ib, "tcp://*:6002", recovery_addr="tcp://*:6003")
+    relay.start()
+    while running:
+        ib.sleep(relay.poll_interval)
+        relay.flush_due()
+        relay.serve_recovery()
+    relay.close()
+    """
+
+    def __init__(
+        self,
+        ib: IB,
+        zmq_addr: str,
+        *,
+        conflate_s: float = 0.05,
+        mid_cache_size: int = 0,
+        recovery_addr: Optional[str] = None,
+        replay_size: int = 100_000,
+        snd_hwm: int = 10_000,
+        commission_wait_s: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ib = ib
+        self.zmq_addr = zmq_addr
+        self.conflate_s = max(0.0, conflate_s)
+        self.clock = clock
+        self.ctx: Optional[zmq.Context] = None
+        self.sock: Optional[zmq.Socket] = None
+        self.recovery_addr = recovery_addr or None
+        self.recovery: Optional[zmq.Socket] = None
+        self.snd_hwm = snd_hwm
+        self.commission_wait_s = max(0.0, commission_wait_s)
+        self._streams = {TOPIC: _Stream(replay_size), EXEC_TOPIC: _Stream(replay_size)}
+        self._orders: Dict[int, _OrderState] = {}
+        self._pending: Set[int] = set()
+        self._done: "OrderedDict[int, StateKey]" = OrderedDict()
+        self.mid_cache_size = max(0, mid_cache_size)
+        # conId → live Ticker, least recently traded first
+        self._tickers: "OrderedDict[int, Ticker]" = OrderedDict()
+        # exec id → (deadline, Execution) awaiting its commissionReport
+        self._fills: "OrderedDict[str, Tuple[float, Execution]]" = OrderedDict()
+        self._execs_sent: "OrderedDict[str, None]" = OrderedDict()
+
+    @property
+    def poll_interval(self) -> float:
+        """How often the owner should call :meth:`flush_due`."""
+        waits = [w / 2 for w in (self.conflate_s, self.commission_wait_s) if w]
+        return min([0.2, *waits])
+
+    def start(self) -> "OrderStatusRelay":
+        self.ctx = zmq.Context.instance()
+        self.sock = self.ctx.socket(zmq.PUB)
+        self.sock.setsockopt(zmq.SNDHWM, self.snd_hwm)
+        self.sock.bind(self.zmq_addr)
+        if self.recovery_addr:
+            self.recovery = self.ctx.socket(zmq.ROUTER)
+            # ROUTER silently drops at the HWM; a reply is already bounded by the buffer
+            self.recovery.setsockopt(zmq.SNDHWM, 0)
+            self.recovery.bind(self.recovery_addr)
+        self.ib.orderStatusEvent += self.on_status
+        self.ib.execDetailsEvent += self.on_exec
+        self.ib.commissionReportEvent += self.on_commission
+        return self
+
+    # ── event handlers ────────────────────────────────────────────────
+    def on_status(self, trade: Trade) -> None:
+        st = trade.orderStatus
+        status = st.status or ""
+        oid = int(getattr(trade.order, "orderId", 0) or 0)
+        key: StateKey = (
+            status,
+            float(getattr(st, "filled", 0.0) or 0.0),
+            float(getattr(st, "remaining", 0.0) or 0.0),
+            float(getattr(st, "avgFillPrice", 0.0) or 0.0),
+        )
+
+        if self._done.get(oid) == key:
+            order_updates_suppressed_total.labels(reason="duplicate").inc()
+            return
+        state = self._orders.get(oid)
+        if state is None:
+            state = self._orders[oid] = _OrderState()
+        elif state.key == key:
+            order_updates_suppressed_total.labels(reason="duplicate").inc()
+            return
+        state.key = key
 
-    def on_status(trade: Trade):
-        status = trade.orderStatus.status or ""
         msg = OrderUpdate(
             ts_unix_ns=time.time_ns(),
             symbol=getattr(trade.contract, "symbol", ""),
             side=getattr(trade.order, "action", ""),
-            fill_px=float(getattr(trade.orderStatus, "avgFillPrice", 0.0) or 0.0),
-            fill_qty=int(getattr(trade.orderStatus, "filled", 0) or 0),
+            fill_px=key[3],
+            fill_qty=int(key[1]),
             status=status,
-            order_id=int(getattr(trade.order, "orderId", 0) or 0),
+            order_id=oid,
+            mid_px=self._mid(trade.contract),
         )
-        sock.send_multipart([b"order_updates", msg.SerializeToString()])
-        order_updates_total.labels(status=status).inc()
 
-    ib.pendingTickersEvent += on_tickers
-    ib.orderStatusEvent += on_status
-    return ctx, sock
+        now = self.clock()
+        if status in TERMINAL_STATUSES:
+            self._drop_pending(state, oid)
+            self._publish(msg)
+            del self._orders[oid]
+            self._done[oid] = key
+            if len(self._done) > MAX_TERMINAL_IDS:
+                self._done.popitem(last=False)
+        elif status != state.status or now >= state.next_ok:
+            self._drop_pending(state, oid)
+            self._publish(msg)
+            state.status = status
+            state.next_ok = now + self.conflate_s
+        else:  # partial-fill progress inside the window → keep only the latest
+            if state.pending is not None:
+                order_updates_suppressed_total.labels(reason="conflated").inc()
+            state.pending = msg
+            self._pending.add(oid)
+
+    def on_exec(self, trade: Trade, fill) -> None:
+        ex = fill.execution
+        if ex.execId in self._fills or ex.execId in self._execs_sent:
+            return  # re-delivered after a reconnect or reqExecutions
+        msg = Execution(
+            ts_unix_ns=int(ex.time.timestamp() * 1e9) if ex.time else time.time_ns(),
+            exec_id=ex.execId,
+            order_id=ex.orderId,
+            symbol=getattr(fill.contract, "symbol", ""),
+            side="BUY" if ex.side == "BOT" else "SELL",
+            qty=ex.shares,
+            px=ex.price,
+            liquidity=_LIQUIDITY.get(getattr(ex, "lastLiquidity", 0), ""),
+            con_id=getattr(fill.contract, "conId", 0),
+        )
+        report = fill.commissionReport
+        if report is not None and report.execId == ex.execId:
+            self._publish_exec(msg, report)
+        else:
+            self._fills[ex.execId] = (self.clock() + self.commission_wait_s, msg)
+
+    def on_commission(self, trade: Trade, fill, report) -> None:
+        held = self._fills.pop(report.execId, None)
+        if held is not None:
+            self._publish_exec(held[1], report)
+
+    def flush_due(self, now: Optional[float] = None) -> int:
+        """Send held updates whose conflation window has closed, and
+        executions whose commission wait ran out."""
+        if not self._pending and not self._fills:
+            return 0
+        now = self.clock() if now is None else now
+        sent = 0
+        while self._fills:  # deadlines are in insertion order
+            exec_id, (due, msg) = next(iter(self._fills.items()))
+            if now < due:
+                break
+            del self._fills[exec_id]
+            self._publish_exec(msg)
+            sent += 1
+        for oid in list(self._pending):
+            state = self._orders[oid]
+            if now >= state.next_ok:
+                self._publish(state.pending)
+                state.pending = None
+                state.next_ok = now + self.conflate_s
+                self._pending.discard(oid)
+                sent += 1
+        return sent
+
+    def serve_recovery(self) -> int:
+        """Answer every queued missed-range request; return how many."""
+        if self.recovery is None:
+            return 0
+        served = 0
+        while True:
+            try:
+                frames = self.recovery.recv_multipart(zmq.NOBLOCK)
+            except zmq.Again:
+                return served
+            ident, body = frames[0], frames[-1]
+            topic = frames[1] if len(frames) > 2 else TOPIC
+            stream = self._streams.get(topic) or _Stream(1)
+            oldest, newest = stream.oldest, stream.seq
+            if len(body) == _RANGE.size:  # anything else just gets the "end" summary
+                first, last = _RANGE.unpack(body)
+                if not last or last > newest:
+                    last = newest
+                lo = max(first, oldest) - oldest
+                for payload in islice(stream.buf, lo, max(lo, last - oldest + 1)):
+                    self.recovery.send_multipart([ident, topic, payload])
+                    order_update_replays_total.labels(topic=topic.decode()).inc()
+            self.recovery.send_multipart([ident, b"end", _RANGE.pack(oldest, newest)])
+            served += 1
+
+    def close(self) -> None:
+        if self.sock is None:
+            return
+        self.ib.orderStatusEvent -= self.on_status
+        self.ib.execDetailsEvent -= self.on_exec
+        self.ib.commissionReportEvent -= self.on_commission
+        for ticker in self._tickers.values():
+            self.ib.cancelMktData(ticker.contract)
+        self._tickers.clear()
+        self.sock.close()
+        self.sock = None
+        if self.recovery is not None:
+            self.recovery.close()
+            self.recovery = None
+
+    # ── internals ─────────────────────────────────────────────────────
+    def _drop_pending(self, state: _OrderState, oid: int) -> None:
+        # A newer cumulative update supersedes anything still held.
+        if state.pending is not None:
+            order_updates_suppressed_total.labels(reason="conflated").inc()
+            state.pending = None
+            self._pending.discard(oid)
+
+    def _mid(self, contract) -> float:
+        """Current mid for ``contract`` (0.0 until a two-sided quote arrives).
+
+        The first update for a contract subscribes to its quotes; ib_insync
+        then refreshes the cached ``Ticker`` in place, so no per-tick work
+        happens here.
+        """
+        con_id = getattr(contract, "conId", 0)
+        if not self.mid_cache_size or not con_id:
+            return 0.0
+        ticker = self._tickers.get(con_id)
+        if ticker is None:
+            if len(self._tickers) >= self.mid_cache_size:
+                _, old = self._tickers.popitem(last=False)
+                self.ib.cancelMktData(old.contract)
+            ticker = self._tickers[con_id] = self.ib.reqMktData(contract)
+        else:
+            self._tickers.move_to_end(con_id)
+        bid, ask = ticker.bid, ticker.ask
+        if bid > 0 and ask > 0 and not math.isnan(bid + ask):  # NaN/-1 when unset
+            return (bid + ask) / 2
+        return 0.0
+
+    def _send(self, topic: bytes, msg) -> None:
+        stream = self._streams[topic]
+        stream.seq += 1
+        msg.seq = stream.seq
+        payload = msg.SerializeToString()
+        stream.buf.append(payload)
+        self.sock.send_multipart([topic, payload])
+
+    def _publish(self, msg: OrderUpdate) -> None:
+        self._send(TOPIC, msg)
+        order_updates_total.labels(status=msg.status).inc()
+
+    def _publish_exec(self, msg: Execution, report=None) -> None:
+        if report is not None:
+            msg.commission = report.commission
+            msg.currency = report.currency
+            pnl = report.realizedPNL
+            if pnl and abs(pnl) < _UNSET_PNL:  # NaN fails the comparison too
+                msg.realized_pnl = pnl
+        self._send(EXEC_TOPIC, msg)
+        executions_total.labels(commission="missing" if report is None else "reported").inc()
+        self._execs_sent[msg.exec_id] = None
+        if len(self._execs_sent) > MAX_EXEC_IDS:
+            self._execs_sent.popitem(last=False)
+
+
+def start(
+    ib: IB, zmq_addr: str, *, conflate_s: float = 0.0, mid_cache_size: int = 0
+) -> tuple[zmq.Context, zmq.Socket]:
+    """Attach event handlers to ``ib`` and publish updates on ``zmq_addr``.
+
+    Kept for callers that only need the socket; duplicates are dropped but,
+    with nobody calling ``flush_due``, conflation is off by default.
+    """
+    relay = OrderStatusRelay(
+        ib, zmq_addr, conflate_s=conflate_s, mid_cache_size=mid_cache_size
+    ).start()
+    return relay.ctx, relay.sock
+
+
+def recover(
+    addr: str,
+    first: int,
+    last: int = 0,
+    *,
+    topic: bytes = TOPIC,
+    ctx: Optional[zmq.Context] = None,
+    timeout_ms: int = 1000,
+) -> Tuple[List, int, int]:
+    """Fetch ``topic`` messages ``first..last`` (0 = newest) from a relay's
+    recovery endpoint.
+
+    Returns ``(messages, oldest, newest)`` where ``oldest``/``newest`` bound
+    what the relay still buffers; messages before ``oldest`` are gone.
+    Raises ``TimeoutError`` if the relay does not answer in ``timeout_ms``.
+    """
+    sock = (ctx or zmq.Context.instance()).socket(zmq.DEALER)
+    sock.setsockopt(zmq.LINGER, 0)
+    sock.connect(addr)
+    try:
+        sock.send_multipart([topic, _RANGE.pack(first, last)])
+        parse = _MESSAGES[topic].FromString
+        updates: List = []
+        while True:
+            if not sock.poll(timeout_ms):
+                raise TimeoutError(f"no recovery reply from {addr}")
+            kind, body = sock.recv_multipart()
+            if kind == b"end":
+                oldest, newest = _RANGE.unpack(body)
+                return updates, oldest, newest
+            updates.append(parse(body))
+    finally:
+        sock.close()
 
 
 def main() -> None:
@@ -103,19 +516,37 @@ def main() -> None:
         args.client_id,
     )
 
-    ctx, sock = start(ib, args.zmq_addr)
+    relay = OrderStatusRelay(
+        ib,
+        args.zmq_addr,
+        conflate_s=args.conflate_ms / 1000,
+        mid_cache_size=args.mid_cache_size,
+        recovery_addr=args.recovery_addr,
+        replay_size=args.replay_size,
+        snd_hwm=int(os.getenv("ZMQ_SNDHWM", "10000")),
+        commission_wait_s=args.commission_wait_ms / 1000,
+    ).start()
     logger.info("ZeroMQ PUB bound to %s", args.zmq_addr)
+    if relay.recovery is not None:
+        # Answer recovery requests as soon as they arrive, not on the next poll
+        util.getLoop().add_reader(relay.recovery.getsockopt(zmq.FD), relay.serve_recovery)
+        logger.info("Recovery ROUTER bound to %s", args.recovery_addr)
 
     signal.signal(signal.SIGINT, _request_shutdown)
     signal.signal(signal.SIGTERM, _request_shutdown)
 
     try:
         while not _SHUTDOWN:
-            ib.sleep(0.2)
+            ib.sleep(relay.poll_interval)
+            relay.flush_due()
+            relay.serve_recovery()
     finally:
+        relay.flush_due(float("inf"))
+        if relay.recovery is not None:
+            util.getLoop().remove_reader(relay.recovery.getsockopt(zmq.FD))
         ib.disconnect()
-        sock.close()
-        ctx.term()
+        relay.close()
+        relay.ctx.term()
         logger.info("✅ Shutdown complete.")
 
 
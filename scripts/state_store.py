@@ -19,11 +19,14 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Tuple, Union
+from typing import TYPE_CHECKING, Dict, Tuple, Union
 import asyncio
 
-import duckdb
-import pandas as pd
+from scripts.health import HEALTH
+
+if TYPE_CHECKING:  # duckdb/pandas are imported on first use, not by receivers at import
+    import duckdb
+    import pandas as pd
 
 DEFAULT_DB = Path("./data/state.duckdb")
 
@@ -54,7 +57,7 @@ class StateStore:
         # auto-install the sqlite_scanner extension (blocked in CI).
         if self.path.exists():
             try:
-                duckdb.connect(self.path).close()
+                self._conn().close()
             except Exception:
                 self.path.unlink()
         self._ensure_schema()
@@ -74,17 +77,22 @@ class StateStore:
 
     def upsert(self, proto_id: int, symbol: str, ib_id: int) -> None:
         """Insert or update a single record."""
-        with self._conn() as conn:
-            conn.execute(
-                """
-                INSERT INTO mapping (proto_id, symbol, ib_id)
-                VALUES (?, ?, ?)
-                ON CONFLICT(proto_id, symbol)
-                DO UPDATE SET ib_id = excluded.ib_id
-                """,
-                (proto_id, symbol, ib_id),
-            )
-            conn.commit()
+        try:
+            with self._conn() as conn:
+                conn.execute(
+                    """
+                    INSERT INTO mapping (proto_id, symbol, ib_id)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(proto_id, symbol)
+                    DO UPDATE SET ib_id = excluded.ib_id
+                    """,
+                    (proto_id, symbol, ib_id),
+                )
+                conn.commit()
+        except Exception as exc:
+            HEALTH.set("state_store", False, f"upsert failed: {exc}")
+            raise
+        HEALTH.set("state_store", True)
 
     # internal helpers -------------------------------------------------
     def _table_exists(self, conn: duckdb.DuckDBPyConnection, name: str) -> bool:
@@ -116,6 +124,8 @@ class StateStore:
         conn.unregister("tmp_df")
 
     def _snapshot_once(self, trading_app) -> SnapshotStruct:
+        import pandas as pd
+
         trading_app.request_positions()
         trading_app.request_portfolio()
 
@@ -157,11 +167,16 @@ class StateStore:
                 ]
             ]
 
-        with self._conn() as conn:
-            self._write_df(conn, df_pos, "positions")
-            self._write_df(conn, df_orders, "orders")
-            self._write_df(conn, df_pnl, "pnl")
-            conn.commit()
+        try:
+            with self._conn() as conn:
+                self._write_df(conn, df_pos, "positions")
+                self._write_df(conn, df_orders, "orders")
+                self._write_df(conn, df_pnl, "pnl")
+                conn.commit()
+        except Exception as exc:
+            HEALTH.set("state_store", False, f"snapshot failed: {exc}")
+            raise
+        HEALTH.set("state_store", True)
 
         return SnapshotStruct(df_pos, df_orders, df_pnl)
 
@@ -174,6 +189,8 @@ class StateStore:
 
     def load_last_snapshot(self) -> SnapshotStruct:
         """Load the most recent snapshot from the DB."""
+        import pandas as pd
+
         with self._conn() as conn:
             ts_row = conn.execute(
                 "SELECT max(snapshot_ts) FROM positions"
@@ -198,6 +215,8 @@ class StateStore:
         # ``duckdb.connect`` expects a string path; ``Path`` objects
         # previously triggered ``TypeError`` during tests.  Convert to ``str``
         # to support ``pathlib.Path`` inputs.
+        import duckdb
+
         return duckdb.connect(str(self.path))
 
     def _ensure_schema(self) -> None:
@@ -1,13 +1,17 @@
-import yfinance as yf
 import time
 
-def stream_price(ticker, interval_seconds=60, duration_minutes=10):
+from scripts.history_cache import default_cache
+
+def stream_price(ticker, interval_seconds=60, duration_minutes=10, cache=None):
+    # Only the live edge is re-fetched each round; older 1m bars come from the cache
+    cache = cache or default_cache()
+    cache.live_ttl_s = min(cache.live_ttl_s, interval_seconds)
     end_time = time.time() + duration_minutes * 60
     while time.time() < end_time:
-        ticker_obj = yf.Ticker(ticker)
-        data = ticker_obj.history(period='1m')
-        last_quote = data['Close'].iloc[-1]
-        print(f"{ticker} latest price: {last_quote}")
+        data = cache.get("yahoo", ticker, "1m", time.time() - 86_400)
+        if not data.empty:
+            last_quote = data['Close'].iloc[-1]
+            print(f"{ticker} latest price: {last_quote}")
         time.sleep(interval_seconds)
 
 if __name__ == "__main__":
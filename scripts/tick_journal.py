@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+tick_journal.py
+───────────────
+Append-only, memory-mapped, columnar journal of ``MarketTick`` records.
+
+One file per UTC day (``ticks-YYYYMMDD.tj``) plus a symbol dictionary
+sidecar (``ticks-YYYYMMDD.sym``, one symbol/venue per line, line number =
+id).  Records are fixed width and stored column-wise in chunks of
+``chunk_rows`` rows, so a scan over one field touches only that field's
+pages and every column of a chunk is a zero-copy NumPy view.
+
+File layout
+-----------
+    header   64 bytes  magic, chunk_rows, committed row count
+    chunk 0  ts_unix_ns[chunk_rows] | bid_price[…] | … | venue[…]
+    chunk 1  …
+
+The committed row count is written after every append, so readers (and a
+writer resuming after a crash) only ever see complete records.  Rows are
+kept in append order; ``search`` assumes timestamps are non-decreasing,
+which holds for a single publisher stamping ``time.time_ns()``.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+MAGIC = b"TJRNL001"
+HEADER = struct.Struct("<8sIIQ")  # magic, chunk_rows, reserved, rows
+HEADER_SIZE = 64
+ROWS_OFFSET = 16
+NS_PER_DAY = 86_400 * 1_000_000_000
+DEFAULT_CHUNK_ROWS = 65_536
+
+# Widest columns first keeps every column naturally aligned.
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("ts_unix_ns", "<i8"),
+    ("bid_price", "<f8"),
+    ("ask_price", "<f8"),
+    ("last_price", "<f8"),
+    ("bid_size", "<i4"),
+    ("ask_size", "<i4"),
+    ("last_size", "<i4"),
+    ("symbol", "<u2"),  # symbol dictionary id
+    ("venue", "<u2"),  # symbol dictionary id
+)
+ROW_BYTES = sum(np.dtype(d).itemsize for _, d in COLUMNS)
+
+Row = Tuple[int, str, float, float, float, int, int, int, str]
+
+
+def journal_path(directory: Union[str, Path], ts_unix_ns: int) -> Path:
+    day = datetime.fromtimestamp(ts_unix_ns // 1_000_000_000, tz=timezone.utc)
+    return Path(directory) / f"ticks-{day:%Y%m%d}.tj"
+
+
+def list_journals(directory: Union[str, Path]) -> List[Path]:
+    """Journal files in ``directory``, oldest day first."""
+    return sorted(Path(directory).glob("ticks-*.tj"))
+
+
+def _chunk_bytes(chunk_rows: int) -> int:
+    return chunk_rows * ROW_BYTES
+
+
+def _chunk_views(buf, chunk_rows: int, chunk: int) -> List[np.ndarray]:
+    """Column views for ``chunk`` inside ``buf`` (no copies)."""
+    views = []
+    offset = HEADER_SIZE + chunk * _chunk_bytes(chunk_rows)
+    for _, dtype in COLUMNS:
+        views.append(np.frombuffer(buf, dtype=dtype, count=chunk_rows, offset=offset))
+        offset += chunk_rows * np.dtype(dtype).itemsize
+    return views
+
+
+def _read_symbols(path: Path) -> List[str]:
+    try:
+        return path.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return []
+
+
+class TickJournal:
+    """
+    Writer side.
+
+    Example
+    -------
+    journal = TickJournal("var/ticks")
+    journal.append(time.time_ns(), "AAPL", 189.9, 190.0, 189.95, 3, 5, 1)
+    journal.close()
+    """
+
+    def __init__(self, directory: Union[str, Path], chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        if chunk_rows <= 0 or chunk_rows % 8:
+            raise ValueError("chunk_rows must be a positive multiple of 8")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.chunk_rows = chunk_rows
+        self.path: Optional[Path] = None
+        self._day: Optional[int] = None
+        self._fh = None
+        self._mm: Optional[mmap.mmap] = None
+        self._rows_view: Optional[np.ndarray] = None
+        self._cols: List[np.ndarray] = []
+        self._chunks = 0
+        self._rows = 0
+        self._chunk_base = 0
+        self._ids: Dict[str, int] = {}
+        self._sym_fh = None
+
+    # public API ──────────────────────────────────────────────────────
+    def append(
+        self,
+        ts_unix_ns: int,
+        symbol: str,
+        bid_price: float,
+        ask_price: float,
+        last_price: float,
+        bid_size: int,
+        ask_size: int,
+        last_size: int,
+        venue: str = "SMART",
+    ) -> None:
+        day = ts_unix_ns // NS_PER_DAY
+        if day != self._day:
+            self._open(ts_unix_ns)
+        i = self._rows - self._chunk_base
+        if i == self.chunk_rows:
+            self._add_chunk()
+            i = 0
+        ids = self._ids
+        sym_id = ids.get(symbol)
+        if sym_id is None:
+            sym_id = self._intern(symbol)
+        venue_id = ids.get(venue)
+        if venue_id is None:
+            venue_id = self._intern(venue)
+        c = self._cols
+        c[0][i] = ts_unix_ns
+        c[1][i] = bid_price
+        c[2][i] = ask_price
+        c[3][i] = last_price
+        c[4][i] = bid_size
+        c[5][i] = ask_size
+        c[6][i] = last_size
+        c[7][i] = sym_id
+        c[8][i] = venue_id
+        self._rows += 1
+        self._rows_view[0] = self._rows  # commit
+
+    def append_tick(self, msg) -> None:
+        """Append a ``MarketTick`` protobuf message."""
+        self.append(
+            msg.ts_unix_ns,
+            msg.symbol,
+            msg.bid_price,
+            msg.ask_price,
+            msg.last_price,
+            msg.bid_size,
+            msg.ask_size,
+            msg.last_size,
+            msg.venue or "SMART",
+        )
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def flush(self) -> None:
+        if self._mm is not None:
+            self._mm.flush()
+
+    def close(self) -> None:
+        self._unmap()
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        if self._sym_fh is not None:
+            self._sym_fh.close()
+            self._sym_fh = None
+        self._day = None
+
+    # internals ───────────────────────────────────────────────────────
+    def _open(self, ts_unix_ns: int) -> None:
+        self.close()
+        self.path = journal_path(self.directory, ts_unix_ns)
+        sym_path = self.path.with_suffix(".sym")
+        if self.path.exists() and self.path.stat().st_size >= HEADER_SIZE:
+            self._fh = open(self.path, "r+b")
+            magic, chunk_rows, _, rows = HEADER.unpack(self._fh.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{self.path} is not a tick journal")
+            self.chunk_rows = chunk_rows
+            self._rows = rows
+            size = os.fstat(self._fh.fileno()).st_size
+            self._chunks = (size - HEADER_SIZE) // _chunk_bytes(chunk_rows)
+        else:
+            self._fh = open(self.path, "w+b")
+            self._fh.write(HEADER.pack(MAGIC, self.chunk_rows, 0, 0).ljust(HEADER_SIZE, b"\0"))
+            self._rows = 0
+            self._chunks = 0
+        self._ids = {s: i for i, s in enumerate(_read_symbols(sym_path))}
+        self._sym_fh = open(sym_path, "a", encoding="utf-8")
+        self._day = ts_unix_ns // NS_PER_DAY
+
+        cur = (self._rows - 1) // self.chunk_rows if self._rows else 0
+        self._resize(max(cur + 1, self._chunks))
+        self._chunk_base = cur * self.chunk_rows
+        self._cols = _chunk_views(self._mm, self.chunk_rows, cur)
+
+    def _add_chunk(self) -> None:
+        self._chunk_base += self.chunk_rows
+        chunk = self._chunk_base // self.chunk_rows
+        if chunk >= self._chunks:
+            self._resize(chunk + 1)
+        self._cols = _chunk_views(self._mm, self.chunk_rows, chunk)
+
+    def _resize(self, chunks: int) -> None:
+        """Size the file to ``chunks`` chunks and (re)map it."""
+        self._unmap()
+        self._fh.truncate(HEADER_SIZE + chunks * _chunk_bytes(self.chunk_rows))
+        self._chunks = chunks
+        self._mm = mmap.mmap(self._fh.fileno(), 0)
+        self._rows_view = np.frombuffer(self._mm, dtype="<u8", count=1, offset=ROWS_OFFSET)
+
+    def _unmap(self) -> None:
+        # NumPy views export the mmap buffer; drop them before closing it.
+        self._cols = []
+        self._rows_view = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def _intern(self, name: str) -> int:
+        idx = len(self._ids)
+        self._ids[name] = idx
+        self._sym_fh.write(name + "\n")
+        self._sym_fh.flush()  # must reach disk before rows that use it
+        return idx
+
+
+class TickJournalReader:
+    """
+    Read side: zero-copy column access, sequential scan and timestamp search.
+
+    Example
+    -------
+    r = TickJournalReader("var/ticks/ticks-20250117.tj")
+    start = r.search(t0_ns)
+    for ts, sym, bid, ask, *_ in r.scan(start_ns=t0_ns, end_ns=t1_ns):
+        ...
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._fh = open(self.path, "rb")
+        magic, self.chunk_rows, _, _ = HEADER.unpack(self._fh.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a tick journal")
+        self._mm: Optional[mmap.mmap] = None
+        self._chunks: List[List[np.ndarray]] = []
+        self.rows = 0
+        self.symbols: List[str] = []
+        self.refresh()
+
+    def refresh(self) -> int:
+        """Pick up rows committed by a live writer; return the row count."""
+        size = os.fstat(self._fh.fileno()).st_size
+        if self._mm is None or len(self._mm) != size:
+            self._chunks = []
+            if self._mm is not None:
+                self._mm.close()
+            self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+            n = (size - HEADER_SIZE) // _chunk_bytes(self.chunk_rows)
+            self._chunks = [_chunk_views(self._mm, self.chunk_rows, k) for k in range(n)]
+        rows = struct.unpack_from("<Q", self._mm, ROWS_OFFSET)[0]
+        self.rows = min(rows, len(self._chunks) * self.chunk_rows)
+        self.symbols = _read_symbols(self.path.with_suffix(".sym"))
+        return self.rows
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def chunks(self) -> Iterator[Dict[str, np.ndarray]]:
+        """Yield ``{column: view}`` per chunk, trimmed to committed rows."""
+        for k, views in enumerate(self._chunks):
+            n = min(self.chunk_rows, self.rows - k * self.chunk_rows)
+            if n <= 0:
+                return
+            yield {name: v[:n] for (name, _), v in zip(COLUMNS, views)}
+
+    def column(self, name: str) -> np.ndarray:
+        """Whole-day column (a copy when the journal spans several chunks)."""
+        parts = [c[name] for c in self.chunks()]
+        if not parts:
+            return np.empty(0, dtype=dict(COLUMNS)[name])
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def search(self, ts_unix_ns: int) -> int:
+        """Index of the first row with ``ts_unix_ns >= ts_unix_ns``."""
+        lo, hi = 0, (self.rows + self.chunk_rows - 1) // self.chunk_rows
+        while lo < hi:  # first chunk whose last committed ts >= target
+            mid = (lo + hi) // 2
+            last = min(self.chunk_rows, self.rows - mid * self.chunk_rows) - 1
+            if self._chunks[mid][0][last] < ts_unix_ns:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo * self.chunk_rows >= self.rows:
+            return self.rows
+        n = min(self.chunk_rows, self.rows - lo * self.chunk_rows)
+        return lo * self.chunk_rows + int(np.searchsorted(self._chunks[lo][0][:n], ts_unix_ns, "left"))
+
+    def scan(
+        self, start_ns: Optional[int] = None, end_ns: Optional[int] = None
+    ) -> Iterator[Row]:
+        """Yield decoded rows in append order within ``[start_ns, end_ns)``."""
+        row = self.search(start_ns) if start_ns is not None else 0
+        syms = self.symbols
+        while row < self.rows:
+            k, i = divmod(row, self.chunk_rows)
+            n = min(self.chunk_rows, self.rows - k * self.chunk_rows)
+            ts, bid, ask, last, bsz, asz, lsz, sym, venue = (v[i:n].tolist() for v in self._chunks[k])
+            for j in range(n - i):
+                if end_ns is not None and ts[j] >= end_ns:
+                    return
+                yield (ts[j], syms[sym[j]], bid[j], ask[j], last[j], bsz[j], asz[j], lsz[j], syms[venue[j]])
+            row += n - i
+
+    def close(self) -> None:
+        self._chunks = []
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._fh.close()
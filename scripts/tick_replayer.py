@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""Replay recorded ticks on the market data publisher's ZeroMQ contract.
+
+Reads daily tick journals (:mod:`scripts.tick_journal`) or length-prefixed
+``MarketTick`` dumps and republishes them as ``[b"market_ticks",
+MarketTick]`` frames on a ``PUB`` socket, exactly like
+``scripts/market_data_publisher.py``.  Consumers can therefore be load
+tested offline, without IB.
+
+Pacing
+------
+``--speed 1``   original inter-tick gaps (wall clock)
+``--speed N``   N× faster
+``--speed 0``   as fast as possible
+
+Ticks are replayed in recorded order, so runs are deterministic.  By
+default the original ``ts_unix_ns`` is kept; ``--restamp`` replaces it
+with the send time for latency measurements downstream.
+
+CLI
+───
+python -m scripts.tick_replayer --journal var/ticks --speed 10 --symbols AAPL,MSFT
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Set, Union
+
+import zmq
+
+from scripts.tick_journal import Row, TickJournalReader, list_journals
+from shared_proto.market_data_pb2 import MarketTick
+from utils.utils import setup_logger
+
+TOPIC = b"market_ticks"
+_LEN = struct.Struct("<I")
+_SPIN_NS = 200_000  # busy-wait the last 0.2 ms instead of oversleeping
+
+
+# ── Sources ─────────────────────────────────────────────────────────
+
+
+def iter_journal(
+    path: Union[str, Path],
+    start_ns: Optional[int] = None,
+    end_ns: Optional[int] = None,
+) -> Iterator[Row]:
+    """Rows from one journal file, or every journal in a directory by day."""
+    path = Path(path)
+    for p in list_journals(path) if path.is_dir() else [path]:
+        reader = TickJournalReader(p)
+        try:
+            yield from reader.scan(start_ns, end_ns)
+        finally:
+            reader.close()
+
+
+def write_dump(fh: BinaryIO, msgs: Iterable[MarketTick]) -> int:
+    """Write ``msgs`` as ``<u32 length><MarketTick>`` records; return count."""
+    n = 0
+    for msg in msgs:
+        payload = msg.SerializeToString()
+        fh.write(_LEN.pack(len(payload)))
+        fh.write(payload)
+        n += 1
+    return n
+
+
+def iter_dump(path: Union[str, Path]) -> Iterator[Row]:
+    """Rows from a length-prefixed ``MarketTick`` dump."""
+    msg = MarketTick()
+    with open(path, "rb") as fh:
+        while True:
+            head = fh.read(_LEN.size)
+            if len(head) < _LEN.size:
+                return
+            msg.ParseFromString(fh.read(_LEN.unpack(head)[0]))
+            yield (
+                msg.ts_unix_ns,
+                msg.symbol,
+                msg.bid_price,
+                msg.ask_price,
+                msg.last_price,
+                msg.bid_size,
+                msg.ask_size,
+                msg.last_size,
+                msg.venue,
+            )
+
+
+def _filter(rows: Iterable[Row], symbols: Optional[Set[str]]) -> Iterator[Row]:
+    if not symbols:
+        yield from rows
+        return
+    for row in rows:
+        if row[1] in symbols:
+            yield row
+
+
+# ── Replay ──────────────────────────────────────────────────────────
+
+
+@dataclass
+class ReplayStats:
+    ticks: int = 0
+    elapsed_s: float = 0.0
+    max_lag_ms: float = 0.0  # worst send delay behind the paced schedule
+
+    @property
+    def rate(self) -> float:
+        return self.ticks / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+
+def replay(
+    sock,
+    rows: Iterable[Row],
+    *,
+    speed: float = 1.0,
+    restamp: bool = False,
+    report_every_s: float = 5.0,
+    logger: Optional[logging.Logger] = None,
+) -> ReplayStats:
+    """
+    Publish ``rows`` on ``sock`` paced at ``speed``× recorded time.
+
+    ``speed <= 0`` disables pacing.  Throughput is logged every
+    ``report_every_s`` seconds when ``logger`` is given.
+    """
+    stats = ReplayStats()
+    msg = MarketTick()
+    send = sock.send_multipart
+    clock = time.perf_counter_ns
+    t0 = clock()
+    next_report = t0 + int(report_every_s * 1e9)
+    last_count = 0
+    first_ts: Optional[int] = None
+
+    for ts, sym, bid, ask, last, bid_size, ask_size, last_size, venue in rows:
+        if speed > 0:
+            if first_ts is None:
+                first_ts = ts
+            due = t0 + int((ts - first_ts) / speed)
+            now = clock()
+            if due - now > _SPIN_NS:
+                time.sleep((due - now - _SPIN_NS) / 1e9)
+            while clock() < due:
+                pass
+            lag = (clock() - due) / 1e6
+            if lag > stats.max_lag_ms:
+                stats.max_lag_ms = lag
+
+        msg.ts_unix_ns = time.time_ns() if restamp else ts
+        msg.symbol = sym
+        msg.bid_price = bid
+        msg.ask_price = ask
+        msg.last_price = last
+        msg.bid_size = bid_size
+        msg.ask_size = ask_size
+        msg.last_size = last_size
+        msg.venue = venue
+        send((TOPIC, msg.SerializeToString()))
+        stats.ticks += 1
+
+        if logger is not None and stats.ticks & 0x3FF == 0:
+            now = clock()
+            if now >= next_report:
+                window = (now - next_report) / 1e9 + report_every_s
+                logger.info(
+                    "Replayed %d ticks (%.0f ticks/s)",
+                    stats.ticks,
+                    (stats.ticks - last_count) / window,
+                )
+                last_count = stats.ticks
+                next_report = now + int(report_every_s * 1e9)
+
+    stats.elapsed_s = (clock() - t0) / 1e9
+    return stats
+
+
+# ── CLI ─────────────────────────────────────────────────────────────
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser("Tick replayer")
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--journal", help="journal file or directory of daily journals")
+    src.add_argument("--dump", help="length-prefixed MarketTick dump file")
+    p.add_argument("--zmq-addr", default="tcp://*:6001", help="ZeroMQ PUB bind address")
+    p.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="pacing multiplier: 1 = wall clock, N = N× faster, 0 = unpaced",
+    )
+    p.add_argument("--symbols", default="", help="comma-separated symbol filter")
+    p.add_argument("--start-ns", type=int, default=None, help="first ts_unix_ns to replay (journals only)")
+    p.add_argument("--end-ns", type=int, default=None, help="stop before this ts_unix_ns (journals only)")
+    p.add_argument("--restamp", action="store_true", help="stamp ts_unix_ns at send time")
+    p.add_argument(
+        "--warmup-s",
+        type=float,
+        default=0.5,
+        help="wait for subscribers to connect before sending (default 0.5)",
+    )
+    p.add_argument("--log-level", default="INFO", help="logging level (default INFO)")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    level = getattr(logging, args.log_level.upper(), logging.INFO)
+    logger = setup_logger("TickReplayer", level=level)
+
+    ctx = zmq.Context.instance()
+    sock = ctx.socket(zmq.PUB)
+    sock.setsockopt(zmq.SNDHWM, 0)  # unbounded queue: never drop replayed ticks
+    sock.bind(args.zmq_addr)
+    logger.info("ZeroMQ PUB bound to %s", args.zmq_addr)
+    time.sleep(args.warmup_s)
+
+    if args.journal:
+        rows: Iterable[Row] = iter_journal(args.journal, args.start_ns, args.end_ns)
+    else:
+        rows = iter_dump(args.dump)
+    symbols: List[str] = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+
+    try:
+        stats = replay(
+            sock,
+            _filter(rows, set(symbols)),
+            speed=args.speed,
+            restamp=args.restamp,
+            logger=logger,
+        )
+        logger.info(
+            "✅ Replayed %d ticks in %.2fs (%.0f ticks/s, max lag %.2f ms)",
+            stats.ticks,
+            stats.elapsed_s,
+            stats.rate,
+            stats.max_lag_ms,
+        )
+    finally:
+        sock.close(linger=2000)
+        ctx.term()
+
+
+if __name__ == "__main__":
+    main()
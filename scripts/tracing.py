@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+scripts.tracing
+───────────────
+Per-message latency tracing across the order path.
+
+Every inbound message gets a :class:`Trace` holding a ``perf_counter_ns``
+timestamp per stage::
+
+    recv → decoded → validated → admitted → placed → submitted → acked
+
+``admitted`` (throttle passed) and ``placed`` (``placeOrder`` called) are
+marked inside :meth:`scripts.core.TradingApp.send_order` on the receiving
+thread's current trace; ``submitted`` is the first ``PreSubmitted`` /
+``Submitted`` ``orderStatus`` for the order, which arrives on the IB reader
+thread.  A trace is recorded once it is ended by the receiver and, if it
+placed an order, that order was submitted (or it was evicted waiting).
+
+Recorded traces go into a fixed-size ring (slots claimed with an atomic
+counter, no locks) and feed ``order_stage_latency_us{stage}``, the time
+from the previous reached stage, plus ``stage="total"``.  ``dump()``
+returns or writes the ring as JSON lines; receivers wire it to ``SIGUSR1``.
+
+    trace = TRACER.start()
+    ...decode...;  TRACER.mark(DECODED)
+    ...validate...; TRACER.mark(VALIDATED)
+    app.send_order(contract, order)      # marks admitted/placed, binds order id
+    publish_ack(); TRACER.mark(ACKED)
+    TRACER.end(trace)
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from prometheus_client import Histogram
+
+STAGES = ("recv", "decoded", "validated", "admitted", "placed", "submitted", "acked")
+RECV, DECODED, VALIDATED, ADMITTED, PLACED, SUBMITTED, ACKED = range(len(STAGES))
+
+order_stage_latency_us = Histogram(
+    "order_stage_latency_us",
+    "Order path latency from the previous traced stage (µs); stage=total is recv → last",
+    ["stage"],
+    buckets=(5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 100000, 1000000),
+)
+
+
+class Trace:
+    __slots__ = ("key", "order_id", "t", "ended")
+
+    def __init__(self, key: str = "") -> None:
+        self.key = key
+        self.order_id: Optional[int] = None
+        self.t = [0] * len(STAGES)  # 0 = stage not reached
+        self.ended = False
+
+    def as_dict(self) -> dict:
+        t0 = self.t[RECV]
+        return {
+            "key": self.key,
+            "order_id": self.order_id,
+            "recv_ns": t0,
+            **{f"{name}_us": (ts - t0) / 1000 for name, ts in zip(STAGES[1:], self.t[1:]) if ts},
+        }
+
+
+class Tracer:
+    def __init__(self, size: int = 4096, max_pending: int = 10_000) -> None:
+        self.size = size
+        self.max_pending = max_pending
+        self._ring: List[Optional[Trace]] = [None] * size
+        self._seq = itertools.count()
+        self._pending: Dict[int, Trace] = {}  # order id → trace waiting for submitted
+        self._local = threading.local()
+        self._children = [order_stage_latency_us.labels(stage=s) for s in STAGES]
+        self._total = order_stage_latency_us.labels(stage="total")
+
+    # ── receiver thread ───────────────────────────────────────────
+    def start(self, key: str = "") -> Trace:
+        """New trace stamped ``recv``; becomes this thread's current trace."""
+        trace = Trace(key)
+        trace.t[RECV] = time.perf_counter_ns()
+        self._local.trace = trace
+        return trace
+
+    def current(self) -> Optional[Trace]:
+        return getattr(self._local, "trace", None)
+
+    def mark(self, stage: int, trace: Optional[Trace] = None) -> None:
+        trace = trace or getattr(self._local, "trace", None)
+        if trace is not None and not trace.t[stage]:
+            trace.t[stage] = time.perf_counter_ns()
+
+    def bind_order(self, order_id: int, trace: Optional[Trace] = None) -> None:
+        """The current trace placed ``order_id``; keep it until the order is submitted."""
+        trace = trace or getattr(self._local, "trace", None)
+        if trace is None:
+            return
+        trace.order_id = order_id
+        self._pending[order_id] = trace
+        if len(self._pending) > self.max_pending:
+            try:
+                oldest = next(iter(self._pending))
+            except (StopIteration, RuntimeError):  # changed under us; next call retries
+                return
+            evicted = self._pending.pop(oldest, None)
+            if evicted is not None:
+                self._record(evicted)
+
+    def end(self, trace: Optional[Trace] = None) -> None:
+        """Receiver is done with the message (normally right after the ACK)."""
+        trace = trace or getattr(self._local, "trace", None)
+        if trace is None:
+            return
+        if getattr(self._local, "trace", None) is trace:
+            self._local.trace = None
+        trace.ended = True
+        if trace.order_id is None:
+            self._record(trace)
+        elif trace.t[SUBMITTED] and self._pending.pop(trace.order_id, None) is trace:
+            self._record(trace)
+
+    # ── IB reader thread ──────────────────────────────────────────
+    def on_status(self, order_id: int, status: str) -> None:
+        if status not in ("PreSubmitted", "Submitted"):
+            return
+        trace = self._pending.get(order_id)
+        if trace is None or trace.t[SUBMITTED]:
+            return
+        trace.t[SUBMITTED] = time.perf_counter_ns()
+        # dict.pop is atomic: whichever of end()/on_status() pops it records it
+        if trace.ended and self._pending.pop(order_id, None) is trace:
+            self._record(trace)
+
+    # ── output ────────────────────────────────────────────────────
+    def _record(self, trace: Trace) -> None:
+        self._ring[next(self._seq) % self.size] = trace
+        t = trace.t
+        prev = t[RECV]
+        for stage in range(1, len(STAGES)):
+            ts = t[stage]
+            if ts:
+                self._children[stage].observe((ts - prev) / 1000)
+                prev = ts
+        self._total.observe((prev - t[RECV]) / 1000)
+
+    def traces(self) -> List[Trace]:
+        """Recorded traces currently in the ring, oldest first."""
+        snap = [t for t in self._ring if t is not None]
+        snap.sort(key=lambda t: t.t[RECV])
+        return snap
+
+    def dump(self, path: Optional[str] = None) -> List[dict]:
+        """The ring as dicts (µs offsets from ``recv``); also written as JSON lines to ``path``."""
+        rows = [t.as_dict() for t in self.traces()]
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w") as fh:
+                for row in rows:
+                    fh.write(json.dumps(row) + "\n")
+        return rows
+
+
+TRACER = Tracer(int(os.getenv("TRACE_RING_SIZE", "4096")))
+DUMP_PATH = os.getenv("TRACE_DUMP", "var/traces.jsonl")
+
+
+def install_dump_signal(tracer: Tracer = TRACER, path: str = DUMP_PATH) -> None:
+    """``kill -USR1 <pid>`` writes the ring to ``path``.
+
+    No-op off the main thread (signal handlers can only be set there), e.g.
+    when a receiver's ``main()`` runs in a test thread.
+    """
+    import signal
+    import threading
+
+    if hasattr(signal, "SIGUSR1") and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGUSR1, lambda _sig, _frm: tracer.dump(path))
@@ -3,7 +3,6 @@ from __future__ import annotations
 import json
 import os
 import sqlite3
-import time
 from contextlib import closing
 from typing import Optional, Set, Tuple, Dict, Any
 from datetime import datetime, time as dtime
@@ -16,8 +15,11 @@ from prometheus_client import Counter, Histogram, start_http_server
 from scripts.core import TradingApp
 from scripts.contracts import create_contract
 from scripts.order_factory import make_order
-from utils.utils import setup_logger
+from scripts.health import HEALTH, start_probe_server
+from scripts.metrics_server import FastCounter, FastHistogram
+from utils.utils import SampledLogger, setup_logger
 from scripts.validation import EnvelopeModel, SimpleOrderModel
+from scripts.tracing import ACKED, DECODED, TRACER, VALIDATED, Trace, install_dump_signal
 
 # Optional: protobuf Envelope support if generated code is available
 try:  # pragma: no cover
@@ -78,15 +80,16 @@ ack_total = Counter("v1_receiver_ack_total", "Total acks published", ["status"])
 process_latency = Histogram("v1_receiver_processing_seconds", "Message processing latency seconds")
 ack_latency = Histogram("v1_receiver_ack_latency_seconds", "ACK publish latency seconds")
 ack_reason_total = Counter("v1_receiver_ack_reason_total", "ACKs by reason", ["reason"])  # type: ignore
+# Per-message updates go through the batched facades (see scripts.metrics_server)
+route_total_hot = FastCounter(route_total)
+ack_total_hot = FastCounter(ack_total)
+process_latency_hot = FastHistogram(process_latency)
+ack_latency_hot = FastHistogram(ack_latency)
 
 # Mode: JSON envelopes (default) or protobuf envelope if env set and code exists
 PROTO_MODE = os.getenv("V1_PROTO_MODE", "0") == "1" and envpb is not None
 PROTO_ACK_MODE = os.getenv("V1_PROTO_ACK_MODE", "0") == "1" and ackpb is not None
 
-# Track last receive timestamp for latency metrics
-LAST_RECV_TS: Optional[float] = None
-
-
 # Persistence helpers (reuse proto_id mapping for CancelReplace)
 SQL_INIT = """
 CREATE TABLE IF NOT EXISTS cr_mapping (
@@ -189,7 +192,14 @@ def _validate_qty_price(qty: int, price: float) -> Optional[str]:
 # }
 
 
-def _publish_ack(pub: zmq.Socket, correlation_id: str, status: str, reason: str = "", extra: Optional[Dict[str, Any]] = None) -> None:
+def _publish_ack(
+    pub: zmq.Socket,
+    correlation_id: str,
+    status: str,
+    reason: str = "",
+    extra: Optional[Dict[str, Any]] = None,
+    trace: Optional[Trace] = None,
+) -> None:
     ack = {"version": "v1", "kind": "Ack", "correlation_id": correlation_id, "status": status, "reason": reason}
     if extra:
         ack.update(extra)
@@ -209,12 +219,14 @@ def _publish_ack(pub: zmq.Socket, correlation_id: str, status: str, reason: str
         except Exception:
             # Do not fail path if proto ack fails
             pass
-    ack_total.labels(status=status).inc()
+    ack_total_hot.inc(status)
+    trace = trace or TRACER.current()
+    if trace is not None:
+        TRACER.mark(ACKED, trace)
+        ack_latency_hot.observe((trace.t[ACKED] - trace.t[0]) / 1e9)
     try:
         if reason:
             ack_reason_total.labels(reason=reason[:64]).inc()  # cap label length
-        if LAST_RECV_TS is not None:
-            ack_latency.observe(max(0.0, time.time() - LAST_RECV_TS))
     except Exception:
         pass
 
@@ -246,171 +258,180 @@ def main() -> None:
     pub.bind(ACK_PUB_ADDR)
 
     logger.info("V1 receiver bound at %s; ACK PUB at %s", ZMQ_ADDR, ACK_PUB_ADDR)
+    HEALTH.set("zmq:v1_receiver", True, ZMQ_ADDR)
+    start_probe_server()  # /ready on $HEALTH_PORT, if set
 
     conn = _db_conn()
+    install_dump_signal()  # kill -USR1 → $TRACE_DUMP
+    hot = SampledLogger(logger)  # per-message lines: sampled + rate-limited
 
     while True:
         raw = pull.recv()
-        # record receive time for latency metrics
-        global LAST_RECV_TS
-        LAST_RECV_TS = time.time()
-        with process_latency.time():
-            if PROTO_MODE:
-                if envpb is None:
-                    reject_total.inc()
-                    logger.warning("PROTO mode set but no generated code available")
-                    continue
-                try:
-                    env_msg = envpb.Envelope()
-                    env_msg.ParseFromString(raw)
-                    version = env_msg.version
-                    correlation_id = env_msg.correlation_id
-                    msg_type = env_msg.msg_type
-                    # Map payload for downstream code
-                    if env_msg.HasField("simple_order"):
-                        payload = {
-                            "symbol": env_msg.simple_order.symbol,
-                            "action": env_msg.simple_order.action,
-                            "qty": env_msg.simple_order.qty,
-                            "order_type": env_msg.simple_order.order_type,
-                            "limit_price": env_msg.simple_order.limit_price,
-                            "account": env_msg.simple_order.account,
-                        }
-                    elif env_msg.HasField("cr"):
-                        payload = {
-                            "proto_id": env_msg.cr.proto_id,
-                            "qty": env_msg.cr.qty,
-                            "limit_price": env_msg.cr.limit_price,
-                            "tif": env_msg.cr.tif,
-                        }
+        trace = TRACER.start()  # per-message stage timestamps
+        try:
+            with process_latency_hot.time():
+                if PROTO_MODE:
+                    if envpb is None:
+                        reject_total.inc()
+                        hot.warning("PROTO mode set but no generated code available")
+                        continue
+                    try:
+                        env_msg = envpb.Envelope()
+                        env_msg.ParseFromString(raw)
+                        version = env_msg.version
+                        correlation_id = env_msg.correlation_id
+                        msg_type = env_msg.msg_type
+                        # Map payload for downstream code
+                        if env_msg.HasField("simple_order"):
+                            payload = {
+                                "symbol": env_msg.simple_order.symbol,
+                                "action": env_msg.simple_order.action,
+                                "qty": env_msg.simple_order.qty,
+                                "order_type": env_msg.simple_order.order_type,
+                                "limit_price": env_msg.simple_order.limit_price,
+                                "account": env_msg.simple_order.account,
+                            }
+                        elif env_msg.HasField("cr"):
+                            payload = {
+                                "proto_id": env_msg.cr.proto_id,
+                                "qty": env_msg.cr.qty,
+                                "limit_price": env_msg.cr.limit_price,
+                                "tif": env_msg.cr.tif,
+                            }
+                        else:
+                            payload = {}
+                    except Exception:
+                        reject_total.inc()
+                        hot.warning("Failed to parse protobuf Envelope; dropping")
+                        continue
+                else:
+                    try:
+                        # Accept both JSON bytes and string
+                        txt = raw.decode("utf-8")
+                        env = json.loads(txt)
+                        env_model = EnvelopeModel(**env)
+                    except Exception:
+                        reject_total.inc()
+                        hot.warning("Invalid or non-JSON envelope received; dropping")
+                        continue
+
+                    version = env_model.version
+                    correlation_id = env_model.correlation_id
+                    msg_type = env_model.msg_type
+                    payload = env_model.payload
+
+                recv_total.inc()
+                trace.key = correlation_id
+                TRACER.mark(DECODED, trace)
+
+                route_total_hot.inc(msg_type)
+
+                if msg_type == "SimpleOrder":
+                    # Expect payload: {symbol, action, qty, order_type?, limit_price?, account?}
+                    try:
+                        p = SimpleOrderModel(**payload)
+                    except Exception as e:
+                        reject_total.inc()
+                        _publish_ack(pub, correlation_id, "REJECT", f"bad payload: {e}")
+                        continue
+
+                    symbol = p.symbol
+                    action = p.action
+                    qty = p.qty
+                    order_type = p.order_type
+                    limit_price = p.limit_price
+                    account = p.account or ACCOUNT_ID_DEFAULT
+                    idemp_key = p.idempotency_key or ""
+
+                    if ALLOWED_SYMBOLS is not None and symbol not in ALLOWED_SYMBOLS:
+                        reject_total.inc()
+                        _publish_ack(pub, correlation_id, "REJECT", f"symbol {symbol} not allowed")
+                        continue
+                    price = limit_price if order_type == "LMT" else 1.0
+                    err = _validate_qty_price(qty, price)
+                    if err:
+                        reject_total.inc()
+                        _publish_ack(pub, correlation_id, "REJECT", err)
+                        continue
+                    TRACER.mark(VALIDATED, trace)
+
+                    # Idempotency: if key present and known, short-circuit
+                    existing_order_id = _get_simple_order_mapping(conn, idemp_key) if idemp_key else None
+                    if existing_order_id is not None:
+                        _publish_ack(pub, correlation_id, "ACCEPTED", extra={"order_id": existing_order_id, "idempotent": True})
+                        continue
+
+                    contract = create_contract(symbol)
+                    ib_order = make_order(action=action, order_type=order_type, quantity=qty, limit_px=limit_price, account=account)
+                    try:
+                        order_id = app.send_order(contract, ib_order)
+                        _put_simple_order_mapping(conn, idemp_key, order_id)
+                        _publish_ack(pub, correlation_id, "ACCEPTED", extra={"order_id": order_id})
+                    except Exception as e:
+                        reject_total.inc()
+                        _publish_ack(pub, correlation_id, "REJECT", f"send failed: {e}")
+
+                elif msg_type == "CancelReplaceRequest":
+                    # Payload is base64-encoded protobuf bytes, or JSON dict with fields matching cr_pb2
+                    cr_msg: Optional[cr_pb2.CancelReplaceRequest] = None
+                    if isinstance(payload, dict):
+                        # Build from dict (best-effort)
+                        try:
+                            cr_msg = cr_pb2.CancelReplaceRequest(
+                                proto_id=int(payload.get("proto_id", 0)),
+                                qty=int(payload.get("qty", 0)),
+                                limit_price=float(payload.get("limit_price", 0)),
+                                tif=str(payload.get("tif", "DAY")),
+                            )
+                        except Exception as e:
+                            cr_msg = None
                     else:
-                        payload = {}
-                except Exception:
-                    reject_total.inc()
-                    logger.warning("Failed to parse protobuf Envelope; dropping")
-                    continue
-            else:
-                try:
-                    # Accept both JSON bytes and string
-                    txt = raw.decode("utf-8")
-                    env = json.loads(txt)
-                    env_model = EnvelopeModel(**env)
-                except Exception:
-                    reject_total.inc()
-                    logger.warning("Invalid or non-JSON envelope received; dropping")
-                    continue
+                        # For now we only support dict; binary support requires base64 decode
+                        cr_msg = None
 
-                version = env_model.version
-                correlation_id = env_model.correlation_id
-                msg_type = env_model.msg_type
-                payload = env_model.payload
+                    if cr_msg is None:
+                        reject_total.inc()
+                        _publish_ack(pub, correlation_id, "REJECT", "invalid CancelReplace payload")
+                        continue
 
-            recv_total.inc()
+                    proto_id = int(cr_msg.proto_id)
+                    qty = int(cr_msg.qty)
+                    price = float(cr_msg.limit_price)
 
-            route_total.labels(msg_type=msg_type).inc()
+                    err = _validate_qty_price(qty, price)
+                    if err:
+                        reject_total.inc()
+                        _publish_ack(pub, correlation_id, "REJECT", err)
+                        continue
+                    TRACER.mark(VALIDATED, trace)
 
-            if msg_type == "SimpleOrder":
-                # Expect payload: {symbol, action, qty, order_type?, limit_price?, account?}
-                try:
-                    p = SimpleOrderModel(**payload)
-                except Exception as e:
-                    reject_total.inc()
-                    _publish_ack(pub, correlation_id, "REJECT", f"bad payload: {e}")
-                    continue
-
-                symbol = p.symbol
-                action = p.action
-                qty = p.qty
-                order_type = p.order_type
-                limit_price = p.limit_price
-                account = p.account or ACCOUNT_ID_DEFAULT
-                idemp_key = p.idempotency_key or ""
-
-                if ALLOWED_SYMBOLS is not None and symbol not in ALLOWED_SYMBOLS:
-                    reject_total.inc()
-                    _publish_ack(pub, correlation_id, "REJECT", f"symbol {symbol} not allowed")
-                    continue
-                price = limit_price if order_type == "LMT" else 1.0
-                err = _validate_qty_price(qty, price)
-                if err:
-                    reject_total.inc()
-                    _publish_ack(pub, correlation_id, "REJECT", err)
-                    continue
-
-                # Idempotency: if key present and known, short-circuit
-                existing_order_id = _get_simple_order_mapping(conn, idemp_key) if idemp_key else None
-                if existing_order_id is not None:
-                    _publish_ack(pub, correlation_id, "ACCEPTED", extra={"order_id": existing_order_id, "idempotent": True})
-                    continue
-
-                contract = create_contract(symbol)
-                ib_order = make_order(action=action, order_type=order_type, quantity=qty, limit_px=limit_price, account=account)
-                try:
-                    order_id = app.send_order(contract, ib_order)
-                    _put_simple_order_mapping(conn, idemp_key, order_id)
-                    _publish_ack(pub, correlation_id, "ACCEPTED", extra={"order_id": order_id})
-                except Exception as e:
-                    reject_total.inc()
-                    _publish_ack(pub, correlation_id, "REJECT", f"send failed: {e}")
-
-            elif msg_type == "CancelReplaceRequest":
-                # Payload is base64-encoded protobuf bytes, or JSON dict with fields matching cr_pb2
-                cr_msg: Optional[cr_pb2.CancelReplaceRequest] = None
-                if isinstance(payload, dict):
-                    # Build from dict (best-effort)
+                    # Resolve existing mapping or create new by placing original if missing
+                    ib_id = _get_mapping(conn, proto_id)
                     try:
-                        cr_msg = cr_pb2.CancelReplaceRequest(
-                            proto_id=int(payload.get("proto_id", 0)),
-                            qty=int(payload.get("qty", 0)),
-                            limit_price=float(payload.get("limit_price", 0)),
-                            tif=str(payload.get("tif", "DAY")),
-                        )
+                        if ib_id is None:
+                            # Submit a fresh order if we don't have mapping
+                            symbol = (payload.get("symbol") if isinstance(payload, dict) else None) or os.getenv("ORDER_SYMBOL", "AAPL").upper()
+                            if ALLOWED_SYMBOLS is not None and symbol not in ALLOWED_SYMBOLS:
+                                reject_total.inc()
+                                _publish_ack(pub, correlation_id, "REJECT", f"symbol {symbol} not allowed")
+                                continue
+                            contract = create_contract(symbol)
+                            ib_order = make_order(action="BUY", order_type="LMT", quantity=qty, limit_px=price, account=ACCOUNT_ID_DEFAULT)
+                            ib_id = app.send_order(contract, ib_order)
+                            _put_mapping(conn, proto_id, ib_id)
+                        else:
+                            # Replace existing (update qty/price)
+                            updated = make_order(action="BUY", order_type="LMT", quantity=qty, limit_px=price, account=ACCOUNT_ID_DEFAULT)
+                            app.replace_order(ib_id, updated)
+                        _publish_ack(pub, correlation_id, "ACCEPTED", extra={"ib_id": ib_id, "proto_id": proto_id})
                     except Exception as e:
-                        cr_msg = None
+                        reject_total.inc()
+                        _publish_ack(pub, correlation_id, "REJECT", f"cancel/replace failed: {e}")
                 else:
-                    # For now we only support dict; binary support requires base64 decode
-                    cr_msg = None
-
-                if cr_msg is None:
-                    reject_total.inc()
-                    _publish_ack(pub, correlation_id, "REJECT", "invalid CancelReplace payload")
-                    continue
-
-                proto_id = int(cr_msg.proto_id)
-                qty = int(cr_msg.qty)
-                price = float(cr_msg.limit_price)
-
-                err = _validate_qty_price(qty, price)
-                if err:
-                    reject_total.inc()
-                    _publish_ack(pub, correlation_id, "REJECT", err)
-                    continue
-
-                # Resolve existing mapping or create new by placing original if missing
-                ib_id = _get_mapping(conn, proto_id)
-                try:
-                    if ib_id is None:
-                        # Submit a fresh order if we don't have mapping
-                        symbol = (payload.get("symbol") if isinstance(payload, dict) else None) or os.getenv("ORDER_SYMBOL", "AAPL").upper()
-                        if ALLOWED_SYMBOLS is not None and symbol not in ALLOWED_SYMBOLS:
-                            reject_total.inc()
-                            _publish_ack(pub, correlation_id, "REJECT", f"symbol {symbol} not allowed")
-                            continue
-                        contract = create_contract(symbol)
-                        ib_order = make_order(action="BUY", order_type="LMT", quantity=qty, limit_px=price, account=ACCOUNT_ID_DEFAULT)
-                        ib_id = app.send_order(contract, ib_order)
-                        _put_mapping(conn, proto_id, ib_id)
-                    else:
-                        # Replace existing (update qty/price)
-                        updated = make_order(action="BUY", order_type="LMT", quantity=qty, limit_px=price, account=ACCOUNT_ID_DEFAULT)
-                        app.replace_order(ib_id, updated)
-                    _publish_ack(pub, correlation_id, "ACCEPTED", extra={"ib_id": ib_id, "proto_id": proto_id})
-                except Exception as e:
                     reject_total.inc()
-                    _publish_ack(pub, correlation_id, "REJECT", f"cancel/replace failed: {e}")
-            else:
-                reject_total.inc()
-                _publish_ack(pub, correlation_id, "REJECT", f"unsupported msg_type {msg_type}")
+                    _publish_ack(pub, correlation_id, "REJECT", f"unsupported msg_type {msg_type}")
+        finally:
+            TRACER.end(trace)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: shared_proto/execution.proto
+# Protobuf Python Version: 6.31.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    6,
+    31,
+    1,
+    '',
+    'shared_proto/execution.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1cshared_proto/execution.proto\x12\x0cshared_proto\"\xe5\x01\n\tExecution\x12\x12\n\nts_unix_ns\x18\x01 \x01(\x03\x12\x0f\n\x07\x65xec_id\x18\x02 \x01(\t\x12\x10\n\x08order_id\x18\x03 \x01(\x05\x12\x0e\n\x06symbol\x18\x04 \x01(\t\x12\x0c\n\x04side\x18\x05 \x01(\t\x12\x0b\n\x03qty\x18\x06 \x01(\x01\x12\n\n\x02px\x18\x07 \x01(\x01\x12\x12\n\ncommission\x18\x08 \x01(\x01\x12\x10\n\x08\x63urrency\x18\t \x01(\t\x12\x11\n\tliquidity\x18\n \x01(\t\x12\x14\n\x0crealized_pnl\x18\x0b \x01(\x01\x12\x0e\n\x06\x63on_id\x18\x0c \x01(\x05\x12\x0b\n\x03seq\x18\r \x01(\x04\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'shared_proto.execution_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_EXECUTION']._serialized_start=47
+  _globals['_EXECUTION']._serialized_end=276
+# @@protoc_insertion_point(module_scope)
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1fshared_proto/order_update.proto\x12\x0cshared_proto\"\x84\x01\n\x0bOrderUpdate\x12\x12\n\nts_unix_ns\x18\x01 \x01(\x03\x12\x0e\n\x06symbol\x18\x02 \x01(\t\x12\x0c\n\x04side\x18\x03 \x01(\t\x12\x0f\n\x07\x66ill_px\x18\x04 \x01(\x01\x12\x10\n\x08\x66ill_qty\x18\x05 \x01(\x05\x12\x0e\n\x06status\x18\x06 \x01(\t\x12\x10\n\x08order_id\x18\x07 \x01(\x05\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1fshared_proto/order_update.proto\x12\x0cshared_proto\"\xa1\x01\n\x0bOrderUpdate\x12\x12\n\nts_unix_ns\x18\x01 \x01(\x03\x12\x0e\n\x06symbol\x18\x02 \x01(\t\x12\x0c\n\x04side\x18\x03 \x01(\t\x12\x0f\n\x07\x66ill_px\x18\x04 \x01(\x01\x12\x10\n\x08\x66ill_qty\x18\x05 \x01(\x05\x12\x0e\n\x06status\x18\x06 \x01(\t\x12\x10\n\x08order_id\x18\x07 \x01(\x05\x12\x0e\n\x06mid_px\x18\x08 \x01(\x01\x12\x0b\n\x03seq\x18\t \x01(\x04\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -32,5 +32,5 @@ _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'shared_proto.order_update_p
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
   _globals['_ORDERUPDATE']._serialized_start=50
-  _globals['_ORDERUPDATE']._serialized_end=182
+  _globals['_ORDERUPDATE']._serialized_end=211
 # @@protoc_insertion_point(module_scope)
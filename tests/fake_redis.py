@@ -0,0 +1,82 @@
+"""In-process stand-in for the bits of ``redis.Redis`` the services use.
+
+Supports ``get``/``set``/``delete``, ``publish`` and ``pubsub()`` with
+``subscribe``/``get_message(timeout=…)``; ``SET``/``DEL`` also emit
+keyspace notifications (``__keyspace@0__:<key>``) like a server running
+with ``notify-keyspace-events K$``.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+
+
+class FakePubSub:
+    def __init__(self, server: "FakeRedis", ignore_subscribe_messages: bool = False):
+        self.server = server
+        self.channels = set()
+        self.messages = deque()
+        self.cond = threading.Condition()
+        self.closed = False
+
+    def subscribe(self, *channels):
+        self.channels.update(channels)
+        self.server.subscribers.append(self)
+
+    def deliver(self, channel: str, data) -> None:
+        if channel in self.channels:
+            with self.cond:
+                self.messages.append(
+                    {"type": "message", "pattern": None, "channel": channel.encode(), "data": data}
+                )
+                self.cond.notify_all()
+
+    def get_message(self, ignore_subscribe_messages: bool = False, timeout: float = 0.0):
+        if self.server.broken:
+            raise ConnectionError("fake redis is down")
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while not self.messages:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self.cond.wait(remaining)
+            return self.messages.popleft()
+
+    def close(self):
+        self.closed = True
+        if self in self.server.subscribers:
+            self.server.subscribers.remove(self)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.subscribers = []
+        self.broken = False  # make pub/sub raise, as after a dropped connection
+        self.connection_pool = type("Pool", (), {"connection_kwargs": {"db": 0}})()
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+        self.publish(f"__keyspace@0__:{key}", b"set")
+        return True
+
+    def delete(self, key):
+        self.data.pop(key, None)
+        self.publish(f"__keyspace@0__:{key}", b"del")
+
+    def publish(self, channel, message):
+        data = message.encode() if isinstance(message, str) else message
+        for sub in list(self.subscribers):
+            sub.deliver(channel, data)
+        return len(self.subscribers)
+
+    def pubsub(self, ignore_subscribe_messages: bool = False):
+        if self.broken:
+            raise ConnectionError("fake redis is down")
+        return FakePubSub(self, ignore_subscribe_messages)
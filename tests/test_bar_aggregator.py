@@ -0,0 +1,88 @@
+import pytest
+
+from scripts.bar_aggregator import BarAggregator, BarPublisher, parse_specs
+from shared_proto.bar_pb2 import Bar
+
+S = 1_000_000_000
+T0 = 1_705_505_400 * S  # 2024-01-17 15:30:00 UTC, minute aligned
+
+
+class ListSocket:
+    def __init__(self):
+        self.sent = []
+
+    def send_multipart(self, frames):
+        topic, payload = frames
+        self.sent.append((topic, Bar.FromString(payload)))
+
+
+@pytest.fixture
+def sent():
+    return ListSocket()
+
+
+def _agg(specs, sock, **kw):
+    return BarAggregator(parse_specs(specs), BarPublisher(sock), **kw)
+
+
+def _bars(sock):
+    return [(b.spec, b.open, b.high, b.low, b.close, b.volume, b.ticks) for _, b in sock.sent]
+
+
+def test_parse_specs():
+    specs = parse_specs("1s, 1m,500t,10000v")
+    assert [(s.name, s.kind, s.size) for s in specs] == [
+        ("1s", "time", S),
+        ("1m", "time", 60 * S),
+        ("500t", "tick", 500),
+        ("10000v", "volume", 10_000),
+    ]
+    with pytest.raises(ValueError):
+        parse_specs("5x")
+
+
+def test_time_bars_close_on_next_bucket_or_timer(sent):
+    agg = _agg("1s", sent)
+    agg.update(T0 + 100, "AAPL", 0, 0, 10.0, 100)
+    agg.update(T0 + 200, "AAPL", 0, 0, 10.0, 100)  # quote-only repeat: not a trade
+    agg.update(T0 + 300, "AAPL", 0, 0, 10.5, 50)
+    agg.update(T0 + 400, "AAPL", 0, 0, 9.5, 10)
+    agg.update(T0 + S + 1, "AAPL", 0, 0, 10.1, 5)  # next bucket closes the first
+    assert _bars(sent) == [("1s", 10.0, 10.5, 9.5, 9.5, 160, 3)]
+    assert (sent.sent[0][1].start_ns, sent.sent[0][1].end_ns) == (T0, T0 + S)
+    assert sent.sent[0][0] == b"bars"
+
+    assert agg.flush_due(T0 + S + 2) == 0  # bucket still open
+    assert agg.flush_due(T0 + 2 * S) == 1
+    assert _bars(sent)[-1] == ("1s", 10.1, 10.1, 10.1, 10.1, 5, 1)
+
+
+def test_time_bars_flush_on_tick_clock_for_replays(sent):
+    agg = _agg("1s", sent)
+    agg.update(T0 + 100, "AAPL", 0, 0, 10.0, 100)  # recorded long ago
+    assert agg.flush_due() == 0  # wall clock is far ahead; the tick clock is not
+    agg.update(T0 + S + 5, "MSFT", 0, 0, 20.0, 10)  # another symbol moves the clock
+    assert agg.flush_due() == 1
+    assert _bars(sent) == [("1s", 10.0, 10.0, 10.0, 10.0, 100, 1)]
+
+
+def test_tick_and_volume_bars_multi_timeframe(sent):
+    agg = _agg("2t,300v", sent)
+    for i, (px, qty) in enumerate([(10.0, 100), (10.2, 100), (10.1, 150), (10.3, 50)]):
+        agg.update(T0 + i, "MSFT", 0, 0, px, qty)
+    assert _bars(sent) == [
+        ("2t", 10.0, 10.2, 10.0, 10.2, 200, 2),
+        ("300v", 10.0, 10.2, 10.0, 10.1, 350, 3),
+        ("2t", 10.1, 10.3, 10.1, 10.3, 200, 2),
+    ]
+
+
+def test_symbols_independent_and_mid_mode(sent):
+    agg = _agg("2t", sent, use_mid=True)
+    agg.update(T0, "A", 10.0, 10.2, 0, 0)
+    agg.update(T0, "B", 20.0, 20.2, 0, 0)
+    agg.update(T0 + 1, "A", 0, 10.2, 0, 0)  # one-sided quote ignored
+    agg.update(T0 + 2, "A", 10.2, 10.4, 0, 0)
+    assert _bars(sent) == [("2t", 10.1, 10.3, 10.1, 10.3, 0, 2)]
+    assert agg.flush_all() == 1
+    assert sent.sent[-1][1].symbol == "B"
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.bar_store import BarStore, import_sqlite
+
+
+def _bars(start, n, close0=10.0, freq="1D"):
+    idx = pd.date_range(start, periods=n, freq=freq, tz="UTC")
+    close = close0 + np.arange(n, dtype=float)
+    return pd.DataFrame(
+        {"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 100.0}, index=idx
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BarStore(tmp_path / "bars")
+
+
+def test_partitioned_by_month_and_mmapped(store):
+    assert store.write("aapl", "1d", _bars("2024-01-30", 4)) == 4  # spans Jan/Feb
+    assert sorted(p.name for p in (store.root / "1d" / "AAPL").iterdir()) == ["2024-01", "2024-02"]
+
+    one = store.read("AAPL", "1d", "2024-01-30", "2024-02-01")
+    assert isinstance(one["close"], np.memmap)  # single partition → no copy
+    assert one["close"].tolist() == [10.0, 11.0]
+
+    both = store.read("AAPL", "1d", "2024-01-31", "2024-02-03")
+    assert both["close"].tolist() == [11.0, 12.0, 13.0]
+    assert store.read("AAPL", "1d", "2023-01-01", "2023-02-01")["ts"].size == 0
+
+
+def test_write_merges_and_new_data_wins(store):
+    store.write("AAPL", "1d", _bars("2024-01-01", 3))
+    store.write("AAPL", "1d", _bars("2024-01-03", 2, close0=50.0))
+    cols = store.read("AAPL", "1d", "2024-01-01", "2024-02-01")
+    assert cols["close"].tolist() == [10.0, 11.0, 50.0, 51.0]
+    assert np.all(np.diff(cols["ts"]) > 0)
+
+
+def test_load_bars_aligns_symbols(store):
+    store.write("AAPL", "1d", _bars("2024-01-01", 3))
+    store.write("MSFT", "1d", _bars("2024-01-02", 3, close0=20.0))
+    bars = store.load_bars(["AAPL", "MSFT", "NONE"], "2024-01-01", "2024-01-04")
+    assert bars.symbols == ["AAPL", "MSFT", "NONE"]
+    assert bars.ts.tolist() == [1_704_067_200, 1_704_153_600, 1_704_240_000]
+    assert bars.close.shape == (3, 3)
+    np.testing.assert_array_equal(bars.close[0], [10.0, 11.0, 12.0])
+    np.testing.assert_array_equal(bars.close[1], [np.nan, 20.0, 21.0])
+    assert np.isnan(bars.close[2]).all()
+
+
+def test_import_from_yahoo_sqlite(store, tmp_path):
+    from data.yahoo_data import store_to_sqlite
+
+    db = tmp_path / "yahoo.sqlite"
+    store_to_sqlite(_bars("2024-01-01", 5), "AAPL", interval="1d", db_path=str(db))
+    assert import_sqlite(store, db) == 5
+    assert store.symbols("1d") == ["AAPL"]
+    assert store.read("AAPL", "1d", "2024-01-01", "2024-01-06")["volume"].sum() == 500.0
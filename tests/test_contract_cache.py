@@ -0,0 +1,31 @@
+from types import SimpleNamespace
+
+from scripts.contract_cache import ContractCache, option_key, stock_key
+
+
+def test_option_key_normalises():
+    assert option_key("aapl", "20250117", "c", 150) == option_key("AAPL", "20250117", "C", 150.0)
+    assert option_key("SPX", "20250117", "C", 12345.25) != option_key("SPX", "20250117", "C", 12345.2)
+    assert stock_key("msft") == "STK:MSFT:SMART:USD"
+
+
+def test_cache_roundtrip_and_discard(tmp_path):
+    path = tmp_path / "contracts.json"
+    cache = ContractCache(path)
+    cache.put(stock_key("AAPL"), SimpleNamespace(symbol="AAPL", conId=265598, localSymbol="AAPL"))
+    cache.save()
+
+    warm = ContractCache(path)
+    assert warm.get(stock_key("AAPL")) == {"symbol": "AAPL", "conId": 265598, "localSymbol": "AAPL"}
+    warm.discard(stock_key("AAPL"))
+    warm.save()
+    assert stock_key("AAPL") not in ContractCache(path)
+
+
+def test_cache_ignores_unqualified_and_corrupt(tmp_path):
+    path = tmp_path / "contracts.json"
+    path.write_text("{not json")
+    cache = ContractCache(path)
+    assert len(cache) == 0
+    cache.put("STK:X:SMART:USD", SimpleNamespace(symbol="X", conId=0))
+    assert "STK:X:SMART:USD" not in cache
@@ -0,0 +1,131 @@
+import threading
+import time
+
+from freezegun import freeze_time
+from ibapi.contract import Contract
+
+from risk.throttle import ContractSpec, Throttle
+from scripts.flatten import flatten
+
+
+def _contract(symbol, con_id):
+    c = Contract()
+    c.symbol, c.conId, c.secType, c.currency = symbol, con_id, "STK", "USD"
+    return c
+
+
+class FakeApp:
+    """The slice of TradingApp the flatten engine uses; fills on a timer."""
+
+    def __init__(self, positions, *, fill_after=0.01, reject=(), max_orders_per_sec=20):
+        self.account = "DU123"
+        self.throttle = Throttle(max_orders_per_sec=max_orders_per_sec)
+        self.order_statuses = {}
+        self.order_cv = threading.Condition()
+        self.positions = positions
+        self.fill_after = fill_after
+        self.reject = set(reject)
+        self.calls = []
+        self.placed = {}
+        self._next_id = 100
+
+    def cancel_all_orders(self):
+        self.calls.append("cancel")
+
+    def position_snapshot(self, timeout=2.0):
+        self.calls.append("snapshot")
+        return list(self.positions)
+
+    def reserve_order_ids(self, n):
+        self.calls.append(("reserve", n))
+        base, self._next_id = self._next_id, self._next_id + n
+        return base
+
+    def placeOrder(self, oid, contract, order):
+        self.calls.append("place")
+        self.placed[oid] = (time.monotonic(), contract, order)
+        if self.fill_after is not None:
+            status = "Inactive" if contract.symbol in self.reject else "Filled"
+            threading.Timer(self.fill_after, self._status, (oid, status)).start()
+
+    def _status(self, oid, status):
+        with self.order_cv:
+            self.order_statuses[oid] = {"status": status}
+            self.order_cv.notify_all()
+
+
+def test_cancel_first_then_burst_from_book():
+    app = FakeApp([(_contract("AAPL", 1), 10.0), (_contract("MSFT", 2), -5.0)])
+    report = flatten(app, deadline_s=2)
+
+    assert app.calls[:3] == ["cancel", "snapshot", ("reserve", 2)]
+    assert app.calls.count("place") == 2
+    assert report.orders == {100: "AAPL", 101: "MSFT"}
+    _, contract, order = app.placed[100]
+    assert (order.action, order.totalQuantity, order.orderType) == ("SELL", 10.0, "MKT")
+    assert contract.exchange == "SMART" and order.account == "DU123"
+    assert app.placed[101][2].action == "BUY"
+
+    assert report.flat
+    assert sorted(report.filled) == [100, 101]
+    assert 0 < report.time_to_flat_s < 1
+
+
+def test_deadline_and_rejects_reported():
+    app = FakeApp([(_contract("AAPL", 1), 10.0), (_contract("TSLA", 3), 1.0)], reject={"TSLA"})
+    report = flatten(app, deadline_s=0.5, cancel_first=False)
+    assert "cancel" not in app.calls
+    assert report.failed == [101] and report.filled == [100]
+    assert not report.flat
+
+    app = FakeApp([(_contract("AAPL", 1), 10.0)], fill_after=None)
+    t0 = time.monotonic()
+    report = flatten(app, deadline_s=0.1)
+    assert 0.1 <= time.monotonic() - t0 < 0.5
+    assert report.pending == [100] and not report.flat
+
+
+def test_no_positions_is_flat():
+    app = FakeApp([])
+    report = flatten(app, deadline_s=1)
+    assert report.flat and report.orders == {}
+    assert app.calls == ["cancel", "snapshot"]
+
+
+def test_burst_waits_for_throttle_window():
+    app = FakeApp([(_contract(f"S{i}", i), 1.0) for i in range(3)], max_orders_per_sec=2)
+    report = flatten(app, deadline_s=3)
+    sent = sorted(t for t, _, _ in app.placed.values())
+    assert sent[1] - sent[0] < 0.1  # first two in one burst
+    assert sent[2] - sent[0] >= 0.9  # third waits for the next window
+    assert report.flat
+
+
+def test_next_window_in():
+    t = Throttle(max_orders_per_sec=1)
+    c = ContractSpec(symbol="AAPL")
+    with freeze_time("2024-01-01 00:00:00") as frozen:
+        assert t.next_window_in() == 0.0
+        t.block_if_needed(c, 1, 0.0)
+        frozen.tick(0.25)
+        assert abs(t.next_window_in() - 0.75) < 1e-6
+        frozen.tick(0.8)
+        assert t.next_window_in() == 0.0
+
+
+def test_position_stream_survives_request_positions(monkeypatch):
+    from scripts.core import TradingApp
+
+    monkeypatch.setattr(TradingApp, "_connect_ib", lambda self: self._connected_evt.set())
+    monkeypatch.setattr("scripts.core.time.sleep", lambda *_: None)
+    app = TradingApp(account="DU123")
+    app.reqAccountUpdates = lambda *a: None
+
+    app.request_positions()
+    app.position("DU123", _contract("AAPL", 1), 10, 150.0)
+    app.position("DU999", _contract("MSFT", 2), 5, 300.0)  # other account
+    app.positionEnd()
+    assert [(c.symbol, q) for c, q in app.position_snapshot()] == [("AAPL", 10.0)]
+
+    app.position("DU123", _contract("AAPL", 1), 0, 150.0)
+    assert app.position_snapshot() == []
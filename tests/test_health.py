@@ -0,0 +1,81 @@
+import time
+
+from fastapi import Response
+
+from scripts.health import HEALTH, HealthRegistry
+
+
+def test_ready_reflects_component_state():
+    reg = HealthRegistry()
+    assert reg.ready() == (True, {})
+
+    reg.set("ib:1", True)
+    reg.depth("order_buffer:1", 3, max_depth=5)
+    assert reg.ready()[0]
+
+    reg.set("ib:1", False, "connection closed")
+    reg.depth("order_buffer:1", 6)
+    ok, problems = reg.ready()
+    assert not ok
+    assert problems == {"ib:1": "connection closed", "order_buffer:1": "depth 6 > 5"}
+
+    reg.set("ib:1", True)
+    reg.depth("order_buffer:1", 0)
+    assert reg.ready() == (True, {})
+    reg.remove("ib:1")
+    assert "ib:1" not in reg.snapshot()
+
+
+def test_required_components_and_staleness():
+    reg = HealthRegistry(["ib", " zmq ", ""])
+    ok, problems = reg.ready()
+    assert not ok and set(problems) == {"ib", "zmq"}
+
+    reg.set("ib:7", True)
+    loop = reg.component("zmq:listener", stale_after_s=0.01)
+    assert reg.ready()[0]
+    time.sleep(0.02)
+    ok, problems = reg.ready()
+    assert not ok and problems["zmq:listener"].startswith("no update")
+    loop.beat()
+    assert reg.ready()[0]
+
+
+def test_ready_endpoint_status(monkeypatch):
+    from api import health as api
+
+    reg = HealthRegistry()
+    monkeypatch.setattr(api, "HEALTH", reg)
+    resp = Response()
+    assert api.ready(resp) == {"status": "ok"}
+    assert resp.status_code is None or resp.status_code == 200
+
+    reg.set("ib:1", False, "connecting")
+    resp = Response()
+    body = api.ready(resp)
+    assert resp.status_code == 503
+    assert body["problems"] == {"ib:1": "connecting"}
+
+
+def test_global_registry_is_shared():
+    HEALTH.set("state_store", True)
+    try:
+        assert "state_store" in HEALTH.snapshot()
+    finally:
+        HEALTH.remove("state_store")
+
+
+def test_manual_disconnect_keeps_ib_ready(monkeypatch):
+    from scripts.core import TradingApp
+
+    monkeypatch.setattr(TradingApp, "_connect_ib", lambda self: self._connected_evt.set())
+    app = TradingApp(clientId=77)
+    try:
+        HEALTH.set("ib:77", True)
+        app._manual_disconnect = True
+        app.connectionClosed()
+        assert HEALTH.snapshot()["ib:77"]["ok"]
+        assert "order_buffer:77" not in HEALTH.snapshot()
+    finally:
+        HEALTH.remove("ib:77")
+        HEALTH.remove("order_buffer:77")
@@ -0,0 +1,96 @@
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+
+from scripts.history_cache import HistoryCache, interval_seconds, period_start
+
+DAY = 86_400
+T0 = 1_704_067_200  # 2024-01-01 00:00 UTC
+
+
+class FakeFetcher:
+    """Daily bars on every calendar day except Sundays."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, symbol, interval, start, end):
+        self.calls.append((int(start.timestamp()), int(end.timestamp())))
+        idx = pd.date_range(start.replace(hour=0), end, freq="1D", inclusive="left", tz="UTC")
+        idx = idx[(idx >= start) & (idx.dayofweek != 6)]
+        close = [float(t.day) for t in idx]
+        return pd.DataFrame(
+            {"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1.0}, index=idx
+        )
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def cache(tmp_path):
+    clock = Clock(T0 + 60 * DAY)
+    c = HistoryCache(tmp_path / "history.duckdb", live_ttl_s=60, offline=False, clock=clock)
+    c.fake = FakeFetcher()
+    c.register("fake", c.fake)
+    yield c
+    c.close()
+
+
+def test_interval_seconds():
+    assert [interval_seconds(i) for i in ("5m", "1h", "1d", "1wk")] == [300, 3600, DAY, 7 * DAY]
+
+
+def test_period_start_ytd_and_max():
+    now = datetime(2024, 3, 5, 15, 0, tzinfo=timezone.utc)
+    assert period_start("5d", now) == datetime(2024, 2, 29, 15, 0, tzinfo=timezone.utc)
+    assert period_start("ytd", now) == datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert period_start("max", now).timestamp() == 0
+
+
+def test_hit_partial_hit_and_gaps_without_bars(cache):
+    df = cache.get("fake", "AAPL", "1d", T0, T0 + 10 * DAY)
+    assert len(df) == 9  # Jan 7 is a Sunday
+    assert list(df.columns) == ["Open", "High", "Low", "Close", "Volume"]
+    assert cache.fake.calls == [(T0, T0 + 10 * DAY)]
+
+    cache.get("fake", "AAPL", "1d", T0 + 2 * DAY, T0 + 8 * DAY)  # inside → no fetch
+    cache.get("fake", "AAPL", "1d", T0 + 6 * DAY, T0 + 7 * DAY)  # empty Sunday is still covered
+    assert cache.fake.calls == [(T0, T0 + 10 * DAY)]
+
+    df = cache.get("fake", "AAPL", "1d", T0 - 2 * DAY, T0 + 12 * DAY)
+    assert cache.fake.calls[1:] == [(T0 - 2 * DAY, T0), (T0 + 10 * DAY, T0 + 12 * DAY)]
+    assert df.index.is_monotonic_increasing and len(df) == 12  # Dec 31 is a Sunday too
+
+    cache.get("fake", "MSFT", "1d", T0, T0 + DAY)  # other key → own fetch
+    assert len(cache.fake.calls) == 4
+
+
+def test_live_edge_expires_and_offline(cache):
+    now = cache.clock.now
+    cache.get("fake", "AAPL", "1d", now - 5 * DAY)
+    assert len(cache.fake.calls) == 1
+    cache.clock.now += 30
+    cache.get("fake", "AAPL", "1d", now - 5 * DAY)
+    assert len(cache.fake.calls) == 1  # live edge still fresh
+
+    cache.clock.now += 60
+    cache.get("fake", "AAPL", "1d", now - 5 * DAY)
+    # only the still-forming last bar (and the 90 s since) is fetched again
+    assert cache.fake.calls[-1] == (now - DAY, int(cache.clock.now))
+
+    cache.offline = True
+    df = cache.get("fake", "AAPL", "1d", now - 20 * DAY)
+    assert len(cache.fake.calls) == 2
+    assert df.index[0] >= pd.Timestamp(now - 5 * DAY, unit="s", tz="UTC")
+
+
+def test_unknown_source(cache):
+    with pytest.raises(KeyError):
+        cache.get("nope", "AAPL", "1d", T0, T0 + DAY)
@@ -0,0 +1,84 @@
+import threading
+import time
+
+from prometheus_client import REGISTRY
+
+import kill_switch
+from tests.fake_redis import FakeRedis
+
+
+class FakeApp:
+    def __init__(self):
+        self.calls = []
+        self.done = threading.Event()
+
+    def cancel_all_orders(self):
+        self.calls.append("cancel")
+
+    def close_all_positions(self, **_kw):
+        self.calls.append("flatten")
+
+    def disconnect(self):
+        self.calls.append("disconnect")
+        self.done.set()
+
+
+def _run(app, r, poll_s):
+    t = threading.Thread(target=kill_switch.monitor, args=(app,), kwargs={"client": r, "poll_s": poll_s})
+    t.start()
+    return t
+
+
+def _wait_subscribed(r):
+    deadline = time.monotonic() + 2
+    while not r.subscribers and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert r.subscribers
+
+
+def _observed(path):
+    return REGISTRY.get_sample_value("kill_switch_trigger_to_cancel_ms_count", {"path": path}) or 0
+
+
+def test_pubsub_trigger_cancels_first_within_ms():
+    r, app = FakeRedis(), FakeApp()
+    before = _observed("pubsub")
+    t = _run(app, r, poll_s=30)  # heartbeat far away: only the push can be fast
+    _wait_subscribed(r)
+    t0 = time.monotonic()
+    kill_switch.trigger(r, "test")
+    assert app.done.wait(2)
+    assert time.monotonic() - t0 < 0.5
+    t.join(2)
+    assert app.calls == ["cancel", "flatten", "disconnect"]
+    assert _observed("pubsub") == before + 1
+
+
+def test_keyspace_event_from_plain_set():
+    r, app = FakeRedis(), FakeApp()
+    t = _run(app, r, poll_s=30)
+    _wait_subscribed(r)
+    r.set("KILL_SWITCH", "FALSE")  # keyspace event, but not a trigger
+    time.sleep(0.02)
+    assert app.calls == []
+    r.set("KILL_SWITCH", "TRUE")
+    assert app.done.wait(2)
+    t.join(2)
+    assert app.calls[:2] == ["cancel", "flatten"]
+
+
+def test_polling_fallback_when_pubsub_down():
+    r, app = FakeRedis(), FakeApp()
+    r.broken = True
+    t = _run(app, r, poll_s=0.01)
+    r.data["KILL_SWITCH"] = b"TRUE"  # no notification at all
+    assert app.done.wait(2)
+    t.join(2)
+    assert app.calls[:2] == ["cancel", "flatten"]
+
+
+def test_already_set_at_start():
+    r, app = FakeRedis(), FakeApp()
+    r.data["KILL_SWITCH"] = b"true"
+    kill_switch.monitor(app, client=r, poll_s=30)
+    assert app.calls == ["cancel", "flatten", "disconnect"]
@@ -1,14 +1,18 @@
 import asyncio
 import contextlib
+import logging
 import sys
 import threading
 import time
 import types
+import weakref
+from types import SimpleNamespace
 
 import pytest
 import zmq
 import zmq.asyncio
 
+from scripts.contract_cache import ContractCache, stock_key
 from shared_proto.market_data_pb2 import MarketTick
 
 # Synthetic tick sequence published by the fake IB client
@@ -40,6 +44,16 @@ TICKS = [
 ]
 
 
+class _Event(list):
+    def __iadd__(self, func):
+        self.append(func)
+        return self
+
+    def __isub__(self, func):
+        self.remove(func)
+        return self
+
+
 @pytest.fixture
 def publisher(monkeypatch):
     """Return the patched market_data_publisher module."""
@@ -49,24 +63,25 @@ def publisher(monkeypatch):
     class FakeTicker:
         def __init__(self, contract):
             self.contract = contract
-            class _Event(list):
-                def __iadd__(self, func):
-                    self.append(func)
-                    return self
             self.updateEvent = _Event()
             self.bid = self.ask = self.last = 0.0
             self.bidSize = self.askSize = self.lastSize = 0
             self.marketCenter = "TEST"
 
     class FakeIB:
+        def __init__(self):
+            self.errorEvent = _Event()
+
         def connect(self, *a, **k):
             pass
 
         def disconnect(self):
             pass
 
-        def qualifyContracts(self, *a, **k):
-            pass
+        def qualifyContracts(self, *contracts):
+            for i, c in enumerate(contracts, start=1):
+                c.conId = i
+            return list(contracts)
 
         def reqMktData(self, contract, *a):
             ticker = FakeTicker(contract)
@@ -94,12 +109,15 @@ def publisher(monkeypatch):
 
     fake_mod = types.ModuleType("ib_insync")
     fake_mod.IB = FakeIB
-    fake_mod.Stock = lambda sym, exch, cur: SimpleNamespace(symbol=sym)
-    sys.modules["ib_insync"] = fake_mod
+    fake_mod.Stock = lambda sym, exch, cur: SimpleNamespace(symbol=sym, conId=0)
+    fake_mod.Option = lambda sym, **k: SimpleNamespace(symbol=sym, conId=0, **k)
+    monkeypatch.setitem(sys.modules, "ib_insync", fake_mod)  # restored after the test
 
     mdp = importlib.import_module("scripts.market_data_publisher")
 
     monkeypatch.setattr(mdp, "IB", lambda: FakeIB())
+    monkeypatch.setattr(mdp, "Stock", fake_mod.Stock)
+    monkeypatch.setattr(mdp, "Option", fake_mod.Option)
     monkeypatch.setattr(mdp, "start_http_server", lambda *a, **k: None)
     monkeypatch.setattr(mdp.signal, "signal", lambda *a, **k: None)
 
@@ -112,6 +130,8 @@ def publisher(monkeypatch):
 
     monkeypatch.setattr(mdp, "ticks_total", DummyMetric())
     monkeypatch.setattr(mdp, "tick_latency_ms", DummyMetric())
+    monkeypatch.setattr(mdp, "_HANDLERS", weakref.WeakSet())
+    monkeypatch.setattr(mdp, "_SUBSCRIPTIONS", {})
 
     mdp._SHUTDOWN = False
     return mdp
@@ -127,6 +147,8 @@ def run_publisher(mdp):
         "AAPL",
         "--zmq-addr",
         "inproc://test",
+        "--contract-cache",
+        "",
     ]
     thread = threading.Thread(target=mdp.main, daemon=True)
     thread.start()
@@ -160,9 +182,7 @@ async def test_market_tick_flow(publisher):
             msg = MarketTick()
             msg.ParseFromString(payload)
             received.append(msg)
-
-    sub.close()
-    ctx.term()
+        sub.close()  # before shutdown: main() terminates the shared context
 
     assert len(received) >= 3
     for msg, vals in zip(received[:3], TICKS):
@@ -173,3 +193,266 @@ async def test_market_tick_flow(publisher):
         assert msg.bid_size == vals["bid_size"]
         assert msg.ask_size == vals["ask_size"]
         assert msg.last_size == vals["last_size"]
+
+
+class QualifyIB:
+    """Records bulk-qualification batches and pacing sleeps."""
+
+    CON_IDS = {"AAPL": 265598, "MSFT": 272093}
+
+    def __init__(self):
+        self.qualify_calls = []
+        self.cancelled = []
+        self.slept = 0.0
+
+    def qualifyContracts(self, *contracts):
+        self.qualify_calls.append(len(contracts))
+        for c in contracts:
+            c.conId = self.CON_IDS.get(c.symbol, 0)
+        return [c for c in contracts if c.conId]
+
+    def reqMktData(self, contract, *a):
+        # Like ib_insync: one Ticker per contract object, reused on re-request
+        tickers = self.__dict__.setdefault("tickers", {})
+        if id(contract) not in tickers:
+            tickers[id(contract)] = SimpleNamespace(contract=contract, updateEvent=_Event())
+        return tickers[id(contract)]
+
+    def cancelMktData(self, contract):
+        self.cancelled.append(contract)
+
+    def sleep(self, t):
+        self.slept += t
+
+
+def _pending(*syms):
+    return [(stock_key(s), SimpleNamespace(symbol=s, conId=0)) for s in syms]
+
+
+def test_bulk_qualify_then_warm_restart(publisher, tmp_path):
+    mdp = publisher
+    path = tmp_path / "contracts.json"
+    log = logging.getLogger("test")
+
+    ib = QualifyIB()
+    out = mdp._qualify(ib, _pending("AAPL", "MSFT", "BOGUS"), ContractCache(path), mdp._Pacer(ib, 2), log)
+    assert [c.symbol for c in out] == ["AAPL", "MSFT"]
+    assert ib.qualify_calls == [2, 1]  # paced bulk batches, not one per contract
+    assert ib.slept > 0  # second batch waited for the next 1 s window
+
+    # Warm restart: everything IB knew comes straight from disk
+    ib = QualifyIB()
+    out = mdp._qualify(ib, _pending("AAPL", "MSFT"), ContractCache(path), mdp._Pacer(ib, 50), log)
+    assert ib.qualify_calls == []
+    assert [(c.symbol, c.conId) for c in out] == [("AAPL", 265598), ("MSFT", 272093)]
+
+
+def test_stale_cache_entry_is_requalified(publisher, tmp_path):
+    mdp = publisher
+    path = tmp_path / "contracts.json"
+    log = logging.getLogger("test")
+    cache = ContractCache(path)
+    cache.put(stock_key("AAPL"), SimpleNamespace(symbol="AAPL", conId=111))  # pre-split conId
+
+    ib = QualifyIB()
+    pacer = mdp._Pacer(ib, 50)
+    watch = mdp._StaleWatch()
+    (contract,) = mdp._qualify(ib, _pending("AAPL"), cache, pacer, log, watch)
+    assert contract.conId == 111 and ib.qualify_calls == []
+
+    watch.on_error(1, 200, "No security definition has been found", contract)
+    dropped, fresh = mdp._requalify_stale(ib, None, watch, cache, pacer, log)
+
+    assert dropped == [contract] and ib.cancelled == [contract]
+    assert ib.qualify_calls == [1]
+    assert [t.contract.conId for t in fresh] == [265598]
+    assert ContractCache(path).get(stock_key("AAPL"))["conId"] == 265598
+
+
+def test_requalify_publishes_each_tick_once(publisher, tmp_path):
+    mdp = publisher
+    log = logging.getLogger("test")
+    cache = ContractCache(tmp_path / "contracts.json")
+    cache.put(stock_key("AAPL"), SimpleNamespace(symbol="AAPL", conId=111))
+
+    ib = QualifyIB()
+    pacer = mdp._Pacer(ib, 50)
+    watch = mdp._StaleWatch()
+    frames = []
+    sock = SimpleNamespace(send_multipart=frames.append)
+    (ticker,) = mdp._subscribe(ib, sock, mdp._qualify(ib, _pending("AAPL"), cache, pacer, log, watch), pacer)
+
+    for _ in range(2):  # each requalify hands back the same Ticker object
+        watch.on_error(1, 200, "No security definition has been found", ticker.contract)
+        _, (fresh,) = mdp._requalify_stale(ib, sock, watch, cache, pacer, log)
+        assert fresh is ticker
+        watch.add(stock_key("AAPL"), ticker.contract)
+
+    ticker.bid = ticker.ask = ticker.last = 1.0
+    ticker.bidSize = ticker.askSize = ticker.lastSize = 1
+    for cb in list(ticker.updateEvent):
+        cb(ticker)
+    assert len(ticker.updateEvent) == 1
+    assert len(frames) == 1
+
+
+def test_chain_spec_and_plan(publisher):
+    mdp = publisher
+    assert mdp._parse_chain_spec("spy:20250117:2") == mdp.ChainSpec("SPY", "20250117", 2)
+    assert mdp._parse_chain_spec("SPY:20250117").band == 10
+    with pytest.raises(ValueError):
+        mdp._parse_chain_spec("SPY:2025")
+
+    strikes = [95.0, 100.0, 105.0, 110.0, 115.0]
+    assert mdp._atm_index(strikes, 103.0) == 2
+    assert mdp._atm_index(strikes, 1.0) == 0
+    assert mdp._atm_index(strikes, 999.0) == 4
+
+    spy, qqq = mdp.ChainSpec("SPY", "20250117", 2), mdp.ChainSpec("QQQ", "20250117", 2)
+    plan = mdp._plan_lines([(spy, strikes, 2), (qqq, strikes, 2)], budget=6)
+    # Tight budget keeps each chain's ATM pair before any wing strike
+    assert {(s.symbol, k) for s, k, _ in plan[:4]} == {("SPY", 105.0), ("QQQ", 105.0)}
+    assert len(plan) == 6
+
+
+class ChainIB(QualifyIB):
+    def __init__(self):
+        super().__init__()
+        self.subscribed = []
+
+    def qualifyContracts(self, *contracts):
+        self.qualify_calls.append(len(contracts))
+        for c in contracts:
+            c.conId = int(getattr(c, "strike", 0) * 10) or self.CON_IDS.get(c.symbol, 0)
+        return list(contracts)
+
+    def reqMktData(self, contract, *a):
+        self.subscribed.append(contract)
+        return super().reqMktData(contract)
+
+    def reqSecDefOptParams(self, sym, _exch, _sec, _con_id):
+        return [
+            SimpleNamespace(
+                exchange="SMART",
+                tradingClass=sym,
+                expirations={"20250117"},
+                strikes=[90.0, 95.0, 100.0, 105.0, 110.0, 115.0],
+            )
+        ]
+
+
+def test_chain_manager_rotates_within_budget(publisher):
+    mdp = publisher
+    ib = ChainIB()
+    und = SimpleNamespace(contract=SimpleNamespace(symbol="AAPL", conId=265598), bid=0, ask=0, last=0)
+    mgr = mdp.OptionChainManager(
+        ib,
+        None,
+        [mdp.ChainSpec("AAPL", "20250117", 1)],
+        budget=4,
+        cache=None,
+        pacer=mdp._Pacer(ib, 50),
+        logger=logging.getLogger("test"),
+    )
+    mgr.start({"AAPL": und})  # reuses the already-streaming underlying
+    assert mgr.poll() is False  # no price yet → nothing subscribed
+
+    und.bid, und.ask = 99.9, 100.1
+    assert mgr.poll() is True
+    assert len(mgr.active) == 4 and mgr.lines == 4
+    assert {t.contract.strike for t in mgr.active.values()} <= {95.0, 100.0, 105.0}
+    assert mgr.poll() is False  # same ATM → no churn
+
+    ib.subscribed.clear()
+    ib.cancelled.clear()
+    und.bid, und.ask = 104.9, 105.1
+    assert mgr.poll() is True
+    assert len(mgr.active) == 4
+    # ATM 100 → {100C, 100P, 95C, 105C}; ATM 105 → {105C, 105P, 100C, 110C}
+    assert {(c.strike, c.right) for c in ib.cancelled} == {(95.0, "C"), (100.0, "P")}
+    assert {(c.strike, c.right) for c in ib.subscribed} == {(105.0, "P"), (110.0, "C")}
+    assert len(ib.subscribed) == len(ib.cancelled)  # incremental, not a restart
+
+    mgr.stop()
+    assert mgr.lines == 0
+
+
+def test_tick_handler_reuses_message_and_batches_metrics(publisher, monkeypatch):
+    mdp = publisher
+    calls = {"inc": 0, "observe": 0}
+
+    class CountingMetric:
+        def inc(self, n=1):
+            calls["inc"] += n
+
+        def observe(self, _v):
+            calls["observe"] += 1
+
+    monkeypatch.setattr(mdp, "ticks_total", CountingMetric())
+    monkeypatch.setattr(mdp, "tick_latency_ms", CountingMetric())
+    monkeypatch.setattr(mdp, "TICK_METRICS_EVERY", 4)
+
+    frames = []
+    sock = SimpleNamespace(send_multipart=frames.append)
+    handler = mdp._TickHandler(sock, SimpleNamespace(symbol="AAPL", localSymbol="AAPL  250117C00150000"))
+    msg = handler.msg
+    ticker = SimpleNamespace(bid=1.0, ask=1.1, last=1.05, bidSize=1, askSize=2, lastSize=3)
+    for _ in range(10):
+        handler(ticker)
+
+    assert handler.msg is msg
+    assert calls == {"inc": 8, "observe": 2}
+    handler.flush()
+    assert calls["inc"] == 10
+
+    decoded = MarketTick()
+    decoded.ParseFromString(frames[-1][1])
+    assert decoded.symbol == "AAPL  250117C00150000" and decoded.venue == "SMART"
+    assert decoded.last_size == 3
+
+    # Venue follows the ticker; a quiet handler's remainder goes out on the timer
+    ticker.lastExchange = "ARCA"
+    handler(ticker)
+    decoded.ParseFromString(frames[-1][1])
+    assert decoded.venue == "ARCA"
+    mdp._flush_tick_metrics()
+    assert calls["inc"] == 11
+
+
+def test_tick_handler_tees_into_journal(publisher, tmp_path):
+    from scripts.tick_journal import TickJournal, TickJournalReader, list_journals
+
+    mdp = publisher
+    journal = TickJournal(tmp_path, chunk_rows=8)
+    frames = []
+    sock = SimpleNamespace(send_multipart=frames.append)
+    handler = mdp._TickHandler(sock, SimpleNamespace(symbol="AAPL"), "SMART", journal)
+    for vals in TICKS:
+        ticker = SimpleNamespace(
+            bid=vals["bid_price"],
+            ask=vals["ask_price"],
+            last=vals["last_price"],
+            bidSize=vals["bid_size"],
+            askSize=vals["ask_size"],
+            lastSize=vals["last_size"],
+        )
+        handler(ticker)
+    journal.close()
+
+    (path,) = list_journals(tmp_path)
+    rows = list(TickJournalReader(path).scan())
+    assert len(rows) == len(frames) == 3
+    for row, (_, payload) in zip(rows, frames):
+        msg = MarketTick()
+        msg.ParseFromString(payload)
+        assert row == (
+            msg.ts_unix_ns,
+            msg.symbol,
+            msg.bid_price,
+            msg.ask_price,
+            msg.last_price,
+            msg.bid_size,
+            msg.ask_size,
+            msg.last_size,
+            msg.venue,
+        )
@@ -14,3 +14,104 @@ def test_start_idempotent(monkeypatch):
     ms.start(9999)
     ms.start(9999)
     assert calls == [9999, 9999]
+
+
+def _registry_metrics():
+    from prometheus_client import CollectorRegistry, Counter, Histogram
+
+    reg = CollectorRegistry()
+    c = Counter("t_fast_total", "t", ["symbol"], registry=reg)
+    h = Histogram("t_fast_seconds", "t", ["symbol"], buckets=(0.1, 1.0), registry=reg)
+    return reg, c, h
+
+
+def test_fast_counter_flushes_deltas_once():
+    from scripts.metrics_server import FastCounter
+
+    reg, c, _ = _registry_metrics()
+    fast = FastCounter(c)
+    fast.inc("AAPL")
+    fast.inc("AAPL", amount=2)
+    fast.inc("MSFT")
+    assert reg.get_sample_value("t_fast_total", {"symbol": "AAPL"}) is None  # not flushed yet
+    fast.flush()
+    fast.flush()
+    assert reg.get_sample_value("t_fast_total", {"symbol": "AAPL"}) == 3
+    assert reg.get_sample_value("t_fast_total", {"symbol": "MSFT"}) == 1
+    fast.inc("AAPL")
+    fast.flush()
+    assert reg.get_sample_value("t_fast_total", {"symbol": "AAPL"}) == 4
+
+
+def test_fast_histogram_matches_direct_observe():
+    from prometheus_client import CollectorRegistry, Histogram
+    from scripts.metrics_server import FastHistogram
+
+    reg, _, h = _registry_metrics()
+    ref_reg = CollectorRegistry()
+    ref = Histogram("t_fast_seconds", "t", ["symbol"], buckets=(0.1, 1.0), registry=ref_reg)
+    fast = FastHistogram(h)
+    for v in (0.05, 0.1, 0.5, 1.0, 3.0, 0.2):
+        fast.observe(v, "AAPL")
+        ref.labels("AAPL").observe(v)
+    with fast.time("AAPL"):
+        pass
+    ref.labels("AAPL").observe(0.0)
+    fast.flush()
+    for le in ("0.1", "1.0", "+Inf"):
+        labels = {"symbol": "AAPL", "le": le}
+        assert reg.get_sample_value("t_fast_seconds_bucket", labels) == ref_reg.get_sample_value(
+            "t_fast_seconds_bucket", labels
+        )
+    assert reg.get_sample_value("t_fast_seconds_count", {"symbol": "AAPL"}) == 7
+    assert abs(reg.get_sample_value("t_fast_seconds_sum", {"symbol": "AAPL"}) - 4.85) < 1e-3
+
+
+def test_fast_counter_threads_and_dead_shards():
+    import threading
+
+    from scripts.metrics_server import FastCounter
+
+    reg, c, _ = _registry_metrics()
+    fast = FastCounter(c)
+
+    def work():
+        for _ in range(1000):
+            fast.inc("AAPL")
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    fast.flush()
+    assert reg.get_sample_value("t_fast_total", {"symbol": "AAPL"}) == 4000
+    assert fast._shards == []  # finished threads are dropped once drained
+
+
+def test_fast_histogram_flushes_only_new_values():
+    from scripts.metrics_server import FastHistogram
+
+    reg, _, h = _registry_metrics()
+    fast = FastHistogram(h)
+    fast.observe(0.5, "AAPL")
+    fast.flush()
+    fast.flush()
+    fast.observe(2.0, "AAPL")
+    fast.flush()
+    assert reg.get_sample_value("t_fast_seconds_count", {"symbol": "AAPL"}) == 2
+    assert reg.get_sample_value("t_fast_seconds_bucket", {"symbol": "AAPL", "le": "1.0"}) == 1
+    assert reg.get_sample_value("t_fast_seconds_sum", {"symbol": "AAPL"}) == 2.5
+
+
+def test_dropped_facades_are_not_kept_alive():
+    import gc
+    import weakref
+
+    from scripts import metrics_server as ms
+
+    _, c, _ = _registry_metrics()
+    ref = weakref.ref(ms.FastCounter(c))
+    gc.collect()
+    assert ref() is None
+    ms.flush()
@@ -0,0 +1,233 @@
+import itertools
+import threading
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+# Imported at collection time: ib_insync needs a main-thread event loop on
+# import, and pytest-asyncio clears it after each async test.
+from scripts.order_status_relay import OrderStatusRelay, recover
+from shared_proto.execution_pb2 import Execution
+from shared_proto.order_update_pb2 import OrderUpdate
+
+
+class _Event(list):
+    def __iadd__(self, func):
+        self.append(func)
+        return self
+
+    def __isub__(self, func):
+        self.remove(func)
+        return self
+
+
+class FakeIB:
+    def __init__(self):
+        self.orderStatusEvent = _Event()
+        self.execDetailsEvent = _Event()
+        self.commissionReportEvent = _Event()
+        self.tickers = {}  # conId → ticker currently subscribed
+        self.cancelled = []
+
+    def reqMktData(self, contract):
+        t = SimpleNamespace(contract=contract, bid=float("nan"), ask=float("nan"))
+        self.tickers[contract.conId] = t
+        return t
+
+    def cancelMktData(self, contract):
+        del self.tickers[contract.conId]
+        self.cancelled.append(contract.conId)
+
+
+class ListSocket:
+    def __init__(self):
+        self.sent = []
+
+    def send_multipart(self, frames):
+        topic, payload = frames
+        msg = (Execution if topic == b"executions" else OrderUpdate)()
+        msg.ParseFromString(payload)
+        self.sent.append((topic, msg))
+
+    def close(self):
+        pass
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _trade(oid, status, filled=0.0, remaining=100.0, avg=0.0, con_id=265598):
+    return SimpleNamespace(
+        contract=SimpleNamespace(symbol="AAPL", conId=con_id),
+        order=SimpleNamespace(orderId=oid, action="BUY"),
+        orderStatus=SimpleNamespace(status=status, filled=filled, remaining=remaining, avgFillPrice=avg),
+    )
+
+
+_ADDRS = itertools.count()  # inproc names are released asynchronously after close()
+
+
+@pytest.fixture
+def relay():
+    clock = Clock()
+    addr = f"inproc://order-status-relay-test-{next(_ADDRS)}"
+    r = OrderStatusRelay(FakeIB(), addr, conflate_s=0.05, mid_cache_size=2, clock=clock).start()
+    r.sock.close()
+    r.sock = ListSocket()
+    r.clock_ = clock
+    yield r
+    r.close()
+
+
+def _fill(exec_id, shares=100, price=10.0, report=None):
+    return SimpleNamespace(
+        contract=SimpleNamespace(symbol="AAPL", conId=265598),
+        execution=SimpleNamespace(
+            execId=exec_id,
+            orderId=1,
+            time=datetime(2024, 1, 17, 15, 30, tzinfo=timezone.utc),
+            side="BOT",
+            shares=shares,
+            price=price,
+            lastLiquidity=2,
+        ),
+        commissionReport=report or SimpleNamespace(execId="", commission=0.0, currency="", realizedPNL=0.0),
+    )
+
+
+def _report(exec_id, commission=1.0, pnl=1.7976931348623157e308):
+    return SimpleNamespace(execId=exec_id, commission=commission, currency="USD", realizedPNL=pnl)
+
+
+def _sent(r):
+    return [(m.order_id, m.status, m.fill_qty) for t, m in r.sock.sent if t == b"order_updates"]
+
+
+def _execs(r):
+    return [m for t, m in r.sock.sent if t == b"executions"]
+
+
+def test_exact_duplicates_suppressed(relay):
+    relay.on_status(_trade(1, "Submitted"))
+    relay.on_status(_trade(1, "Submitted"))
+    relay.on_status(_trade(1, "Filled", 100, 0, 10.0))
+    relay.on_status(_trade(1, "Filled", 100, 0, 10.0))  # IB repeats the final status
+    assert _sent(relay) == [(1, "Submitted", 0), (1, "Filled", 100)]
+    assert relay.sock.sent[0][0] == b"order_updates"
+
+
+def test_partial_fills_conflated_and_terminal_immediate(relay):
+    clock = relay.clock_
+    relay.on_status(_trade(7, "Submitted"))
+    relay.on_status(_trade(7, "Submitted", 10, 90, 10.0))  # status unchanged, inside window
+    relay.on_status(_trade(7, "Submitted", 20, 80, 10.0))
+    relay.on_status(_trade(7, "Submitted", 30, 70, 10.0))
+    assert _sent(relay) == [(7, "Submitted", 0)]
+
+    assert relay.flush_due() == 0  # window still open
+    clock.now += 0.06
+    assert relay.flush_due() == 1
+    assert _sent(relay)[-1] == (7, "Submitted", 30)  # only the latest partial
+
+    relay.on_status(_trade(7, "Submitted", 40, 60, 10.0))  # held again
+    relay.on_status(_trade(7, "Filled", 100, 0, 10.0))  # terminal → immediate, supersedes hold
+    assert _sent(relay)[-1] == (7, "Filled", 100)
+    assert len(_sent(relay)) == 3
+    assert relay.flush_due(clock.now + 1) == 0
+
+
+def test_isolated_partial_fill_not_delayed(relay):
+    clock = relay.clock_
+    relay.on_status(_trade(3, "Submitted"))
+    clock.now += 1.0
+    relay.on_status(_trade(3, "Submitted", 5, 95, 10.0))
+    assert _sent(relay) == [(3, "Submitted", 0), (3, "Submitted", 5)]
+
+
+def test_mid_stamped_from_bounded_ticker_cache(relay):
+    ib = relay.ib
+    relay.on_status(_trade(1, "Submitted", con_id=11))
+    assert relay.sock.sent[-1][1].mid_px == 0.0  # no quote yet
+
+    ib.tickers[11].bid, ib.tickers[11].ask = 10.0, 10.2
+    relay.on_status(_trade(1, "Filled", 100, 0, 10.1, con_id=11))
+    assert relay.sock.sent[-1][1].mid_px == pytest.approx(10.1)
+
+    relay.on_status(_trade(2, "Submitted", con_id=22))
+    relay.on_status(_trade(3, "Submitted", con_id=33))  # capacity 2 → evicts 11
+    assert sorted(ib.tickers) == [22, 33]
+    assert ib.cancelled == [11]
+
+    relay.close()
+    assert ib.tickers == {}
+
+
+def test_mid_cache_disabled():
+    r = OrderStatusRelay(FakeIB(), "inproc://order-status-relay-nomid").start()  # off by default
+    r.sock.close()
+    r.sock = ListSocket()
+    r.on_status(_trade(1, "Submitted"))
+    assert r.ib.tickers == {}
+    assert r.sock.sent[-1][1].mid_px == 0.0
+    r.close()
+
+
+def test_updates_sequenced_and_recoverable():
+    addr = "inproc://order-status-relay-recovery"
+    r = OrderStatusRelay(
+        FakeIB(), "inproc://order-status-relay-seq", conflate_s=0, recovery_addr=addr, replay_size=3
+    ).start()
+    r.sock.close()
+    r.sock = ListSocket()
+    for oid in range(1, 6):
+        r.on_status(_trade(oid, "Submitted"))
+    assert [m.seq for _, m in r.sock.sent] == [1, 2, 3, 4, 5]
+
+    result = {}
+
+    def ask(first, last=0):
+        t = threading.Thread(target=lambda: result.update(got=recover(addr, first, last)))
+        t.start()
+        while t.is_alive():
+            r.serve_recovery()
+            t.join(0.001)
+        return result["got"]
+
+    updates, oldest, newest = ask(4)
+    assert [m.order_id for m in updates] == [4, 5]
+    assert (oldest, newest) == (3, 5)
+
+    updates, oldest, _ = ask(1, 3)  # 1 and 2 fell out of the buffer
+    assert [m.seq for m in updates] == [3]
+    assert oldest == 3
+    r.close()
+
+
+def test_executions_published_with_commission(relay):
+    clock = relay.clock_
+    fill = _fill("0001.01", shares=40, price=10.5)
+    relay.on_exec(None, fill)
+    assert _execs(relay) == []  # waiting for the commission report
+    relay.on_commission(None, fill, _report("0001.01", 0.35))
+    relay.on_exec(None, fill)  # re-delivered after reconnect
+    relay.on_exec(None, _fill("0001.02", 60, 10.6, report=_report("0001.02", 0.4, 12.5)))
+
+    first, second = _execs(relay)
+    assert (first.exec_id, first.qty, first.px, first.side) == ("0001.01", 40, 10.5, "BUY")
+    assert (first.commission, first.currency, first.realized_pnl) == (0.35, "USD", 0.0)
+    assert first.liquidity == "REMOVED"
+    assert first.ts_unix_ns == 1_705_505_400_000_000_000
+    assert (second.commission, second.realized_pnl) == (0.4, 12.5)
+    assert [m.seq for m in (first, second)] == [1, 2]  # own sequence per topic
+
+    relay.on_exec(None, _fill("0001.03"))  # report never arrives
+    assert relay.flush_due() == 0
+    clock.now += relay.commission_wait_s
+    assert relay.flush_due() == 1
+    assert (_execs(relay)[-1].exec_id, _execs(relay)[-1].commission) == ("0001.03", 0.0)
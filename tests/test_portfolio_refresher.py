@@ -0,0 +1,85 @@
+import logging
+import time
+from types import SimpleNamespace
+
+from ib.portfolio_refresher import PortfolioRefresher
+
+
+class FakeApp:
+    def __init__(self):
+        self.subscribed = []
+        self.portfolio = []
+
+    def reqAccountUpdates(self, subscribe, account):
+        self.subscribed.append(subscribe)
+
+    def updateAccountValue(self, key, val, currency, accountName):
+        pass
+
+    def updatePortfolio(self, contract, position, marketPrice, marketValue,
+                        averageCost, unrealizedPNL, realizedPNL, accountName):
+        self.portfolio.append((contract.symbol, position))
+
+
+def _wait(pred, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not pred() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return pred()
+
+
+def test_callbacks_feed_snapshot_and_chain(caplog):
+    app = FakeApp()
+    ref = PortfolioRefresher(app, min_interval_s=0.0, logger=logging.getLogger("t")).start()
+    try:
+        assert app.subscribed == [True]
+        app.updateAccountValue("NetLiquidation", "1000.5", "USD", "DU1")
+        app.updatePortfolio(SimpleNamespace(symbol="AAPL"), 10, 190.0, 1900.0, 180.0, 100.0, 0.0, "DU1")
+        assert app.portfolio == [("AAPL", 10)]  # original callback still runs
+        with caplog.at_level(logging.INFO, logger="t"):
+            assert _wait(lambda: "AAPL -> Pos: 10" in caplog.text)
+        assert "Net Liquidation: 1000.5" in caplog.text
+
+        app.updatePortfolio(SimpleNamespace(symbol="AAPL"), 0, 190.0, 0.0, 0.0, 0.0, 100.0, "DU1")
+        assert ref.positions == {}
+    finally:
+        ref.stop()
+    assert app.subscribed == [True, False]
+
+
+def test_ibwrapper_portfolio_list_not_grown():
+    from scripts.wrapper import IBWrapper
+
+    class WrapperApp(IBWrapper):
+        def reqAccountUpdates(self, subscribe, account):
+            pass
+
+    app = WrapperApp()
+    ref = PortfolioRefresher(app, min_interval_s=0.0, logger=logging.getLogger("t")).start()
+    try:
+        for px in (190.0, 191.0, 192.0):
+            app.updatePortfolio(SimpleNamespace(symbol="AAPL"), 10, px, 10 * px, 180.0, 0.0, 0.0, "DU1")
+        assert app.portfolio == []
+        assert ref.positions["AAPL"]["market_price"] == 192.0
+    finally:
+        ref.stop()
+
+
+def test_rate_limited_and_non_blocking():
+    app = FakeApp()
+    ref = PortfolioRefresher(app, min_interval_s=0.3, logger=logging.getLogger("t")).start()
+    try:
+        t0 = time.monotonic()
+        for _ in range(1000):
+            ref.mark_dirty()
+        assert time.monotonic() - t0 < 0.1
+        assert _wait(lambda: ref.logged == 1)
+        for _ in range(100):
+            ref.mark_dirty()
+        time.sleep(0.1)
+        assert ref.logged == 1  # still inside the 0.3 s window
+        assert _wait(lambda: ref.logged == 2)
+        time.sleep(0.35)
+        assert ref.logged == 2  # nothing changed since
+    finally:
+        ref.stop()
@@ -1,36 +1,58 @@
 """
-Import-only test – pulls in `scripts.cancel_replace_receiver` so that
-coverage counts the file, but without opening real ZMQ sockets _or_
-connecting to IB.  We deliberately raise `SystemExit` on the first
-`sock.recv()` so the top-level `while not SHUTDOWN:` loop bails out
-immediately; the test then asserts that exit.
+Import-only tests – importing the receivers must not parse argv, bind
+sockets, start the metrics exporter or connect to IB.  Each import runs in
+a fresh interpreter (module-level Prometheus metrics can only register
+once per process) with all of those patched to blow up.
 """
 
+import subprocess
 import sys
-import importlib
-from types import SimpleNamespace
-from unittest.mock import MagicMock
+from pathlib import Path
+
 import pytest
 
+ROOT = Path(__file__).resolve().parents[1]
 
-def test_import_receiver(monkeypatch):
-    # 1️⃣ Fake CLI so argparse inside the module sees no pytest flags
-    monkeypatch.setattr(sys, "argv", ["cancel_replace_receiver"])
+_PROBE = """
+import importlib, sys
+from unittest.mock import MagicMock
 
-    # 2️⃣ Stub TradingApp BEFORE import (blocks real IB connection)
-    fake_app_cls = MagicMock(name="TradingAppMock")
-    monkeypatch.setattr("scripts.core.TradingApp", fake_app_cls)
+boom = MagicMock(side_effect=AssertionError("side effect at import time"))
+sys.argv = ["probe", "--not-a-receiver-flag"]
+import zmq, prometheus_client, scripts.core, scripts.metrics_server
+zmq.Context.socket = boom
+prometheus_client.start_http_server = boom
+scripts.core.TradingApp = boom
+scripts.metrics_server.start = boom
 
-    # 3️⃣ Dummy ZMQ socket.  `recv()` immediately raises SystemExit which
-    #    terminates the receiver’s main loop at import-time.
-    dummy_sock = SimpleNamespace(
-        bind=lambda *a, **k: None,
-        close=lambda *a, **k: None,
-        setsockopt=lambda *a, **k: None,
-        recv=lambda *a, **k: (_ for _ in ()).throw(SystemExit),  # raise
+mod = importlib.import_module(%(name)r)
+assert callable(getattr(mod, %(factory)r)) and callable(mod.run)
+assert not boom.called, boom.call_args
+print("ok")
+"""
+
+
+@pytest.mark.parametrize(
+    "name, factory",
+    [
+        ("scripts.cancel_replace_receiver", "build_receiver"),
+        ("ib.ib_listener", "build_listener"),
+    ],
+)
+def test_import_is_side_effect_free(name, factory):
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE % {"name": name, "factory": factory}], cwd=ROOT, capture_output=True, text=True, timeout=60
     )
-    monkeypatch.setattr("zmq.Context.socket", lambda *a, **k: dummy_sock)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip().endswith("ok")
+
 
-    # 4️⃣ Import — we expect it to exit cleanly via our SystemExit
-    with pytest.raises(SystemExit):
-        importlib.import_module("scripts.cancel_replace_receiver")
+@pytest.mark.parametrize(
+    "name", ["scripts.v1_receiver", "scripts.cr_receiver", "scripts.cancel_replace_receiver", "ib.ib_listener"]
+)
+def test_import_skips_heavy_libraries(name):
+    heavy = ("pandas", "numpy", "duckdb", "ib_insync", "yfinance")
+    code = f"import sys, {name}; print(','.join(m for m in {heavy!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip() == ""
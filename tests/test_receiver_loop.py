@@ -2,8 +2,9 @@
 """
 Unit-test the *main loop* inside scripts.cancel_replace_receiver.
 
-The test patches every heavyweight dependency (IB, ZMQ, Prometheus, SQLite)
-so that importing the module runs exactly one loop iteration and exits.
+The receiver is built through its factory with fakes for every heavyweight
+dependency (IB, ZMQ, Prometheus, SQLite); ``run()`` drains two frames and
+returns once the fake socket asks it to stop.
 
 It then asserts that:
 • a NEW → REPLACE flow succeeds (retry-registry cleared)
@@ -11,8 +12,6 @@ It then asserts that:
 • no un-handled exceptions escape the loop
 """
 
-import importlib
-import sys
 import time
 from types import SimpleNamespace
 
@@ -35,16 +34,15 @@ def _build_proto_row(proto: int, qty: int, px: float) -> bytes:
 @pytest.fixture
 def patched_env(monkeypatch):
     """
-    Patch all external dependencies **before** importing the receiver.
+    Build a receiver with in-memory fakes.
 
     Yields
     ------
-    (RetryRegistry, metrics_dict)  so the test can assert on them.
+    (receiver, RetryRegistry, metrics_dict)  so the test can assert on them.
     """
-    # 1️⃣  Fake CLI so argparse sees no pytest flags
-    monkeypatch.setattr(sys, "argv", ["cancel_replace_receiver"])
+    import scripts.cancel_replace_receiver as crr
 
-    # 2️⃣  Stub TradingApp – no real IB connection
+    # 1️⃣  Stub TradingApp – no real IB connection
     fake_app = SimpleNamespace(
         order_statuses={},
         send_order=lambda *a, **k: 111,
@@ -52,25 +50,20 @@ def patched_env(monkeypatch):
         placeOrder=lambda *a, **k: None,
         disconnect=lambda *a, **k: None,
     )
-    monkeypatch.setattr("scripts.core.TradingApp", lambda *a, **k: fake_app)
 
-    # 3️⃣  Stub helpers that otherwise hit IB Gateway
-    monkeypatch.setattr("scripts.contracts.create_contract", lambda *a, **k: None)
-    monkeypatch.setattr("scripts.order_factory.make_order", lambda *a, **k: None)
+    # 2️⃣  Stub helpers that otherwise hit IB Gateway
+    monkeypatch.setattr(crr, "create_contract", lambda *a, **k: None)
+    monkeypatch.setattr(crr, "make_order", lambda *a, **k: None)
 
-    # 4️⃣  In-mem StateStore (no SQLite I/O)
-    monkeypatch.setattr(
-        "scripts.state_store.StateStore",
-        lambda *a, **k: SimpleNamespace(load=lambda: {}, upsert=lambda *a, **k: None),
-    )
+    # 3️⃣  In-mem StateStore (no SQLite I/O)
+    store = SimpleNamespace(load=lambda: {}, upsert=lambda *a, **k: None)
 
-    # 5️⃣  Controlled RetryRegistry (huge delay so back-off branch is exercised)
+    # 4️⃣  Controlled RetryRegistry (huge delay so back-off branch is exercised)
     from scripts.retry import RetryRegistry
 
     rreg = RetryRegistry(max_attempts=1, base_delay=1e6)
-    monkeypatch.setattr("scripts.retry.RetryRegistry", lambda *a, **k: rreg)
 
-    # 6️⃣  Stub Prometheus metric objects
+    # 5️⃣  Stub Prometheus metric objects
     class _Metric:
         def inc(self, *_):
             pass
@@ -84,8 +77,11 @@ def patched_env(monkeypatch):
         def labels(self, **_):
             return self
 
+        def observe(self, *_):
+            pass
+
         # histogram.time() context manager
-        def time(self):
+        def time(self, *_):
             return self
 
         def __enter__(self, *args, **kwargs):
@@ -101,9 +97,9 @@ def patched_env(monkeypatch):
         "INFLIGHT_CONN",
         "RECEIVER_BACKOFFS",
         "RETRY_RESETS",
-        "orders_by_symbol",
-        "orders_by_type",
-        "order_latency",
+        "orders_by_symbol_hot",
+        "orders_by_type_hot",
+        "order_latency_hot",
         "orders_filled",
         "orders_canceled",
         "orders_rejected",
@@ -111,60 +107,69 @@ def patched_env(monkeypatch):
         "IB_ERROR_CODES",
     ]
     fake_metrics = {n: _Metric() for n in metric_names}
-    monkeypatch.setattr("scripts.metrics_server.start", lambda *a, **k: None)
     for n, m in fake_metrics.items():
-        monkeypatch.setattr(f"scripts.metrics_server.{n}", m)
+        monkeypatch.setattr(crr, n, m)
 
-    # 7️⃣  Fake ZMQ socket – two frames then “no work”
+    # 6️⃣  Fake ZMQ socket – two frames then “no work”
     import zmq
 
-    #   • Override zmq.Again with a dummy class so constructing it does NOT
-    #     look up zmq.EAGAIN (which triggers the long import-chain in PyZMQ).
-    class _ZmqAgain(Exception):
-        pass
-
-    monkeypatch.setattr(zmq, "Again", _ZmqAgain)
-
-    # inside patched_env fixture ───────────────────────────────────────────
     pending = [
         _build_proto_row(10001, 10, 123.45),  # NEW
         _build_proto_row(10001, 15, 124.00),  # REPLACE
     ]
+    receiver = None
 
     def _dummy_recv(flags=0):
         # Nothing left to consume → tell the receiver to exit gracefully
         if not pending:
-            import sys
-
-            mod = sys.modules.get("scripts.cancel_replace_receiver")
-            if mod is not None:  # module already imported
-                mod.SHUTDOWN = True  # <-- key line
-            raise zmq.Again()  # so outer loop hits 'continue'
+            receiver.stop()
+            raise zmq.Again()  # so the loop hits 'continue'
         return pending.pop(0)
 
-    dummy_sock = SimpleNamespace(
-        bind=lambda *a, **k: None,
-        recv=_dummy_recv,
-        setsockopt=lambda *a, **k: None,
-        close=lambda *a, **k: None,
-    )
-    monkeypatch.setattr("zmq.Context.socket", lambda *a, **k: dummy_sock)
+    dummy_sock = SimpleNamespace(recv=_dummy_recv, close=lambda *a, **k: None)
 
-    # 8️⃣  NOP sleep so the test finishes instantly
+    # 7️⃣  NOP sleep so the test finishes instantly
     monkeypatch.setattr(time, "sleep", lambda *_: None)
 
-    yield rreg, fake_metrics
+    receiver = crr.CancelReplaceReceiver(
+        crr.parse_args([]), dummy_sock, store, retry_reg=rreg,
+        app_factory=lambda *a, **k: fake_app,
+    )
+    yield receiver, rreg, fake_metrics
 
 
 # ─────────────────────────── tests ───────────────────────────
 def test_happy_and_backoff(patched_env):
-    rreg, metrics = patched_env
+    receiver, rreg, metrics = patched_env
 
-    # Import AFTER patching → receiver runs exactly one loop & exits
-    importlib.import_module("scripts.cancel_replace_receiver")
+    receiver.run()  # two frames, then the fake socket stops the loop
+    assert receiver.proto_to_ib == {(10001, "AAPL"): 111}
 
     #   • After NEW + successful REPLACE we expect retry registry cleared
     assert (10001, "AAPL") not in rreg._state
 
     #   • Metric object exists and exposes expected API
     assert hasattr(metrics["RECEIVER_MSGS"], "inc")
+
+
+def test_json_listener_handle():
+    """ib_listener as a library component: validate → send → ACK → refresher."""
+    import json
+
+    from ib.ib_listener import JsonListener
+
+    sent, acks, dirty = [], [], []
+    app = SimpleNamespace(send_order=lambda c, o: sent.append((c.symbol, o.action, o.totalQuantity)) or 7)
+    ack_pub = SimpleNamespace(send_multipart=acks.append)
+    refresher = SimpleNamespace(mark_dirty=lambda: dirty.append(1))
+    listener = JsonListener(app, None, ack_pub, refresher=refresher, allowed_symbols={"AAPL"})
+
+    assert listener.handle({"action": "buy", "symbol": "aapl", "qty": "5", "correlation_id": "c1"}) == 7
+    assert sent == [("AAPL", "BUY", 5)]
+    topic, payload = acks[0]
+    assert topic == b"json_order_acks" and json.loads(payload)["correlation_id"] == "c1"
+    assert dirty == [1]
+
+    assert listener.handle({"action": "SELL", "symbol": "MSFT", "qty": 1}) is None  # not allowed
+    assert listener.handle({"action": "HOLD", "symbol": "AAPL", "qty": 1}) is None
+    assert len(sent) == 1
@@ -0,0 +1,62 @@
+import threading
+
+from data.stream_live_data import TickStreams
+from utils.utils import TickBuffer
+
+
+def _tick(t):
+    return (t, 1.0, 1.1, 100, 200)
+
+
+def test_bounded_queue_drops_oldest():
+    streams = TickStreams(capacity=3)
+    streams.open(1)
+    for t in range(5):
+        streams.put(1, _tick(t))
+    assert streams.dropped[1] == 2
+    assert [streams.get(1)[1][0] for _ in range(3)] == [2, 3, 4]
+    assert streams.get(1, timeout=0.01) is None
+
+
+def test_multiplexed_reader_is_round_robin():
+    streams = TickStreams()
+    streams.open(1)
+    streams.open(2)
+    for t in range(3):
+        streams.put(1, _tick(t))
+    streams.put(2, _tick(10))
+    order = [streams.get(timeout=0)[0] for _ in range(4)]
+    assert order == [1, 2, 1, 1]
+    assert streams.get(timeout=0) is None
+
+
+def test_close_drains_then_ends_and_ignores_late_ticks():
+    streams = TickStreams()
+    streams.open(7)
+    streams.put(7, _tick(1))
+    streams.close(7)
+    streams.put(7, _tick(2))  # arrives after cancel
+    assert streams.get(7)[1][0] == 1
+    assert streams.get(7) is None  # closed and drained → no blocking
+    streams.put(99, _tick(3))  # never opened
+    assert streams.get() is None  # nothing left open
+
+
+def test_blocking_get_wakes_on_put():
+    streams = TickStreams()
+    streams.open(5)
+    timer = threading.Timer(0.05, streams.put, (5, _tick(42)))
+    timer.start()
+    assert streams.get(5, timeout=2.0) == (5, _tick(42))
+    timer.join()
+
+
+def test_drain_into_tick_buffer():
+    streams = TickStreams()
+    streams.open(3)
+    for t in range(4):
+        streams.put(3, _tick(t))
+    buf = TickBuffer(capacity=2)
+    assert streams.drain_into(buf, 3) == 4
+    assert buf.columns()["time"].tolist() == [0, 1, 2, 3]
+    assert streams.get(3, timeout=0) is None
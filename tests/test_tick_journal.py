@@ -0,0 +1,61 @@
+from scripts.tick_journal import NS_PER_DAY, TickJournal, TickJournalReader, list_journals
+from shared_proto.market_data_pb2 import MarketTick
+
+DAY0 = 19_739 * NS_PER_DAY  # 2024-01-17 00:00 UTC
+
+
+def _fill(journal, n, start=DAY0, step=1_000):
+    for i in range(n):
+        journal.append(start + i * step, "AAPL" if i % 2 else "MSFT", 100.0 + i, 100.5 + i, 100.25 + i, i, i + 1, i + 2)
+
+
+def test_roundtrip_across_chunks_and_resume(tmp_path):
+    j = TickJournal(tmp_path, chunk_rows=8)
+    _fill(j, 20)
+    j.close()
+
+    # Resume after restart: appends continue after the committed rows
+    j = TickJournal(tmp_path, chunk_rows=8)
+    _fill(j, 5, start=DAY0 + 20 * 1_000)
+    j.append_tick(MarketTick(symbol="TSLA", ts_unix_ns=DAY0 + 30_000, bid_price=1.0, venue="ARCA"))
+    j.close()
+
+    r = TickJournalReader(tmp_path / "ticks-20240117.tj")
+    assert len(r) == 26
+    rows = list(r.scan())
+    assert [row[0] for row in rows] == sorted(row[0] for row in rows)
+    assert rows[0][:3] == (DAY0, "MSFT", 100.0)
+    assert rows[21][1:3] == ("AAPL", 101.0)
+    assert rows[-1][1] == "TSLA" and rows[-1][-1] == "ARCA"
+
+    bids = r.column("bid_price")
+    assert bids.shape == (26,) and bids[19] == 119.0
+    assert sum(len(c["ts_unix_ns"]) for c in r.chunks()) == 26
+    r.close()
+
+
+def test_search_and_range_scan(tmp_path):
+    j = TickJournal(tmp_path, chunk_rows=8)
+    _fill(j, 40)
+
+    r = TickJournalReader(j.path)
+    assert r.search(DAY0 - 1) == 0
+    assert r.search(DAY0 + 17_000) == 17
+    assert r.search(DAY0 + 17_500) == 18
+    assert r.search(DAY0 + 10**9) == 40
+    got = [row[0] for row in r.scan(start_ns=DAY0 + 7_500, end_ns=DAY0 + 12_000)]
+    assert got == [DAY0 + k * 1_000 for k in range(8, 12)]
+
+    # A live reader picks up rows committed after it opened
+    _fill(j, 30, start=DAY0 + 40_000)
+    assert r.refresh() == 70
+    r.close()
+    j.close()
+
+
+def test_one_file_per_day(tmp_path):
+    j = TickJournal(tmp_path, chunk_rows=8)
+    _fill(j, 3)
+    _fill(j, 3, start=DAY0 + NS_PER_DAY)
+    j.close()
+    assert [p.name for p in list_journals(tmp_path)] == ["ticks-20240117.tj", "ticks-20240118.tj"]
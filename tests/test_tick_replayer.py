@@ -0,0 +1,53 @@
+from scripts.tick_journal import NS_PER_DAY, TickJournal
+from scripts.tick_replayer import _filter, iter_dump, iter_journal, replay, write_dump
+from shared_proto.market_data_pb2 import MarketTick
+
+DAY0 = 19_739 * NS_PER_DAY
+
+
+class ListSocket:
+    def __init__(self):
+        self.frames = []
+
+    def send_multipart(self, frames):
+        self.frames.append(frames)
+
+
+def _journal(tmp_path, n=10, step_ns=1_000_000):
+    j = TickJournal(tmp_path, chunk_rows=8)
+    for i in range(n):
+        j.append(DAY0 + i * step_ns, "AAPL" if i % 2 else "MSFT", 100.0 + i, 101.0 + i, 100.5 + i, 1, 2, 3)
+    j.close()
+
+
+def test_replay_unpaced_preserves_order_and_filters(tmp_path):
+    _journal(tmp_path)
+    sock = ListSocket()
+    stats = replay(sock, _filter(iter_journal(tmp_path), {"AAPL"}), speed=0)
+
+    assert stats.ticks == 5
+    msgs = []
+    for topic, payload in sock.frames:
+        assert topic == b"market_ticks"
+        m = MarketTick()
+        m.ParseFromString(payload)
+        msgs.append(m)
+    assert [m.symbol for m in msgs] == ["AAPL"] * 5
+    assert [m.ts_unix_ns for m in msgs] == [DAY0 + i * 1_000_000 for i in (1, 3, 5, 7, 9)]
+    assert msgs[0].bid_price == 101.0 and msgs[0].venue == "SMART"
+
+
+def test_replay_paces_at_n_times_speed(tmp_path):
+    _journal(tmp_path, n=11, step_ns=20_000_000)  # 200 ms recorded span
+    stats = replay(ListSocket(), iter_journal(tmp_path), speed=4)
+    assert stats.ticks == 11
+    assert 0.045 <= stats.elapsed_s < 0.2  # ≈ 50 ms at 4×
+
+
+def test_dump_roundtrip(tmp_path):
+    path = tmp_path / "ticks.bin"
+    with open(path, "wb") as fh:
+        msgs = [MarketTick(symbol="AAPL", ts_unix_ns=i, bid_price=float(i), venue="ARCA") for i in range(3)]
+        assert write_dump(fh, msgs) == 3
+    rows = list(iter_dump(path))
+    assert [(r[0], r[1], r[2], r[-1]) for r in rows] == [(i, "AAPL", float(i), "ARCA") for i in range(3)]
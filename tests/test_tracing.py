@@ -0,0 +1,115 @@
+import json
+import threading
+
+from scripts.tracing import (
+    ACKED,
+    ADMITTED,
+    DECODED,
+    PLACED,
+    STAGES,
+    SUBMITTED,
+    VALIDATED,
+    Tracer,
+    install_dump_signal,
+)
+
+
+def _run(tracer, order_id=None, key="c1"):
+    trace = tracer.start(key)
+    tracer.mark(DECODED)
+    tracer.mark(VALIDATED)
+    if order_id is not None:
+        tracer.mark(ADMITTED)
+        tracer.mark(PLACED)
+        tracer.bind_order(order_id)
+    tracer.mark(ACKED)
+    return trace
+
+
+def test_stages_monotonic_and_recorded_once_end_first():
+    tracer = Tracer(size=8)
+    trace = _run(tracer, order_id=7)
+    tracer.end(trace)
+    assert tracer.traces() == []  # waiting for submitted
+    assert tracer.current() is None
+
+    tracer.on_status(7, "PendingSubmit")
+    assert tracer.traces() == []
+    tracer.on_status(7, "Submitted")
+    tracer.on_status(7, "Submitted")
+    assert tracer.traces() == [trace]
+    ts = [t for t in trace.t if t]
+    assert len(ts) == len(STAGES)
+    assert trace.t[SUBMITTED] > trace.t[PLACED]
+
+
+def test_submitted_before_end_recorded_at_end():
+    tracer = Tracer(size=8)
+    trace = _run(tracer, order_id=3)
+    tracer.on_status(3, "PreSubmitted")
+    assert tracer.traces() == []
+    tracer.end(trace)
+    tracer.end(trace)
+    assert tracer.traces() == [trace]
+
+
+def test_unbound_trace_recorded_at_end():
+    tracer = Tracer(size=8)
+    tracer.start("reject")
+    tracer.mark(DECODED)
+    tracer.end()
+    row = tracer.dump()[0]
+    assert row["key"] == "reject" and row["order_id"] is None
+    assert "decoded_us" in row and "validated_us" not in row
+
+
+def test_mark_without_trace_is_noop():
+    tracer = Tracer(size=8)
+    tracer.mark(DECODED)
+    tracer.bind_order(1)
+    tracer.end()
+    assert tracer.traces() == []
+
+
+def test_ring_wraps_keeps_newest():
+    tracer = Tracer(size=4)
+    for i in range(10):
+        tracer.end(_run(tracer, key=str(i)))
+    assert [t.key for t in tracer.traces()] == ["6", "7", "8", "9"]
+
+
+def test_pending_eviction_records_oldest():
+    tracer = Tracer(size=8, max_pending=2)
+    traces = [_run(tracer, order_id=i) for i in range(3)]
+    for t in traces:
+        tracer.end(t)
+    assert tracer.traces() == [traces[0]]
+    tracer.on_status(0, "Submitted")  # late status for an evicted trace
+    assert tracer.traces() == [traces[0]]
+
+
+def test_dump_writes_json_lines(tmp_path):
+    tracer = Tracer(size=8)
+    tracer.end(_run(tracer, key="a"))
+    tracer.end(_run(tracer, key="b"))
+    path = tmp_path / "sub" / "traces.jsonl"
+    rows = tracer.dump(str(path))
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert lines == rows
+    assert [r["key"] for r in rows] == ["a", "b"]
+    assert rows[0]["acked_us"] >= rows[0]["validated_us"] >= rows[0]["decoded_us"] >= 0
+
+
+def test_dump_signal_off_main_thread_is_noop(tmp_path):
+    errors = []
+
+    def run():
+        try:
+            install_dump_signal(Tracer(size=8), str(tmp_path / "t.jsonl"))
+        except Exception as e:  # signal.signal raises ValueError off the main thread
+            errors.append(e)
+
+    th = threading.Thread(target=run)
+    th.start()
+    th.join()
+    assert errors == []
@@ -1,6 +1,13 @@
+import numpy as np
 import pandas as pd
+import pytest
 
-from utils.utils import Tick, setup_logger
+import json
+import logging
+import sys
+import time
+
+from utils.utils import JsonFormatter, SampledLogger, Tick, TickBuffer, flush_logs, setup_logger
 
 
 def test_tick_post_init():
@@ -14,8 +21,137 @@ def test_tick_post_init():
     assert t.ask_size == 7
 
 
+def test_tick_timestamp_is_lazy_and_cached():
+    t = Tick(1_700_000_000, 1.2, 1.3, 5, 7)
+    assert t._ts is None
+    assert t.timestamp_ is t.timestamp_
+    assert t == Tick(1_700_000_000, "1.2", "1.3", "5", "7")
+    assert not hasattr(t, "__dict__")
+
+
+def test_tick_buffer_grows_and_views_without_copy():
+    buf = TickBuffer(capacity=2)
+    for i in range(5):
+        buf.append(1_700_000_000 + i, 1.0 + i, 1.1 + i, i, 2 * i)
+    buf.append_tick(Tick(1_700_000_005, 6.0, 6.1, 5, 10))
+    assert len(buf) == 6 and buf.capacity == 8
+
+    cols = buf.columns()
+    df = buf.to_frame()
+    assert list(df.columns) == ["time", "bid_price", "ask_price", "bid_size", "ask_size"]
+    assert df["ask_size"].tolist() == [0, 2, 4, 6, 8, 10]
+    assert np.shares_memory(df["bid_price"].to_numpy(), cols["bid_price"])
+    assert buf.timestamps()[0] == np.datetime64(1_700_000_000, "s")
+
+    buf.clear()
+    assert len(buf.to_frame()) == 0
+
+
+def test_tick_buffer_arrow_view():
+    pytest.importorskip("pyarrow")
+    buf = TickBuffer()
+    buf.append(1_700_000_000, 1.2, 1.3, 5, 7)
+    table = buf.to_arrow()
+    assert table.num_rows == 1
+    assert np.shares_memory(table.column("time").chunk(0).to_numpy(), buf.columns()["time"])
+
+
 def test_setup_logger_creates_file(tmp_path):
     log_file = tmp_path / "test.log"
     logger = setup_logger("TestLogger", log_file=str(log_file))
     logger.info("hello")
+    flush_logs()  # records are written by a background listener
     assert log_file.exists() and log_file.stat().st_size > 0
+
+
+def test_setup_logger_is_idempotent(tmp_path):
+    first, second = tmp_path / "a.log", tmp_path / "b.log"
+    logger = setup_logger("IdempotentLogger", log_file=str(first))
+    assert setup_logger("IdempotentLogger", log_file=str(first)) is logger
+    setup_logger("IdempotentLogger", log_file=str(second))  # adds a file, nothing else
+    assert len(logger.handlers) == 1
+
+    logger.info("once %d", 1)
+    flush_logs()
+    assert first.read_text().count("once 1") == 1
+    assert second.read_text().count("once 1") == 1
+
+
+def test_setup_logger_does_not_block_on_io(tmp_path):
+    class SlowHandler(logging.Handler):
+        def emit(self, record):
+            time.sleep(0.05)
+
+    logger = setup_logger("SlowIOLogger", log_file=str(tmp_path / "slow.log"))
+    from utils import utils
+
+    utils._PIPELINES["SlowIOLogger"].add("slow", SlowHandler)
+    t0 = time.perf_counter()
+    for i in range(20):
+        logger.info("msg %d", i)
+    assert time.perf_counter() - t0 < 0.05
+    flush_logs()
+
+
+def test_json_formatter_keeps_extra_fields():
+    fmt = JsonFormatter()
+    record = logging.makeLogRecord(
+        {"msg": "fill %s", "args": ("AAPL",), "levelname": "INFO", "order_id": 7, "px": 1.5, "ts": object()}
+    )
+    out = json.loads(fmt.format(record))
+    assert out["message"] == "fill AAPL" and out["level"] == "INFO"
+    assert out["order_id"] == 7 and out["px"] == 1.5
+    assert out["ts"].startswith("<object")  # non-JSON values fall back to str()
+
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.makeLogRecord({"msg": "oops", "exc_info": sys.exc_info()})
+    assert "ValueError: boom" in json.loads(fmt.format(record))["exc_info"]
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sampled_logger_one_in_n(caplog):
+    hot = SampledLogger(logging.getLogger("sampled.n"), every=10, per_second=0)
+    with caplog.at_level(logging.INFO, logger="sampled.n"):
+        for i in range(25):
+            hot.info("rx %d", i)
+    assert [r.getMessage() for r in caplog.records] == [
+        "rx 0",
+        "rx 10 (+9 suppressed)",
+        "rx 20 (+9 suppressed)",
+    ]
+    assert caplog.records[1].suppressed == 9
+    assert hot.suppressed() == {"rx %d": 4}
+
+
+def test_sampled_logger_rate_limit_per_site(caplog):
+    clock = _Clock()
+    hot = SampledLogger(logging.getLogger("sampled.rate"), per_second=2, clock=clock)
+    with caplog.at_level(logging.INFO, logger="sampled.rate"):
+        emitted = [hot.info("a %d", i) for i in range(5)]
+        assert emitted == [True, True, False, False, False]
+        assert hot.warning("b")  # another call site has its own budget
+        clock.now = 0.5  # one token back
+        assert hot.info("a %d", 5)
+    assert caplog.records[-1].getMessage() == "a 5 (+3 suppressed)"
+    assert caplog.records[-1].funcName == "test_sampled_logger_rate_limit_per_site"
+
+
+def test_sampled_logger_is_lazy_when_disabled():
+    class Loud:
+        def __str__(self):
+            raise AssertionError("formatted")
+
+    logger = logging.getLogger("sampled.lazy")
+    logger.setLevel(logging.WARNING)
+    hot = SampledLogger(logger, per_second=0)
+    assert hot.info("value %s", Loud()) is False
+    assert hot.suppressed() == {}
@@ -24,6 +24,7 @@ def test_v1_simple_order_ack(monkeypatch):
 
     import scripts.v1_receiver as v1
     monkeypatch.setattr(v1, "TradingApp", FakeApp)
+    monkeypatch.setattr(v1, "_within_session", lambda now=None: True)  # any time of day
 
     # Start receiver in background thread
     th = threading.Thread(target=v1.main, daemon=True)
@@ -37,6 +38,7 @@ def test_v1_simple_order_ack(monkeypatch):
     sub = ctx.socket(zmq.SUB)
     sub.connect(ack_addr)
     sub.setsockopt(zmq.SUBSCRIBE, b"order_acks")
+    time.sleep(0.3)  # PUB drops acks until the subscription has propagated
 
     env = {
         "version": "v1",
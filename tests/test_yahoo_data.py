@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from data import yahoo_data
+
+
+def _frame(start, n, close=10.0, freq="1D"):
+    idx = pd.date_range(start, periods=n, freq=freq, tz="America/New_York")
+    return pd.DataFrame(
+        {
+            "Open": close,
+            "High": close + 1,
+            "Low": close - 1,
+            "Close": close,
+            "Volume": 100.0,
+        },
+        index=idx,
+    )
+
+
+class FakeFetch:
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, ticker, period=None, interval=None, start=None):
+        with self.lock:
+            self.calls.append((ticker, period, start))
+        if ticker == "BAD":
+            raise RuntimeError("no data")
+        if start is None:
+            return _frame("2024-01-01", 3)
+        return _frame(pd.Timestamp(start).tz_convert("America/New_York"), 2, close=11.0)
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "bars.sqlite")
+
+
+def test_first_load_then_incremental_upsert(db):
+    fetch = FakeFetch()
+    res = yahoo_data.load_universe(
+        ["AAPL", "MSFT", "BAD"], db_path=db, fetch=fetch, rate_per_s=0
+    )
+    assert res["AAPL"] == res["MSFT"] == 3
+    assert isinstance(res["BAD"], RuntimeError)
+    assert all(start is None for _, _, start in fetch.calls)
+
+    fetch.calls.clear()
+    res = yahoo_data.load_universe(["AAPL"], db_path=db, fetch=fetch, rate_per_s=0)
+    ((_, period, start),) = fetch.calls
+    last = pd.Timestamp("2024-01-03", tz="America/New_York")
+    assert start == last  # resumes at the newest stored (possibly partial) bar
+    assert res["AAPL"] == 2
+
+    bars = yahoo_data.read_bars("AAPL", db_path=db)
+    assert len(bars) == 4  # 3 original, last one overwritten, 1 new
+    assert bars["close"].tolist() == [10.0, 10.0, 11.0, 11.0]
+    assert bars.index[0] == pd.Timestamp("2024-01-01", tz="America/New_York")
+
+
+def test_rate_limiter_spaces_calls():
+    limiter = yahoo_data.RateLimiter(50)
+    t0 = time.monotonic()
+    for _ in range(5):
+        limiter.acquire()
+    assert time.monotonic() - t0 >= 4 / 50 * 0.9
@@ -1,61 +1,427 @@
-import os
+from __future__ import annotations
+
+import atexit
+import copy
 import json
-import pandas as pd
-from dataclasses import dataclass, field
 import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import TYPE_CHECKING
+
+if (
+    TYPE_CHECKING
+):  # numpy/pandas are imported on first use: every process imports this module
+    import numpy as np
+    import pandas as pd
+
+try:  # optional: several times faster than json.dumps
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 
 TRADE_BAR_PROPERTIES = ["time", "open", "high", "low", "close", "volume"]
 
 
+# LogRecord attributes; anything else on a record came from ``extra=``
+_RECORD_ATTRS = frozenset(logging.makeLogRecord({}).__dict__) | {
+    "message",
+    "asctime",
+    "taskName",
+}
+
+_json_encode = json.JSONEncoder(separators=(",", ":"), default=str).encode
+
+
+def _dumps(obj: dict) -> str:
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=str).decode()
+        except (TypeError, orjson.JSONEncodeError):
+            pass  # e.g. non-str keys or ints beyond 64 bit
+    return _json_encode(obj)
+
+
 class JsonFormatter(logging.Formatter):
-    """Simple JSON log formatter."""
+    """
+    JSON log formatter.  Fields passed via ``extra={...}`` are kept as
+    top-level keys; the timestamp string is reused within the same second.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._second = (None, "")
 
     def format(self, record: logging.LogRecord) -> str:
+        sec = int(record.created)
+        cached_sec, stamp = self._second
+        if sec != cached_sec:
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", self.converter(sec))
+            self._second = (sec, stamp)
         log_record = {
-            "time": self.formatTime(record, "%Y-%m-%d %H:%M:%S"),
+            "time": stamp,
             "level": record.levelname,
             "message": record.getMessage(),
         }
-        return json.dumps(log_record)
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and key not in log_record:
+                log_record[key] = value
+        if record.exc_info:
+            log_record["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_record["exc_info"] = record.exc_text
+        return _dumps(log_record)
+
 
-@dataclass
 class Tick:
-    time: int
-    bid_price: float
-    ask_price: float
-    bid_size: float
-    ask_size: float
-    timestamp_: pd.Timestamp = field(init=False)
-
-    def __post_init__(self):
-        self.timestamp_ = pd.to_datetime(self.time, unit="s")
-        self.bid_price = float(self.bid_price)
-        self.ask_price = float(self.ask_price)
-        self.bid_size = int(self.bid_size)
-        self.ask_size = int(self.ask_size)
-
-def setup_logger(name: str = "AppLogger", log_file: str | None = None, level: int = logging.INFO):
-    """Return a console/file logger; JSON logging can be enabled via $JSON_LOGS."""
+    """
+    One bid/ask tick.
+
+    A ``__slots__`` class rather than a dataclass: building one is a handful
+    of attribute stores, and the pandas ``Timestamp`` is only created the
+    first time ``timestamp_`` is read.
+    """
+
+    __slots__ = ("time", "bid_price", "ask_price", "bid_size", "ask_size", "_ts")
+
+    def __init__(
+        self,
+        time: int,
+        bid_price: float,
+        ask_price: float,
+        bid_size: float,
+        ask_size: float,
+    ):
+        self.time = time
+        self.bid_price = float(bid_price)
+        self.ask_price = float(ask_price)
+        self.bid_size = int(bid_size)
+        self.ask_size = int(ask_size)
+        self._ts = None
+
+    @property
+    def timestamp_(self) -> pd.Timestamp:
+        if self._ts is None:
+            import pandas as pd
+
+            self._ts = pd.to_datetime(self.time, unit="s")
+        return self._ts
+
+    def astuple(self) -> tuple:
+        return (self.time, self.bid_price, self.ask_price, self.bid_size, self.ask_size)
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.astuple() == other.astuple()
+
+    __hash__ = None  # mutable, like the dataclass it replaces
+
+    def __repr__(self) -> str:
+        return (
+            f"Tick(time={self.time!r}, bid_price={self.bid_price!r}, ask_price={self.ask_price!r}, "
+            f"bid_size={self.bid_size!r}, ask_size={self.ask_size!r})"
+        )
+
+
+TICK_COLUMNS = {
+    "time": "int64",
+    "bid_price": "float64",
+    "ask_price": "float64",
+    "bid_size": "int64",
+    "ask_size": "int64",
+}
+
+
+class TickBuffer:
+    """
+    Columnar tick store: one preallocated NumPy array per field.
+
+    ``append`` writes in place (capacity doubles when full, so appends are
+    amortised O(1) and allocation-free in steady state).  ``columns()``,
+    ``to_frame()`` and ``to_arrow()`` return views over the filled part
+    without copying; a view taken before the buffer grows keeps the old
+    arrays, so take a fresh one after appending.
+
+    Example
+    -------
+    buf = TickBuffer()
+    buf.append(1_700_000_000, 1.2, 1.3, 5, 7)
+    df = buf.to_frame()
+    """
+
+    def __init__(self, capacity: int = 65_536):
+        import numpy as np
+
+        self._cols = {
+            name: np.empty(max(1, capacity), dtype)
+            for name, dtype in TICK_COLUMNS.items()
+        }
+        self._n = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def capacity(self) -> int:
+        return len(self._cols["time"])
+
+    def append(
+        self,
+        time: int,
+        bid_price: float,
+        ask_price: float,
+        bid_size: float,
+        ask_size: float,
+    ) -> None:
+        i = self._n
+        if i == self.capacity:
+            self._grow()
+        c = self._cols
+        c["time"][i] = time
+        c["bid_price"][i] = bid_price
+        c["ask_price"][i] = ask_price
+        c["bid_size"][i] = bid_size
+        c["ask_size"][i] = ask_size
+        self._n = i + 1
+
+    def append_tick(self, tick: Tick) -> None:
+        self.append(*tick.astuple())
+
+    def clear(self) -> None:
+        self._n = 0
+
+    def columns(self) -> dict:
+        """Name → NumPy view of the filled rows."""
+        n = self._n
+        return {name: col[:n] for name, col in self._cols.items()}
+
+    def timestamps(self) -> np.ndarray:
+        """``time`` as ``datetime64[s]`` (a view, not a copy)."""
+        return self._cols["time"][: self._n].view("datetime64[s]")
+
+    def to_frame(self) -> pd.DataFrame:
+        import pandas as pd
+
+        return pd.DataFrame(self.columns(), copy=False)
+
+    def to_arrow(self):
+        """``pyarrow.Table`` over the filled rows (needs ``pyarrow``)."""
+        import pyarrow as pa
+
+        cols = self.columns()
+        return pa.Table.from_arrays(
+            [pa.array(v) for v in cols.values()], names=list(cols)
+        )
+
+    def _grow(self) -> None:
+        import numpy as np
+
+        n = self._n
+        for name, col in self._cols.items():
+            new = np.empty(len(col) * 2, col.dtype)
+            new[:n] = col[:n]
+            self._cols[name] = new
+
+
+class _QueueHandler(QueueHandler):
+    """Merge args on the caller's thread; leave all formatting to the listener."""
+
+    _exc_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Tracebacks cannot cross threads safely; keep the text instead
+            record.exc_text = self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _LogPipeline:
+    """A logger's ``QueueHandler`` plus the ``QueueListener`` doing its I/O."""
+
+    def __init__(self, logger: logging.Logger, formatter: logging.Formatter) -> None:
+        self.formatter = formatter
+        self.queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        self.handlers: dict = {}  # "console" | log file path → handler
+        self.listener = None
+        logger.addHandler(_QueueHandler(self.queue))
+
+    def add(self, key: str, make_handler) -> None:
+        if key in self.handlers:
+            return
+        handler = make_handler()
+        handler.setFormatter(self.formatter)
+        self.handlers[key] = handler
+        self.restart()
+
+    def restart(self) -> None:
+        """Write out everything queued so far, then keep listening."""
+        self.stop()
+        self.listener = QueueListener(
+            self.queue, *self.handlers.values(), respect_handler_level=True
+        )
+        self.listener.start()
+
+    def stop(self) -> None:
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+
+_PIPELINES: dict = {}
+_PIPELINES_LOCK = threading.Lock()
+
+
+def flush_logs() -> None:
+    """Block until every record logged so far has been written."""
+    with _PIPELINES_LOCK:
+        for pipeline in _PIPELINES.values():
+            pipeline.restart()
+
+
+@atexit.register
+def _stop_logs() -> None:
+    with _PIPELINES_LOCK:
+        for pipeline in _PIPELINES.values():
+            pipeline.stop()
+
+
+class _Site:
+    __slots__ = ("seen", "suppressed", "tokens", "stamp")
+
+    def __init__(self, burst: float, now: float) -> None:
+        self.seen = 0
+        self.suppressed = 0
+        self.tokens = burst
+        self.stamp = now
+
+
+class SampledLogger:
+    """
+    Per-call-site sampling and rate limiting for hot-path logs.
+
+    A call site is identified by its format string, so keep arguments out of
+    it: ``hot.info("RX proto=%s qty=%s", pid, qty)``.  Each site logs the
+    first of every ``every`` calls, and at most ``per_second`` of those per
+    second (token bucket, bursts up to ``per_second``).  The next line that
+    does get through carries ``(+N suppressed)`` and a ``suppressed`` extra
+    field.  Nothing is formatted unless the line is emitted, and disabled
+    levels cost one ``isEnabledFor`` check.  Counts are approximate when
+    several threads share a site.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        *,
+        every: int | None = None,
+        per_second: float | None = None,
+        clock=time.monotonic,
+    ) -> None:
+        self.logger = logger
+        self.every = max(
+            1, every if every is not None else int(os.getenv("HOT_LOG_EVERY", "1"))
+        )
+        if per_second is None:
+            per_second = float(os.getenv("HOT_LOG_PER_S", "10"))
+        self.per_second = (
+            per_second if per_second > 0 else None
+        )  # None/0 → no rate limit
+        self.clock = clock
+        self._sites: dict = {}
+
+    def log(self, level: int, msg: str, *args, **kwargs) -> bool:
+        """Log like ``Logger.log`` if the site's budget allows; return whether it did."""
+        logger = self.logger
+        if not logger.isEnabledFor(level):
+            return False
+        site = self._sites.get(msg)
+        if site is None:
+            site = self._sites[msg] = _Site(self.per_second or 0.0, self.clock())
+        site.seen += 1
+        if self.every > 1 and (site.seen - 1) % self.every:
+            site.suppressed += 1
+            return False
+        rate = self.per_second
+        if rate is not None:
+            now = self.clock()
+            site.tokens = min(rate, site.tokens + (now - site.stamp) * rate)
+            site.stamp = now
+            if site.tokens < 1.0:
+                site.suppressed += 1
+                return False
+            site.tokens -= 1.0
+        suppressed = site.suppressed
+        if suppressed:
+            site.suppressed = 0
+            msg = msg + " (+%d suppressed)"
+            args = (*args, suppressed)
+            kwargs["extra"] = {**kwargs.get("extra", {}), "suppressed": suppressed}
+        kwargs.setdefault("stacklevel", 2)  # attribute the line to our caller
+        logger.log(level, msg, *args, **kwargs)
+        return True
+
+    def debug(self, msg: str, *args, **kwargs) -> bool:
+        kwargs.setdefault("stacklevel", 3)
+        return self.log(logging.DEBUG, msg, *args, **kwargs)
+
+    def info(self, msg: str, *args, **kwargs) -> bool:
+        kwargs.setdefault("stacklevel", 3)
+        return self.log(logging.INFO, msg, *args, **kwargs)
+
+    def warning(self, msg: str, *args, **kwargs) -> bool:
+        kwargs.setdefault("stacklevel", 3)
+        return self.log(logging.WARNING, msg, *args, **kwargs)
+
+    def error(self, msg: str, *args, **kwargs) -> bool:
+        kwargs.setdefault("stacklevel", 3)
+        return self.log(logging.ERROR, msg, *args, **kwargs)
+
+    def suppressed(self) -> dict:
+        """Format string → lines suppressed since that site last logged."""
+        return {
+            msg: site.suppressed for msg, site in self._sites.items() if site.suppressed
+        }
+
+
+def setup_logger(
+    name: str = "AppLogger", log_file: str | None = None, level: int = logging.INFO
+):
+    """
+    Return a console/file logger; JSON logging can be enabled via $JSON_LOGS.
+
+    Records are put on a queue and written by a ``QueueListener`` thread, so
+    callers never block on console or disk I/O.  Calling this again for the
+    same ``name`` only updates the level and adds ``log_file`` if it is new.
+    """
 
     logger = logging.getLogger(name)
     logger.setLevel(level)
 
-    json_logs = os.getenv("JSON_LOGS", "0") == "1"
-    if json_logs:
-        formatter: logging.Formatter = JsonFormatter()
-    else:
-        formatter = logging.Formatter("%(asctime)s [%(levelname)s]: %(message)s", "%Y-%m-%d %H:%M:%S")
+    with _PIPELINES_LOCK:
+        pipeline = _PIPELINES.get(name)
+        if pipeline is None:
+            if os.getenv("JSON_LOGS", "0") == "1":
+                formatter: logging.Formatter = JsonFormatter()
+            else:
+                formatter = logging.Formatter(
+                    "%(asctime)s [%(levelname)s]: %(message)s", "%Y-%m-%d %H:%M:%S"
+                )
+            pipeline = _PIPELINES[name] = _LogPipeline(logger, formatter)
 
-    # Console output
-    ch = logging.StreamHandler()
-    ch.setFormatter(formatter)
-    logger.addHandler(ch)
+        # Console output
+        pipeline.add("console", logging.StreamHandler)
 
-    # Optional file logging
-    if log_file:
-        fh = logging.FileHandler(log_file)
-        fh.setFormatter(formatter)
-        logger.addHandler(fh)
+        # Optional file logging
+        if log_file:
+            pipeline.add(
+                os.path.abspath(log_file), lambda: logging.FileHandler(log_file)
+            )
 
     return logger
-